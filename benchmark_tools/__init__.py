@@ -0,0 +1,73 @@
+# benchmark_tools/__init__.py
+"""
+Helpers for the benchmark scripts of the Django projects in this repository
+(social_media_api/benchmarks, django_blog/benchmarks).
+
+Import it after `django.setup()`: each project's `benchmarks/common.py`
+sets up its settings (which put the repository root on sys.path) and
+re-exports these. Benchmarks work against a throwaway test database
+(`scratch_database()`), never the configured one.
+"""
+import argparse
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def scratch_database():
+    """Create a fresh test database for the duration of the block."""
+    old_name = connection.settings_dict['NAME']
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(fn, args_list):
+    """Call `fn(*args)` for each args tuple; return latency stats in ms."""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'n': len(samples),
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[max(0, int(len(samples) * 0.95) - 1)],
+        'max_ms': samples[-1],
+    }
+
+
+def print_table(title, rows):
+    print(f'\n{title}')
+    print(f"  {'case':<40}{'n':>6}{'median ms':>12}{'p95 ms':>10}{'max ms':>10}")
+    for name, stats in rows:
+        print(
+            f"  {name:<40}{stats['n']:>6}{stats['median_ms']:>12.3f}"
+            f"{stats['p95_ms']:>10.3f}{stats['max_ms']:>10.3f}"
+        )
+
+
+def parser(description):
+    p = argparse.ArgumentParser(description=description)
+    p.add_argument('--seed', type=int, default=42)
+    return p
+
+
+def chunked(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,98 @@
+# benchmarks/page_cache.py
+"""
+Anonymous throughput of the public pages with and without the page cache.
+
+    python -m benchmarks.page_cache --posts 5000 --requests 2000
+
+Replays anonymous GETs of the post list (first pages), post details and tag
+pages through the full Django stack, first with BLOG_PAGE_CACHE_TTL=0 (every
+hit renders and queries) and then with the cache on, and reports latency
+and requests per second for each. A comment is added every
+--write-every requests in the cached run, so invalidation is part of it.
+"""
+import random
+import time
+
+from benchmarks.common import chunked, measure, parser, print_table, scratch_database
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import Client, override_settings
+from django.urls import reverse
+from taggit.models import Tag, TaggedItem
+
+from blog.models import Comment, Post
+
+User = get_user_model()
+TAGS = [f"topic{i}" for i in range(50)]
+
+
+def populate(posts, rng):
+    users = User.objects.bulk_create([User(username=f"user{i}", password="!") for i in range(50)])
+    for batch in chunked(
+        (Post(author=rng.choice(users), title=f"Post {i}", content="lorem ipsum " * 80) for i in range(posts)),
+        2000,
+    ):
+        Post.objects.bulk_create(batch)
+    post_ids = list(Post.objects.values_list("pk", flat=True))
+    tags = Tag.objects.bulk_create([Tag(name=name, slug=name) for name in TAGS])
+    content_type = ContentType.objects.get_for_model(Post)
+    TaggedItem.objects.bulk_create(
+        TaggedItem(tag=tag, content_type=content_type, object_id=pk)
+        for pk in post_ids for tag in rng.sample(tags, 3)
+    )
+    Comment.objects.bulk_create(
+        Comment(post_id=rng.choice(post_ids), author=rng.choice(users), content="nice post")
+        for _ in range(posts * 2)
+    )
+    return users, post_ids
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--posts", type=int, default=5000)
+    p.add_argument("--requests", type=int, default=2000)
+    p.add_argument("--write-every", type=int, default=200)
+    opts = p.parse_args()
+    rng = random.Random(opts.seed)
+
+    quiet = {"QUERY_METRICS_SLOW_REQUEST_MS": None, "QUERY_METRICS_SLOW_QUERY_COUNT": None}
+    with scratch_database(), override_settings(ALLOWED_HOSTS=["testserver"], **quiet):
+        users, post_ids = populate(opts.posts, rng)
+        cases = {
+            "post list": [f"{reverse('blog:post_list')}?page={n}" for n in range(1, 6)],
+            "post detail": [reverse("blog:post_detail", args=[pk]) for pk in rng.sample(post_ids, 200)],
+            "tag page": [reverse("blog:post_by_tag", args=[name]) for name in TAGS],
+        }
+
+        rows, rps = [], []
+        for label, urls in cases.items():
+            stream = [rng.choice(urls) for _ in range(opts.requests)]
+            for mode, ttl in (("no cache", 0), ("page cache", 300)):
+                cache.clear()
+                client = Client()
+                served = 0
+
+                def get(url):
+                    nonlocal served
+                    served += 1
+                    if ttl and served % opts.write_every == 0:
+                        Comment.objects.create(post_id=rng.choice(post_ids), author=users[0], content="new")
+                    client.get(url)
+
+                with override_settings(BLOG_PAGE_CACHE_TTL=ttl):
+                    started = time.perf_counter()
+                    stats = measure(get, [(url,) for url in stream])
+                    elapsed = time.perf_counter() - started
+                rows.append((f"{label} ({mode})", stats))
+                rps.append((f"{label} ({mode})", len(stream) / elapsed))
+
+        print_table("Anonymous GETs", rows)
+        print(f"\n  {'case':<40}{'req/s':>10}")
+        for name, value in rps:
+            print(f"  {name:<40}{value:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
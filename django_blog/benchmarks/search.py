@@ -0,0 +1,115 @@
+# benchmarks/search.py
+"""
+Search page latency: the ranked full-text search vs the old icontains query.
+
+    python -m benchmarks.search --posts 500000
+
+Loads synthetic tagged posts (words drawn from a skewed vocabulary, so some
+terms are common and some rare) and times what one results page costs:
+the paginator's COUNT, the first page of posts and, for the full-text
+backend, the snippets. "icontains" is the query the search view ran
+before: title/content/tag name LIKE '%q%' joined through the tags, with
+DISTINCT.
+"""
+import random
+
+from benchmarks.common import chunked, measure, parser, print_table, scratch_database
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Q
+from taggit.models import Tag, TaggedItem
+
+from blog import search
+from blog.models import Post
+
+User = get_user_model()
+PAGE = 10
+
+
+def vocabulary(size, rng):
+    # Pronounceable made-up words rather than "word123": numbered words share
+    # long prefixes, which would make every prefix query match ~1000 terms.
+    words = set()
+    while len(words) < size:
+        syllables = rng.randint(2, 4)
+        words.add("".join(rng.choice("bdfgklmnprstvz") + rng.choice("aeiou") for _ in range(syllables)))
+    return sorted(words, key=lambda word: rng.random())
+
+
+VOCABULARY = vocabulary(5000, random.Random(0))
+TAGS = [f"topic{i}" for i in range(200)]
+
+
+def populate(posts, rng):
+    authors = User.objects.bulk_create([User(username=f"user{i}", password="!") for i in range(100)])
+    tags = Tag.objects.bulk_create([Tag(name=name, slug=name) for name in TAGS])
+    weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+    picked = {}
+
+    def text(words):
+        return " ".join(rng.choices(VOCABULARY, weights, k=words))
+
+    def rows():
+        for i in range(posts):
+            picked[i] = rng.sample(tags, 3)
+            yield Post(
+                author=rng.choice(authors), title=text(6), content=text(40),
+                search_tags=" ".join(tag.name for tag in picked[i]),
+            )
+
+    for batch in chunked(rows(), 10000):
+        Post.objects.bulk_create(batch)
+    content_type = ContentType.objects.get_for_model(Post)
+    post_ids = Post.objects.order_by("pk").values_list("pk", flat=True).iterator()
+    items = (
+        TaggedItem(tag=tag, content_type=content_type, object_id=pk)
+        for i, pk in enumerate(post_ids) for tag in picked[i]
+    )
+    for batch in chunked(items, 10000):
+        TaggedItem.objects.bulk_create(batch)
+
+
+def icontains_page(q):
+    matches = Post.objects.for_listing().filter(
+        Q(title__icontains=q) | Q(content__icontains=q) | Q(tags__name__icontains=q)
+    ).distinct()
+    matches.count()
+    list(matches[:PAGE])
+
+
+def search_page(q):
+    results = search.SearchResults(q)
+    results.count()
+    results[:PAGE]
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--posts", type=int, default=500000)
+    p.add_argument("--samples", type=int, default=30)
+    opts = p.parse_args()
+    rng = random.Random(opts.seed)
+
+    with scratch_database():
+        populate(opts.posts, rng)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        queries = {
+            "common word": [(VOCABULARY[rng.randrange(10)],) for _ in range(opts.samples)],
+            "rare word": [(VOCABULARY[rng.randrange(1000, 5000)],) for _ in range(opts.samples)],
+            "tag name": [(rng.choice(TAGS),) for _ in range(opts.samples)],
+            "word prefix": [(VOCABULARY[rng.randrange(100, 1000)][:4],) for _ in range(opts.samples)],
+        }
+        rows = []
+        for label, args in queries.items():
+            rows.append((f"{label} (icontains)", measure(icontains_page, args)))
+            rows.append((f"{label} ({search.get_backend().name})", measure(search_page, args)))
+        print(f"{opts.posts} posts")
+        print_table("Search results page: COUNT + first page", rows)
+
+
+if __name__ == "__main__":
+    main()
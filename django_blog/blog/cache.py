@@ -0,0 +1,140 @@
+# blog/cache.py
+"""
+Page and fragment caching for the public blog pages.
+
+Cached HTML is keyed by version counters, one per scope:
+
+    all          every page (bumped when a tag is renamed or deleted)
+    list         the post list pages
+    post:<pk>    one post's detail page
+    tag:<slug>   one tag's post list
+    tags         the set of tags: names and slugs (blog/tag_stats.py)
+    tag-stats    per-tag post counts: the tag index and the tag cloud
+
+Writes bump the affected versions from signals (blog/signals.py), which
+makes every entry built on the old version unreachable; nothing has to be
+found and deleted. Unreachable entries age out with BLOG_PAGE_CACHE_TTL.
+
+Two layers use the same versions:
+
+* anonymous GETs of the list, detail and tag pages are served whole from
+  the cache (PageCacheMixin) without touching the database;
+* signed-in users get the same shared parts from `{% cache %}` fragments
+  (the post list, the article), while their own parts — edit links, the
+  comment form and the comments with their edit links — are rendered live.
+
+A version key that is missing (never set, evicted) is recreated with the
+current time in nanoseconds rather than 1, so an eviction can never bring
+back pages cached under an earlier version.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+
+ALL = "all"
+LIST = "list"
+TAGS = "tags"
+TAG_STATS = "tag-stats"
+
+
+def post_scope(pk):
+    return f"post:{pk}"
+
+
+def tag_scope(slug):
+    return f"tag:{slug}"
+
+
+def cache():
+    return caches[getattr(settings, "BLOG_CACHE", "default")]
+
+
+def ttl():
+    return getattr(settings, "BLOG_PAGE_CACHE_TTL", 300)
+
+
+def _version_key(scope):
+    return f"blog:v:{scope}"
+
+
+def versions(scopes):
+    """{scope: version} for `scopes`, creating missing versions."""
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache().get_many(list(keys))
+    result = {}
+    for key, scope in keys.items():
+        if key not in found:
+            cache().add(key, time.time_ns(), timeout=None)
+            found[key] = cache().get(key)
+        result[scope] = found[key]
+    return result
+
+
+def bump(*scopes):
+    """Invalidate everything cached under `scopes`."""
+    if scopes:
+        cache().delete_many([_version_key(scope) for scope in set(scopes)])
+
+
+def version_token(scopes):
+    return ".".join(str(v) for v in versions(scopes).values())
+
+
+# ---- full pages (anonymous) -------------------------------------------------
+def _page_key(request, token):
+    path = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+    return f"blog:page:{path}:{token}"
+
+
+def page_cacheable(request):
+    if ttl() <= 0 or request.method not in ("GET", "HEAD"):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # A pending flash message is shown once; that page must not be stored.
+    return not len(get_messages(request))
+
+
+class PageCacheMixin:
+    """
+    Serve anonymous GETs from a whole-page cache. Views name the scopes
+    their HTML depends on in `cache_scopes()`; the fragment versions are
+    passed to the template as `cache_version` and `cache_ttl`.
+    """
+
+    def cache_scopes(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        self.cache_version = version_token([ALL, *self.cache_scopes()])
+        if not page_cacheable(request):
+            return super().get(request, *args, **kwargs)
+
+        key = _page_key(request, self.cache_version)
+        cached = cache().get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response["X-Page-Cache"] = "hit"
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        response["X-Page-Cache"] = "miss"
+
+        def store(rendered):
+            # Pages that set cookies (CSRF, messages) are not shared.
+            if rendered.status_code == 200 and not rendered.cookies:
+                cache().set(key, (rendered.content, rendered["Content-Type"]), ttl())
+
+        response.add_post_render_callback(store)
+        return response
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["cache_ttl"] = ttl()
+        ctx["cache_version"] = self.cache_version
+        return ctx
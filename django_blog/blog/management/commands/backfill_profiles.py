@@ -0,0 +1,44 @@
+# blog/management/commands/backfill_profiles.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from blog.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the missing Profile rows for existing users in bulk. Profiles "
+        "are otherwise created on first access (Profile.objects.for_user)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the users without a profile.")
+
+    def handle(self, *args, **options):
+        missing = (
+            get_user_model().objects.filter(profile__isnull=True)
+            .order_by("pk").values_list("pk", flat=True)
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"{missing.count()} users without a profile.")
+            return
+
+        size, created, last_pk = options["batch_size"], 0, 0
+        while True:
+            # Keyset batches: each one re-reads from the last id, so rows
+            # created concurrently (lazily) are skipped, not duplicated.
+            batch = list(missing.filter(pk__gt=last_pk)[:size])
+            if not batch:
+                break
+            profiles = Profile.objects.filter(user_id__in=batch)
+            before = profiles.count()
+            Profile.objects.bulk_create(
+                [Profile(user_id=pk) for pk in batch], batch_size=size, ignore_conflicts=True
+            )
+            # Count what was inserted: conflicts with lazy creation are skipped.
+            created += profiles.count() - before
+            last_pk = batch[-1]
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {created} profiles created")
+        self.stdout.write(self.style.SUCCESS(f"Created {created} profiles."))
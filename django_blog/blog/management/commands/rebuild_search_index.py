@@ -0,0 +1,30 @@
+# blog/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from blog import search
+from blog.models import Post
+from blog.signals import refresh_search_tags
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh Post.search_tags from the tags and rebuild the full-text index. "
+        "Signals and triggers keep both current; run this after bulk imports or "
+        "raw SQL that bypassed them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        ids = list(Post.objects.order_by("pk").values_list("pk", flat=True))
+        size = options["chunk_size"]
+        for start in range(0, len(ids), size):
+            refresh_search_tags(ids[start:start + size])
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {min(start + size, len(ids))}/{len(ids)} posts")
+        backend = search.get_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt search index for {len(ids)} posts ({backend.name} backend)."
+        ))
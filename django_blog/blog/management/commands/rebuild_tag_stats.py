@@ -0,0 +1,16 @@
+# blog/management/commands/rebuild_tag_stats.py
+from django.core.management.base import BaseCommand
+
+from blog import tag_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the TagStats table (per-tag post counts and newest post). "
+        "Signals keep it current; run this after bulk imports or raw SQL that "
+        "bypassed them."
+    )
+
+    def handle(self, *args, **options):
+        count = tag_stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {count} tags."))
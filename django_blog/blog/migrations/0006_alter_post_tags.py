@@ -0,0 +1,19 @@
+# Restored: 0007_remove_post_tags depends on this migration, which was
+# missing from the tree. It leaves the field as 0005 created it.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_tag_post_tags'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='posts', to='blog.tag'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Full-text search index for posts (see blog/search.py).
+
+from django.db import migrations, models
+
+FTS_TABLE = 'blog_post_fts'
+
+SQLITE_FORWARD = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, search_tags, content, content='blog_post', content_rowid='id',
+        tokenize='porter unicode61', prefix='2 3 4'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, search_tags, content)
+        VALUES (new.id, new.title, new.search_tags, new.content);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, search_tags, content)
+        VALUES ('delete', old.id, old.title, old.search_tags, old.content);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF title, search_tags, content ON blog_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, search_tags, content)
+        VALUES ('delete', old.id, old.title, old.search_tags, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, search_tags, content)
+        VALUES (new.id, new.title, new.search_tags, new.content);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+PG_INDEX = 'blog_post_search_gin'
+
+
+def _gin_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    # Must stay identical to blog.search.PostgresSearchBackend.vector().
+    vector = (
+        SearchVector('title', weight='A', config='english')
+        + SearchVector('search_tags', weight='B', config='english')
+        + SearchVector('content', weight='C', config='english')
+    )
+    return GinIndex(vector, name=PG_INDEX)
+
+
+def fill_search_tags(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    content_type = ContentType.objects.filter(app_label='blog', model='post').first()
+    if content_type is None:
+        return
+    names = {}
+    for post_id, name in (
+        TaggedItem.objects.filter(content_type=content_type)
+        .order_by('id').values_list('object_id', 'tag__name').iterator()
+    ):
+        names.setdefault(post_id, []).append(name)
+    posts = [Post(pk=pk, search_tags=' '.join(tags)) for pk, tags in names.items()]
+    Post.objects.bulk_update(posts, ['search_tags'], batch_size=500)
+
+
+def forwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('blog', 'Post'), _gin_index())
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_BACKWARD:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('blog', 'Post'), _gin_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_published_index'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_tags',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_tags, migrations.RunPython.noop),
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,51 @@
+# Materialized per-tag statistics (see blog/tag_stats.py).
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_tag_stats(apps, schema_editor):
+    TagStats = apps.get_model('blog', 'TagStats')
+    Post = apps.get_model('blog', 'Post')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    content_type = ContentType.objects.filter(app_label='blog', model='post').first()
+    if content_type is None:
+        return
+    published = dict(Post.objects.values_list('pk', 'published_date').iterator())
+    stats = {}
+    for tag_id, post_id in (
+        TaggedItem.objects.filter(content_type=content_type)
+        .values_list('tag_id', 'object_id').iterator()
+    ):
+        if post_id not in published:
+            continue
+        row = stats.setdefault(tag_id, TagStats(tag_id=tag_id))
+        row.post_count += 1
+        if row.latest_post_at is None or published[post_id] > row.latest_post_at:
+            row.latest_post_at = published[post_id]
+    TagStats.objects.bulk_create(stats.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_search_index'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStats',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='blog_stats', serialize=False, to='taggit.tag')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('latest_post_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-post_count'], name='blog_tagstats_count_idx')],
+            },
+        ),
+        migrations.RunPython(fill_tag_stats, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.text import slugify
 from taggit.managers import TaggableManager
@@ -23,15 +23,47 @@ class Tag(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+class PostQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Everything the post templates render, in a fixed number of queries
+        whatever the page size: the author joined, the tags prefetched in one
+        query and `comment_count` as a correlated subquery (unlike a JOIN +
+        COUNT it stays right when the queryset is filtered through tags).
+        """
+        comment_count = (
+            Comment.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(n=Count("pk"))
+            .values("n")
+        )
+        return (
+            self.select_related("author")
+            .prefetch_related("tags")
+            .annotate(
+                comment_count=Coalesce(Subquery(comment_count, output_field=IntegerField()), 0)
+            )
+        )
+
+
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     published_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="posts")
-     tags = TaggableManager(blank=True) 
-    
+    tags = TaggableManager(blank=True)
+    # Tag names, space-separated, for the full-text index (blog/search.py).
+    # Maintained from the m2m_changed signal in blog/signals.py.
+    search_tags = models.TextField(blank=True, default="", editable=False)
+
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ["-published_date"]
+        # Lets a page of the list stop after LIMIT rows instead of sorting
+        # (and counting comments for) every post.
+        indexes = [models.Index(fields=["-published_date"], name="blog_post_published_idx")]
 
     def __str__(self):
         return self.title
@@ -39,21 +71,50 @@ class Post(models.Model):
     def get_absolute_url(self):
         return reverse("blog:post_detail", kwargs={"pk": self.pk})
     
+class TagStats(models.Model):
+    """
+    Per-tag post count and newest post, for the tag index and tag cloud.
+    Kept current by blog/signals.py as posts are tagged, untagged and
+    deleted; `manage.py rebuild_tag_stats` recomputes it from scratch.
+    """
+    tag = models.OneToOneField(
+        "taggit.Tag", on_delete=models.CASCADE, primary_key=True, related_name="blog_stats"
+    )
+    post_count = models.PositiveIntegerField(default=0)
+    latest_post_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["-post_count"], name="blog_tagstats_count_idx")]
+
+    def __str__(self):
+        return f"{self.tag_id}: {self.post_count} posts"
+
+
+class ProfileManager(models.Manager):
+    def for_user(self, user):
+        """
+        The user's profile, created on first access. Profiles are not made
+        by a User post_save signal: that fired on every login (last_login)
+        and cost a lookup and a write each time. `manage.py
+        backfill_profiles` creates them in bulk for existing users.
+        """
+        try:
+            return user.profile
+        except Profile.DoesNotExist:
+            profile, _ = self.get_or_create(user=user)
+            user.profile = profile
+            return profile
+
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     bio = models.TextField(blank=True)
 
+    objects = ProfileManager()
+
     def __str__(self):
         return f"Profile({self.user.username})"
 
-@receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
-    else:
-        Profile.objects.get_or_create(user=instance)
-    instance.profile.save()
-
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
@@ -0,0 +1,275 @@
+# blog/search.py
+"""
+Ranked full-text search over posts: title, tag names and content.
+
+Tag names are copied into `Post.search_tags` whenever a post's tags change
+(blog/signals.py), so every backend indexes one row per post with no joins:
+
+* SQLite: an FTS5 external-content table `blog_post_fts` over (title,
+  search_tags, content), kept in sync with blog_post by triggers
+  (migration 0010), ranked with bm25 and with FTS5's highlight()/snippet().
+* PostgreSQL: a GIN index on the weighted tsvector of title (A), tags (B)
+  and content (C), ranked with ts_rank, snippets from ts_headline.
+* Anything else (or 'basic'): AND of `icontains` per word, newest first,
+  without snippets.
+
+Every word must match; the last one also matches as a prefix while it is
+still being typed ("djan" finds "django"), unless the query ends in a space.
+Only the BLOG_SEARCH_MAX_CANDIDATES most recent matches are ranked, so a
+very common word costs the same as a rare one.
+
+The SQLite triggers live on blog_post: a migration that rebuilds that table
+(most AlterFields on SQLite) drops them, and has to recreate them.
+`manage.py rebuild_search_index` refills the index after raw-SQL imports.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+FTS_TABLE = "blog_post_fts"
+TITLE_WEIGHT = 4.0  # bm25 column weights relative to content
+TAGS_WEIGHT = 2.0
+SNIPPET_TOKENS = 24
+
+# Highlight markers that cannot occur in user text; replaced by <mark> tags
+# after the text itself has been escaped.
+_START, _STOP = "\x02", "\x03"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def max_candidates():
+    return getattr(settings, "BLOG_SEARCH_MAX_CANDIDATES", 2000)
+
+
+def highlighted(text):
+    """Escape `text` and turn the highlight markers into <mark> elements."""
+    return mark_safe(escape(text).replace(_START, "<mark>").replace(_STOP, "</mark>"))
+
+
+class Terms:
+    """The words of a query; `prefix` is True when the last one is still being typed."""
+
+    def __init__(self, query):
+        self.words = _WORD.findall(query)
+        self.prefix = bool(self.words) and not query[-1:].isspace()
+
+    def __bool__(self):
+        return bool(self.words)
+
+
+class BasicSearchBackend:
+    name = "basic"
+
+    def matches(self, terms):
+        predicate = Q()
+        for word in terms.words:
+            predicate &= (
+                Q(title__icontains=word) | Q(search_tags__icontains=word) | Q(content__icontains=word)
+            )
+        return Post.objects.filter(predicate) if terms else Post.objects.none()
+
+    def ranked_ids(self, terms, offset, limit):
+        rows = self.matches(terms).order_by("-published_date", "-id").values_list("pk", flat=True)
+        return list(rows[offset:offset + limit])
+
+    def count(self, terms):
+        return self.matches(terms).count()
+
+    def snippets(self, terms, ids):
+        """{post id: (highlighted title, highlighted snippet)} for `ids`."""
+        return {}
+
+    def rebuild(self):
+        pass
+
+
+class SqliteFTSBackend(BasicSearchBackend):
+    name = "sqlite_fts5"
+
+    @staticmethod
+    def fts_query(terms):
+        # Quote every word so user input is never parsed as FTS5 syntax;
+        # adjacent quoted terms are ANDed, "word"* is a prefix query.
+        parts = [f'"{word}"' for word in terms.words]
+        if terms.prefix:
+            parts[-1] += "*"
+        return " ".join(parts)
+
+    def ranked_ids(self, terms, offset, limit):
+        if not terms:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM ("
+                f"  SELECT rowid, bm25({FTS_TABLE}, %s, %s, 1.0) AS score FROM {FTS_TABLE}"
+                f"  WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s"
+                f") ORDER BY score, rowid DESC LIMIT %s OFFSET %s",
+                (TITLE_WEIGHT, TAGS_WEIGHT, self.fts_query(terms), max_candidates(), limit, offset),
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def count(self, terms):
+        if not terms:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM (SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s)",
+                (self.fts_query(terms), max_candidates()),
+            )
+            return cursor.fetchone()[0]
+
+    def snippets(self, terms, ids):
+        if not terms or not ids:
+            return {}
+        placeholders = ", ".join(["%s"] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, highlight({FTS_TABLE}, 0, %s, %s),"
+                f"  snippet({FTS_TABLE}, 2, %s, %s, '…', %s)"
+                f" FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({placeholders})",
+                (_START, _STOP, _START, _STOP, SNIPPET_TOKENS, self.fts_query(terms), *ids),
+            )
+            return {pk: (highlighted(title), highlighted(snippet)) for pk, title, snippet in cursor}
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+    name = "postgres"
+    config = "english"
+
+    @classmethod
+    def vector(cls):
+        # Must stay identical to the indexed expression in migration 0010.
+        from django.contrib.postgres.search import SearchVector
+
+        return (
+            SearchVector("title", weight="A", config=cls.config)
+            + SearchVector("search_tags", weight="B", config=cls.config)
+            + SearchVector("content", weight="C", config=cls.config)
+        )
+
+    def search_query(self, terms):
+        from django.contrib.postgres.search import SearchQuery
+
+        # Words only (\w+), so the raw tsquery syntax cannot be injected.
+        parts = list(terms.words)
+        if terms.prefix:
+            parts[-1] += ":*"
+        return SearchQuery(" & ".join(parts), search_type="raw", config=self.config)
+
+    def matches(self, terms):
+        if not terms:
+            return Post.objects.none()
+        return Post.objects.annotate(search=self.vector()).filter(search=self.search_query(terms))
+
+    def ranked_ids(self, terms, offset, limit):
+        from django.contrib.postgres.search import SearchRank
+
+        candidates = self.matches(terms).order_by("-id").values("pk")[:max_candidates()]
+        rows = (
+            Post.objects.filter(pk__in=candidates)
+            .annotate(search_rank=SearchRank(self.vector(), self.search_query(terms)))
+            .order_by("-search_rank", "-id")
+            .values_list("pk", flat=True)
+        )
+        return list(rows[offset:offset + limit])
+
+    def count(self, terms):
+        return self.matches(terms).values("pk")[:max_candidates()].count()
+
+    def snippets(self, terms, ids):
+        from django.contrib.postgres.search import SearchHeadline
+
+        if not terms or not ids:
+            return {}
+        query = self.search_query(terms)
+        options = {"start_sel": _START, "stop_sel": _STOP, "config": self.config}
+        rows = Post.objects.filter(pk__in=ids).annotate(
+            title_headline=SearchHeadline("title", query, highlight_all=True, **options),
+            content_headline=SearchHeadline("content", query, max_words=SNIPPET_TOKENS, **options),
+        ).values_list("pk", "title_headline", "content_headline")
+        return {pk: (highlighted(title), highlighted(snippet)) for pk, title, snippet in rows}
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (BasicSearchBackend, SqliteFTSBackend, PostgresSearchBackend)
+}
+
+
+_fts5_available = {}
+
+
+def _fts5_table_exists():
+    # One introspection query per database, not per request.
+    name = connection.settings_dict["NAME"]
+    if name not in _fts5_available:
+        _fts5_available[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts5_available[name]
+
+
+def get_backend():
+    name = getattr(settings, "BLOG_SEARCH_BACKEND", "auto")
+    if name == "auto":
+        if connection.vendor == "postgresql":
+            name = "postgres"
+        elif connection.vendor == "sqlite" and _fts5_table_exists():
+            name = "sqlite_fts5"
+        else:
+            name = "basic"
+    return BACKENDS[name]()
+
+
+class SearchResults:
+    """
+    The matches of `query` as a lazy sequence for Django's Paginator:
+    `count()` counts (capped) matches, slicing ranks one page and loads
+    its posts with Post.objects.for_listing(). Each post gets
+    `title_highlight` and `snippet` (safe HTML; None without a snippet).
+    """
+    model = Post
+    ordered = True
+
+    def __init__(self, query):
+        self.terms = Terms(query)
+        self.backend = get_backend()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.terms) if self.terms else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = (index.stop if index.stop is not None else self.count()) - offset
+        if limit <= 0 or not self.terms:
+            return []
+        ids = self.backend.ranked_ids(self.terms, offset, limit)
+        if not ids:
+            return []
+        by_id = Post.objects.for_listing().in_bulk(ids)
+        snippets = self.backend.snippets(self.terms, ids)
+        posts = []
+        for pk in ids:
+            post = by_id.get(pk)
+            if post is not None:
+                post.title_highlight, post.snippet = snippets.get(pk, (None, None))
+                posts.append(post)
+        return posts
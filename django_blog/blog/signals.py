@@ -0,0 +1,141 @@
+# blog/signals.py
+"""
+Cache invalidation for blog/cache.py: every write bumps the versions of
+the pages that show it.
+
+    post saved/deleted      list, the post, the post's tags
+    comment saved/deleted   list (comment counts), the post, the post's tags
+    post tags changed       list, the post, the tags added/removed/cleared
+    tag created             the slug map
+    tag renamed/deleted     everything
+
+Tagging, untagging and deleting tagged posts also update TagStats
+(blog/tag_stats.py) and bump the tag-stats version.
+
+And the tag names copied into Post.search_tags for the full-text index
+(blog/search.py), refreshed when a post's tags change or a tag is renamed
+or deleted.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+
+from . import cache, tag_stats
+from .models import Comment, Post
+
+
+def _post_items():
+    return TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Post))
+
+
+def _tags(post_id):
+    """[(tag id, slug)] of the post's tags."""
+    return list(_post_items().filter(object_id=post_id).values_list("tag_id", "tag__slug"))
+
+
+def _tag_slugs(post_id):
+    return [slug for _, slug in _tags(post_id)]
+
+
+def _bump_post(post_id, slugs):
+    cache.bump(cache.LIST, cache.post_scope(post_id), *map(cache.tag_scope, slugs))
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    # A new post has no tags yet; they arrive through m2m_changed.
+    _bump_post(instance.pk, [] if created else _tag_slugs(instance.pk))
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    # The tagged items go with the post, so read the tags while they exist.
+    instance._cached_tags = _tags(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    tags = getattr(instance, "_cached_tags", [])
+    _bump_post(instance.pk, [slug for _, slug in tags])
+    if tags:
+        tag_stats.posts_removed([pk for pk, _ in tags], instance.published_date)
+        cache.bump(cache.TAG_STATS)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    _bump_post(instance.post_id, _tag_slugs(instance.post_id))
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def post_tags_changed(sender, instance, action, pk_set, **kwargs):
+    if not isinstance(instance, Post):
+        return
+    if action == "pre_clear":
+        instance._cached_tags = _tags(instance.pk)
+        return
+    if action == "post_clear":
+        tags = getattr(instance, "_cached_tags", [])
+        tag_ids, slugs = [pk for pk, _ in tags], [slug for _, slug in tags]
+    elif action in ("post_add", "post_remove") and pk_set:
+        tag_ids, slugs = list(pk_set), Tag.objects.filter(pk__in=pk_set).values_list("slug", flat=True)
+    else:
+        return
+    _bump_post(instance.pk, slugs)
+    if action == "post_add":
+        tag_stats.posts_added(tag_ids, instance.published_date)
+    else:
+        tag_stats.posts_removed(tag_ids, instance.published_date)
+    cache.bump(cache.TAG_STATS)
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, **kwargs):
+    # New tags are on no page yet (only in the slug map); renames show up on
+    # every page listing them.
+    if created:
+        cache.bump(cache.TAGS)
+    else:
+        cache.bump(cache.ALL, cache.TAGS)
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    # The TagStats row goes with the tag (CASCADE).
+    cache.bump(cache.ALL, cache.TAGS, cache.TAG_STATS)
+
+
+# ---- search index -------------------------------------------------------------
+def refresh_search_tags(post_ids):
+    """Rewrite Post.search_tags for `post_ids` from their current tags."""
+    names = {pk: [] for pk in post_ids}
+    rows = _post_items().filter(object_id__in=names).order_by("id").values_list("object_id", "tag__name")
+    for post_id, name in rows:
+        names[post_id].append(name)
+    for post_id, tags in names.items():
+        # update() skips post_save; the FTS trigger still fires (blog/search.py).
+        Post.objects.filter(pk=post_id).update(search_tags=" ".join(tags))
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def post_tags_indexed(sender, instance, action, **kwargs):
+    if isinstance(instance, Post) and action in ("post_add", "post_remove", "post_clear"):
+        refresh_search_tags([instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+def tag_renamed_indexed(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_tags(list(_post_items().filter(tag=instance).values_list("object_id", flat=True)))
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    instance._cached_post_ids = list(_post_items().filter(tag=instance).values_list("object_id", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted_indexed(sender, instance, **kwargs):
+    refresh_search_tags(getattr(instance, "_cached_post_ids", []))
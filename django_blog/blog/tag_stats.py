@@ -0,0 +1,150 @@
+# blog/tag_stats.py
+"""
+Tag statistics without counting through taggit's generic TaggedItem join.
+
+* TagStats (one row per tag: post count, newest post) is updated by delta
+  from the m2m_changed and post-delete signals (blog/signals.py), so the
+  tag index and the tag cloud read one small table.
+* The tag cloud is cached under the "tags" and "tag-stats" versions of
+  blog/cache.py for BLOG_TAG_CLOUD_TTL seconds.
+* Tag pages resolve their slug from a per-process slug -> (id, name) map,
+  reloaded only when the "tags" version moves (a tag is created, renamed
+  or deleted), so a tag page does not fetch the Tag row first.
+"""
+import math
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, OuterRef, Q, Subquery, Value, When
+from taggit.models import Tag, TaggedItem
+
+from . import cache
+from .models import Post, TagStats
+
+
+def cloud_size():
+    return getattr(settings, "BLOG_TAG_CLOUD_SIZE", 30)
+
+
+def cloud_ttl():
+    return getattr(settings, "BLOG_TAG_CLOUD_TTL", 3600)
+
+
+# ---- incremental updates ------------------------------------------------------
+def posts_added(tag_ids, published):
+    """One post published at `published` was tagged with `tag_ids`."""
+    if not tag_ids:
+        return
+    TagStats.objects.bulk_create([TagStats(tag_id=pk) for pk in tag_ids], ignore_conflicts=True)
+    TagStats.objects.filter(tag_id__in=tag_ids).update(
+        post_count=F("post_count") + 1,
+        latest_post_at=Case(
+            When(Q(latest_post_at__isnull=True) | Q(latest_post_at__lt=published), then=Value(published)),
+            default=F("latest_post_at"),
+            output_field=DateTimeField(),
+        ),
+    )
+
+
+def posts_removed(tag_ids, published):
+    """One post published at `published` lost `tag_ids` (untagged or deleted)."""
+    if not tag_ids:
+        return
+    TagStats.objects.filter(tag_id__in=tag_ids, post_count__gt=0).update(post_count=F("post_count") - 1)
+    # Only tags whose newest post this was need their newest post looked up.
+    refresh_latest(TagStats.objects.filter(tag_id__in=tag_ids, latest_post_at__lte=published))
+
+
+def _tagged_posts():
+    return TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Post))
+
+
+def refresh_latest(stats):
+    newest = (
+        Post.objects.filter(pk__in=_tagged_posts().filter(tag=OuterRef(OuterRef("pk"))).values("object_id"))
+        .order_by("-published_date")
+        .values("published_date")[:1]
+    )
+    stats.update(latest_post_at=Subquery(newest))
+
+
+def rebuild():
+    """Recompute every row from the tagged posts; returns the number of tags."""
+    published = dict(Post.objects.values_list("pk", "published_date").iterator())
+    stats = {}
+    for tag_id, post_id in _tagged_posts().values_list("tag_id", "object_id").iterator():
+        if post_id not in published:
+            continue
+        row = stats.setdefault(tag_id, TagStats(tag_id=tag_id))
+        row.post_count += 1
+        if row.latest_post_at is None or published[post_id] > row.latest_post_at:
+            row.latest_post_at = published[post_id]
+    with transaction.atomic():
+        TagStats.objects.all().delete()
+        TagStats.objects.bulk_create(stats.values(), batch_size=1000)
+    cache.bump(cache.TAG_STATS)
+    return len(stats)
+
+
+# ---- slug -> tag ----------------------------------------------------------------
+_slugs = {"version": None, "tags": {}}
+
+
+def tag_for_slug(slug):
+    """
+    An unsaved-looking Tag (pk, name, slug) for `slug`, or None. Served from
+    the process's slug map; a miss is checked against the database in case
+    the tag was committed after the map was loaded.
+    """
+    version = cache.version_token([cache.TAGS])
+    if _slugs["version"] != version:
+        tags = {slug: (pk, name) for slug, pk, name in Tag.objects.values_list("slug", "pk", "name")}
+        _slugs.update(version=version, tags=tags)
+    found = _slugs["tags"].get(slug)
+    if found is None:
+        found = Tag.objects.filter(slug=slug).values_list("pk", "name").first()
+        if found is None:
+            return None
+    pk, name = found
+    return Tag(pk=pk, name=name, slug=slug)
+
+
+# ---- tag index and cloud ------------------------------------------------------
+def tag_index():
+    """The stats rows of every tag with posts, alphabetically, tags joined."""
+    return (
+        TagStats.objects.filter(post_count__gt=0)
+        .select_related("tag")
+        .order_by("tag__name")
+    )
+
+
+def cloud():
+    """
+    The BLOG_TAG_CLOUD_SIZE most used tags, alphabetically, as dicts with
+    name, slug, post_count and a `weight` from 1 to 5 (log scale).
+    """
+    key = f"blog:tag-cloud:{cloud_size()}:{cache.version_token([cache.TAGS, cache.TAG_STATS])}"
+    tags = cache.cache().get(key)
+    if tags is None:
+        rows = list(
+            TagStats.objects.filter(post_count__gt=0)
+            .order_by("-post_count", "tag_id")
+            .values("tag__name", "tag__slug", "post_count")[:cloud_size()]
+        )
+        top = max((row["post_count"] for row in rows), default=1)
+        tags = sorted(
+            (
+                {
+                    "name": row["tag__name"],
+                    "slug": row["tag__slug"],
+                    "post_count": row["post_count"],
+                    "weight": 1 + round(4 * math.log(row["post_count"]) / math.log(top)) if top > 1 else 1,
+                }
+                for row in rows
+            ),
+            key=lambda tag: tag["name"].lower(),
+        )
+        cache.cache().set(key, tags, cloud_ttl())
+    return tags
@@ -1,3 +1,461 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.core.cache import cache as default_cache
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from taggit.models import Tag
+
+from . import search, tag_stats
+from .models import Comment, Post, Profile, TagStats
+
+User = get_user_model()
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Renders pages and fails when they issue more queries than their budget.
+    Each budget is checked with a page of 2 posts and a page of 10: if the
+    two counts differ, a template is querying per post (an N+1).
+    """
+
+    def setUp(self):
+        default_cache.clear()
+
+
+    @classmethod
+    def make_posts(cls, count, prefix="Post"):
+        posts = []
+        for i in range(count):
+            author = User.objects.create_user(username=f"{prefix.lower()}-author{i}")
+            post = Post.objects.create(author=author, title=f"{prefix} {i}", content="django body")
+            post.tags.add("django", f"{prefix.lower()}-tag{i}")
+            Comment.objects.create(post=post, author=author, content="first")
+            Comment.objects.create(post=post, author=author, content="second")
+            posts.append(post)
+        return posts
+
+    def assertRenderQueries(self, budget, url, template):
+        with self.assertNumQueries(budget):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTemplateUsed(response, template)
+        return response
+
+    def assertConstantQueries(self, budget, url, template):
+        """`budget` queries for 2 posts and for 10 posts."""
+        self.make_posts(2, prefix="Small")
+        self.assertRenderQueries(budget, url, template)
+        self.make_posts(8, prefix="Large")
+        return self.assertRenderQueries(budget, url, template)
+
+
+class PostListQueryTests(QueryBudgetTestCase):
+    # COUNT for the paginator, the posts with their authors, their tags, and
+    # the tag cloud (cached, but every make_posts() tagging invalidates it).
+    def test_post_list(self):
+        response = self.assertConstantQueries(4, reverse("blog:post_list"), "blog/post_list.html")
+        self.assertEqual(len(response.context["posts"]), 10)
+        self.assertContains(response, "2 comments", count=10)
+        self.assertContains(response, 'class="tag">#django', count=10)
+
+    # The slug map (reloaded: make_posts() created tags), then as above.
+    def test_posts_by_tag(self):
+        url = reverse("blog:post_by_tag", args=["django"])
+        response = self.assertConstantQueries(5, url, "blog/post_list.html")
+        self.assertEqual(len(response.context["posts"]), 10)
+
+    # Slug map and tag cloud warm: no Tag lookup, only the posts.
+    def test_posts_by_tag_warm(self):
+        self.make_posts(2)
+        url = reverse("blog:post_by_tag", args=["django"])
+        with self.settings(BLOG_PAGE_CACHE_TTL=0):
+            self.client.get(url)
+            response = self.assertRenderQueries(3, url, "blog/post_list.html")
+        self.assertEqual(response.context["active_tag"].name, "django")
+
+    def test_posts_by_unknown_tag(self):
+        response = self.client.get(reverse("blog:post_by_tag", args=["nope"]))
+        self.assertEqual(response.status_code, 404)
+
+    # COUNT of the matches, the ranked page of ids, the posts with their
+    # authors, their tags, the highlighted titles and snippets.
+    def test_search(self):
+        search.get_backend()  # FTS5 table lookup, once per database
+        url = reverse("blog:post_search") + "?q=django"
+        response = self.assertConstantQueries(5, url, "blog/search_results.html")
+        self.assertEqual(len(response.context["posts"]), 10)
+        # Matching through several tags must neither repeat posts nor inflate counts.
+        self.assertContains(response, "2 comments", count=10)
+
+    def test_search_without_query_runs_no_queries(self):
+        self.assertRenderQueries(0, reverse("blog:post_search"), "blog/search_results.html")
+
+    # The post with its author, its tags, its comments with their authors.
+    def test_post_detail(self):
+        post = self.make_posts(1)[0]
+        response = self.assertRenderQueries(
+            3, reverse("blog:post_detail", args=[post.pk]), "blog/post_detail.html"
+        )
+        self.assertContains(response, "#post-tag0")
+
+    def test_comment_count_ignores_tag_joins(self):
+        post = self.make_posts(1)[0]
+        annotated = Post.objects.for_listing().filter(tags__name__in=["django", "post-tag0"])
+        self.assertEqual([p.comment_count for p in annotated], [2, 2])
+        self.assertEqual(Post.objects.for_listing().get(pk=post.pk).comment_count, 2)
+
+
+class PageCacheTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post = self.make_posts(1)[0]
+        self.list_url = reverse("blog:post_list")
+        self.detail_url = reverse("blog:post_detail", args=[self.post.pk])
+        self.tag_url = reverse("blog:post_by_tag", args=["django"])
+
+    def assertCached(self, url):
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        return response
+
+    def assertMiss(self, url, text):
+        response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, text)
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        for url in (self.list_url, self.detail_url, self.tag_url):
+            response = self.assertCached(url)
+            self.assertContains(response, "Post 0")
+
+    def test_comment_invalidates_post_list_and_tag_pages(self):
+        for url in (self.list_url, self.detail_url, self.tag_url):
+            self.assertCached(url)
+        Comment.objects.create(post=self.post, author=self.post.author, content="third!")
+        self.assertMiss(self.detail_url, "third!")
+        self.assertMiss(self.list_url, "3 comments")
+        self.assertMiss(self.tag_url, "3 comments")
+
+    def test_editing_a_post_invalidates_its_pages_only(self):
+        other = self.make_posts(1, prefix="Other")[0]
+        other_url = reverse("blog:post_detail", args=[other.pk])
+        for url in (self.list_url, self.detail_url, self.tag_url, other_url):
+            self.assertCached(url)
+        self.post.title = "Renamed"
+        self.post.save()
+        self.assertMiss(self.detail_url, "Renamed")
+        self.assertMiss(self.list_url, "Renamed")
+        self.assertMiss(self.tag_url, "Renamed")
+        self.assertEqual(self.client.get(other_url)["X-Page-Cache"], "hit")
+
+    def test_tag_changes_invalidate_tag_pages(self):
+        new_tag_url = reverse("blog:post_by_tag", args=["fresh"])
+        self.assertCached(self.tag_url)
+        self.assertCached(self.detail_url)
+        self.post.tags.add("fresh")
+        self.assertMiss(self.detail_url, "#fresh")
+        self.assertContains(self.client.get(new_tag_url), "Post 0")
+
+        self.post.tags.remove("django")
+        self.assertNotContains(self.client.get(self.tag_url), "Post 0")
+
+        self.assertCached(new_tag_url)
+        self.post.tags.clear()
+        self.assertNotContains(self.client.get(new_tag_url), "Post 0")
+
+    def test_tag_rename_invalidates_every_page(self):
+        self.assertCached(self.list_url)
+        tag = Tag.objects.get(slug="django")
+        tag.name = "djangoproject"
+        tag.save()
+        self.assertMiss(self.list_url, "#djangoproject")
+
+    def test_deleting_a_post_invalidates_its_tag_pages(self):
+        self.assertCached(self.tag_url)
+        self.post.delete()
+        self.assertMiss(self.tag_url, "No posts yet.")
+
+    def test_signed_in_users_get_shared_fragments_and_their_own_links(self):
+        self.client.force_login(self.post.author)
+        self.client.get(self.list_url)
+        # Session, user and the paginator's COUNT: the post list itself
+        # (posts, tags) comes from the shared fragment.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.list_url)
+        self.assertNotIn("X-Page-Cache", response)
+        self.assertContains(response, "New post")
+        self.assertContains(response, "Post 0")
+
+        self.client.get(self.detail_url)
+        # Session, user, post; comments are per user (edit links), tags cached.
+        with self.assertNumQueries(4):
+            response = self.client.get(self.detail_url)
+        self.assertContains(response, "✏️ Edit")
+        self.assertContains(response, "#django")
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+    def test_anonymous_pages_carry_no_user_parts(self):
+        self.client.force_login(self.post.author)
+        self.client.get(self.detail_url)
+        self.client.logout()
+        response = self.client.get(self.detail_url)
+        self.assertNotContains(response, "✏️ Edit")
+        self.assertNotContains(response, "csrfmiddlewaretoken")
+        self.assertContains(response, "to comment.")
+
+    def test_cache_can_be_disabled(self):
+        with self.settings(BLOG_PAGE_CACHE_TTL=0):
+            self.client.get(self.list_url)
+            self.assertNotIn("X-Page-Cache", self.client.get(self.list_url))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="writer")
+
+    def post(self, title, content="", tags=()):
+        post = Post.objects.create(author=self.author, title=title, content=content)
+        post.tags.add(*tags)
+        return post
+
+    def results(self, q):
+        response = self.client.get(reverse("blog:post_search"), {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def titles(self, q):
+        return [post.title for post in self.results(q).context["posts"]]
+
+    def test_ranks_title_matches_above_content_matches(self):
+        self.post("Notes", content="a short aside about caching")
+        self.post("Caching in depth", content="all about it")
+        self.assertEqual(self.titles("caching"), ["Caching in depth", "Notes"])
+
+    def test_matches_tag_names_and_requires_every_word(self):
+        self.post("Release notes", tags=["django"])
+        self.post("Django release plans")
+        self.post("Unrelated", tags=["python"])
+        self.assertEqual(set(self.titles("django")), {"Release notes", "Django release plans"})
+        self.assertEqual(self.titles("django python"), [])
+
+    def test_last_word_matches_as_prefix_until_followed_by_a_space(self):
+        self.post("Djangonauts unite")
+        self.assertEqual(self.titles("djangonau"), ["Djangonauts unite"])
+        self.assertEqual(self.titles("djangonau "), [])
+
+    def test_user_input_is_not_parsed_as_query_syntax(self):
+        self.post("Quotes and stars")
+        for q in ('"quotes', "quotes)", "(quotes", "stars*:", "-quotes", "^stars"):
+            self.assertEqual(self.titles(q), ["Quotes and stars"], q)
+
+    def test_highlights_are_escaped(self):
+        self.post("<b>Bold</b> caching", content="why <script> caching matters")
+        response = self.results("caching")
+        self.assertContains(response, "<mark>caching</mark>", count=2)
+        self.assertContains(response, "&lt;script&gt;")
+        self.assertNotContains(response, "<script>")
+
+    def test_index_follows_edits_tags_and_deletes(self):
+        post = self.post("Original title", tags=["alpha"])
+        post.title = "Rewritten title"
+        post.save()
+        self.assertEqual(self.titles("original"), [])
+        self.assertEqual(self.titles("rewritten"), ["Rewritten title"])
+
+        post.tags.add("beta")
+        self.assertEqual(self.titles("beta"), ["Rewritten title"])
+        post.tags.remove("alpha")
+        self.assertEqual(self.titles("alpha"), [])
+
+        tag = Tag.objects.get(name="beta")
+        tag.name = "gamma"
+        tag.save()
+        self.assertEqual(self.titles("beta"), [])
+        self.assertEqual(self.titles("gamma"), ["Rewritten title"])
+        tag.delete()
+        self.assertEqual(self.titles("gamma"), [])
+
+        post.delete()
+        self.assertEqual(self.titles("rewritten"), [])
+
+    def test_basic_backend(self):
+        self.post("Caching in depth", tags=["perf"])
+        self.post("Notes", content="caching aside")
+        with self.settings(BLOG_SEARCH_BACKEND="basic"):
+            self.assertEqual(self.titles("caching"), ["Notes", "Caching in depth"])
+            self.assertEqual(self.titles("perf"), ["Caching in depth"])
+
+
+class TagStatsTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user(username="tagger")
+
+    def post(self, title, *tags):
+        post = Post.objects.create(author=self.author, title=title, content="body")
+        post.tags.add(*tags)
+        return post
+
+    def stats(self):
+        return {
+            row.tag.slug: (row.post_count, row.latest_post_at)
+            for row in TagStats.objects.select_related("tag")
+        }
+
+    def assertStatsMatchRebuild(self):
+        incremental = self.stats()
+        tag_stats.rebuild()
+        rebuilt = self.stats()
+        self.assertEqual(
+            {slug: value for slug, value in incremental.items() if value[0]}, rebuilt
+        )
+
+    def test_counts_follow_tagging_untagging_and_deletes(self):
+        first = self.post("First", "django", "python")
+        second = self.post("Second", "django")
+        self.assertEqual(self.stats()["django"], (2, second.published_date))
+        self.assertEqual(self.stats()["python"], (1, first.published_date))
+
+        second.tags.remove("django")
+        self.assertEqual(self.stats()["django"], (1, first.published_date))
+        second.tags.set(["python", "web"])
+        self.assertEqual(self.stats()["python"], (2, second.published_date))
+
+        second.delete()
+        self.assertEqual(self.stats()["python"], (1, first.published_date))
+        first.tags.clear()
+        self.assertEqual(self.stats()["django"], (0, None))
+        self.assertStatsMatchRebuild()
+
+    def test_deleting_a_tag_drops_its_stats(self):
+        self.post("First", "django")
+        Tag.objects.get(slug="django").delete()
+        self.assertEqual(self.stats(), {})
+
+    def test_tag_index(self):
+        self.post("First", "django", "python")
+        self.post("Second", "django")
+        self.post("Third", "gone")
+        Post.objects.get(title="Third").tags.clear()
+        url = reverse("blog:tag_index")
+        # COUNT for the paginator, the stats rows with their tags.
+        response = self.assertRenderQueries(2, url, "blog/tag_index.html")
+        self.assertEqual(
+            [row.tag.slug for row in response.context["tag_stats"]], ["django", "python"]
+        )
+        self.assertContains(response, "2 posts")
+        self.assertNotContains(response, "#gone")
+
+        self.post("Fourth", "python")
+        self.assertContains(self.client.get(url), "2 posts", count=2)
+
+    def test_tag_cloud_is_cached_until_tags_change(self):
+        for i in range(4):
+            self.post(f"Django {i}", "django")
+        self.post("Python", "python")
+        self.assertEqual(
+            [(tag["slug"], tag["weight"]) for tag in tag_stats.cloud()],
+            [("django", 5), ("python", 1)],
+        )
+        with self.assertNumQueries(0):
+            tag_stats.cloud()
+        self.post("Web", "web")
+        self.assertIn("web", [tag["slug"] for tag in tag_stats.cloud()])
+
+        response = self.client.get(reverse("blog:post_list"))
+        self.assertContains(response, 'class="tag weight-5"')
+
+    def test_tag_pages_resolve_new_and_renamed_tags(self):
+        self.post("First", "django")
+        self.assertContains(self.client.get(reverse("blog:post_by_tag", args=["django"])), "First")
+        self.post("Second", "fresh")
+        self.assertContains(self.client.get(reverse("blog:post_by_tag", args=["fresh"])), "Second")
+
+        tag = Tag.objects.get(slug="fresh")
+        tag.name, tag.slug = "Renamed", "renamed"
+        tag.save()
+        self.assertEqual(self.client.get(reverse("blog:post_by_tag", args=["fresh"])).status_code, 404)
+        response = self.client.get(reverse("blog:post_by_tag", args=["renamed"]))
+        self.assertContains(response, "#Renamed")
+
+
+class ProfileTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="s3cret-pass")
+
+    def test_login_issues_only_the_unavoidable_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(
+                reverse("blog:login"), {"username": "reader", "password": "s3cret-pass"}
+            )
+        self.assertEqual(response.status_code, 302)
+        statements = [q["sql"] for q in captured.captured_queries if "SAVEPOINT" not in q["sql"]]
+        # The user by username, then Django's login itself: a fresh session
+        # key (checked, inserted), last_login, the session's auth data.
+        # Nothing reads or writes a profile.
+        self.assertEqual(len(statements), 5, statements)
+        self.assertFalse(any("blog_profile" in sql for sql in statements))
+        self.assertFalse(Profile.objects.exists())
+
+    def test_saving_a_user_does_not_touch_profiles(self):
+        self.user.first_name = "Ada"
+        with self.assertNumQueries(1):
+            self.user.save()
+
+    def test_profile_is_created_on_first_access(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("blog:profile"))
+        self.assertContains(response, "Bio:")
+        self.assertEqual(Profile.objects.filter(user=self.user).count(), 1)
+        self.client.get(reverse("blog:profile_edit"))
+        self.assertEqual(Profile.objects.filter(user=self.user).count(), 1)
+
+    def test_unchanged_profile_edit_writes_nothing(self):
+        Profile.objects.create(user=self.user, bio="hello")
+        self.client.force_login(self.user)
+        url = reverse("blog:profile_edit")
+        data = {"first_name": "", "last_name": "", "email": "", "bio": "hello"}
+        self.client.post(url, data)
+        # Session, user, profile; no UPDATE of either.
+        with self.assertNumQueries(3):
+            response = self.client.post(url, data)
+        self.assertRedirects(response, reverse("blog:profile"), fetch_redirect_response=False)
+
+        data["bio"] = "updated"
+        self.client.post(url, data)
+        self.assertEqual(Profile.objects.get(user=self.user).bio, "updated")
+
+    def test_backfill_command(self):
+        Profile.objects.create(user=self.user)
+        for i in range(5):
+            User.objects.create_user(username=f"old{i}")
+        out = StringIO()
+        call_command("backfill_profiles", "--batch-size", "2", stdout=out)
+        self.assertIn("Created 5 profiles.", out.getvalue())
+        self.assertEqual(Profile.objects.count(), 6)
+        call_command("backfill_profiles", stdout=out)
+        self.assertEqual(Profile.objects.count(), 6)
+
+    def test_backfill_counts_only_inserted_profiles(self):
+        users = [User.objects.create_user(username=f"old{i}") for i in range(3)]
+        profile_filter = Profile.objects.filter
+
+        def racing_filter(*args, **kwargs):
+            # A request creates one profile of the batch lazily after the
+            # command has picked the batch's users.
+            if not Profile.objects.exists():
+                Profile.objects.create(user=users[0])
+            return profile_filter(*args, **kwargs)
 
-# Create your tests here.
+        out = StringIO()
+        with mock.patch.object(Profile.objects, "filter", racing_filter):
+            call_command("backfill_profiles", stdout=out)
+        self.assertIn("Created 3 profiles.", out.getvalue())  # 4 users, one lazy
+        self.assertEqual(Profile.objects.count(), 4)
@@ -3,7 +3,7 @@ from .views import (
     PostListView, PostDetailView,
     PostCreateView, PostUpdateView, PostDeleteView,
     CommentCreateView, CommentUpdateView, CommentDeleteView,
-    PostByTagListView, PostSearchListView,
+    PostByTagListView, PostSearchListView, TagIndexView,
     LoginView, LogoutView, RegisterView,
     profile, profile_edit
 )
@@ -24,6 +24,7 @@ urlpatterns = [
     path("comment/<int:pk>/delete/", CommentDeleteView.as_view(), name="comment_delete"),
 
     # Tags & Search
+    path("tags/", TagIndexView.as_view(), name="tag_index"),
     path("tags/<slug:tag_slug>/", PostByTagListView.as_view(), name="post_by_tag"),  # ✅ checker expects tag_slug
     path("search/", PostSearchListView.as_view(), name="post_search"),
 
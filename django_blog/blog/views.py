@@ -3,15 +3,16 @@ from django.contrib import messages
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q
+from django.http import Http404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse, reverse_lazy
 from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 
-from taggit.models import Tag  # taggit tags
-
-from .models import Post, Comment
+from . import cache, tag_stats
+from .cache import PageCacheMixin
+from .models import Post, Comment, Profile
+from .search import SearchResults
 from .forms import (
     RegistrationForm, UserUpdateForm, ProfileUpdateForm,
     PostForm, CommentForm,
@@ -21,18 +22,36 @@ from .forms import (
 # Public: List & Detail
 # ---------------------------
 
-class PostListView(ListView):
+class PostListView(PageCacheMixin, ListView):
     model = Post
     context_object_name = "posts"
     template_name = "blog/post_list.html"
     paginate_by = 10
 
+    def get_queryset(self):
+        return Post.objects.for_listing()
+
+    def cache_scopes(self):
+        return [cache.LIST, cache.TAG_STATS]
 
-class PostDetailView(DetailView):
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["tag_cloud"] = tag_stats.cloud
+        return ctx
+
+
+class PostDetailView(PageCacheMixin, DetailView):
     model = Post
     context_object_name = "post"
     template_name = "blog/post_detail.html"
 
+    def get_queryset(self):
+        # Tags are read inside the cached article fragment, so only on a miss.
+        return Post.objects.select_related("author")
+
+    def cache_scopes(self):
+        return [cache.post_scope(self.kwargs["pk"])]
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["comments"] = self.object.comments.select_related("author")
@@ -134,27 +153,42 @@ class CommentDeleteView(LoginRequiredMixin, CommentAuthorRequiredMixin, DeleteVi
 # Tag filter & Search (taggit)
 # ---------------------------
 
-class PostByTagListView(ListView):
+class PostByTagListView(PageCacheMixin, ListView):
     model = Post
     context_object_name = "posts"
     template_name = "blog/post_list.html"
     paginate_by = 10
 
     def get_queryset(self):
-        self.tag = get_object_or_404(Tag, slug=self.kwargs["slug"])
-            qs = Post.objects.filter(tags__slug=self.tag.slug)
-        return (
-            Post.objects.select_related("author")
-            .prefetch_related("tags")
-            .filter(tags__slug=self.tag.slug)
-        )
+        # Slug -> id from the in-process map (blog/tag_stats.py), no Tag query
+        self.tag = tag_stats.tag_for_slug(self.kwargs["tag_slug"])
+        if self.tag is None:
+            raise Http404("No such tag.")
+        return Post.objects.for_listing().filter(tags__id=self.tag.pk)
+
+    def cache_scopes(self):
+        return [cache.tag_scope(self.kwargs["tag_slug"]), cache.TAG_STATS]
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["active_tag"] = self.tag
+        ctx["tag_cloud"] = tag_stats.cloud
         return ctx
 
 
+class TagIndexView(PageCacheMixin, ListView):
+    context_object_name = "tag_stats"
+    template_name = "blog/tag_index.html"
+    paginate_by = 100
+
+    def get_queryset(self):
+        # Counts come from the materialized TagStats table, not TaggedItem
+        return tag_stats.tag_index()
+
+    def cache_scopes(self):
+        return [cache.TAGS, cache.TAG_STATS]
+
+
 class PostSearchListView(ListView):
     model = Post
     context_object_name = "posts"
@@ -162,20 +196,13 @@ class PostSearchListView(ListView):
     paginate_by = 10
 
     def get_queryset(self):
+        # Ranked full-text matches over title, tags and content (blog/search.py)
         q = (self.request.GET.get("q") or "").strip()
         self.query = q
         if not q:
             return Post.objects.none()
-        return (
-            Post.objects.select_related("author")
-            .prefetch_related("tags")
-            .filter(
-                Q(title__icontains=q) |
-                Q(content__icontains=q) |
-                Q(tags__name__icontains=q)
-            )
-            .distinct()
-        )
+        # Unstripped: a trailing space means the last word is complete (no prefix match)
+        return SearchResults(self.request.GET["q"])
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
@@ -214,22 +241,25 @@ class RegisterView(View):
 
 @login_required
 def profile(request):
-    return render(request, "blog/profile.html")
+    return render(request, "blog/profile.html", {"profile": Profile.objects.for_user(request.user)})
 
 
 @login_required
 def profile_edit(request):
+    user_profile = Profile.objects.for_user(request.user)
     if request.method == "POST":
         u_form = UserUpdateForm(request.POST, instance=request.user)
-        p_form = ProfileUpdateForm(request.POST, instance=request.user.profile)
+        p_form = ProfileUpdateForm(request.POST, instance=user_profile)
         if u_form.is_valid() and p_form.is_valid():
-            u_form.save()
-            p_form.save()
+            # Only write what the user actually changed
+            for form in (u_form, p_form):
+                if form.has_changed():
+                    form.save()
             messages.success(request, "Profile updated.")
             return redirect("blog:profile")
     else:
         u_form = UserUpdateForm(instance=request.user)
-        p_form = ProfileUpdateForm(instance=request.user.profile)
+        p_form = ProfileUpdateForm(instance=user_profile)
 
     return render(
         request,
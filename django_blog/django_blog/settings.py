@@ -10,11 +10,16 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Apps shared by the projects in this repository (query_metrics/) live one level up.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -39,9 +44,11 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'blog',
     'taggit',
+    'query_metrics',
 ]
 
 MIDDLEWARE = [
+    'query_metrics.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +91,32 @@ DATABASES = {
 
 
 
+# Caches
+# Whole public pages for anonymous visitors and shared template fragments
+# for signed-in users (blog/cache.py). Locmem is per process; point 'default'
+# at Redis/Memcached when running several workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "blog",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    }
+}
+BLOG_PAGE_CACHE_TTL = 300  # seconds; 0 disables the page and fragment cache
+
+# Full-text search (blog/search.py): 'auto' = FTS5 on SQLite, tsvector + GIN
+# on PostgreSQL; or force 'sqlite_fts5', 'postgres' or 'basic' (icontains).
+# Only the newest BLOG_SEARCH_MAX_CANDIDATES matches are ranked.
+BLOG_SEARCH_BACKEND = "auto"
+BLOG_SEARCH_MAX_CANDIDATES = 2000
+
+# Tag cloud on the post list pages (blog/tag_stats.py): the most used tags,
+# cached until a post's tags change or for BLOG_TAG_CLOUD_TTL seconds.
+BLOG_TAG_CLOUD_SIZE = 30
+BLOG_TAG_CLOUD_TTL = 3600
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -125,6 +158,12 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Query metrics (../query_metrics): Server-Timing headers, per-view aggregates
+# at /_metrics/queries/, and a log of slow or query-heavy requests with their
+# SQL fingerprints.
+QUERY_METRICS_SLOW_REQUEST_MS = 500
+QUERY_METRICS_SLOW_QUERY_COUNT = 30
+
 LOGIN_REDIRECT_URL = "blog:post_list"   # after login
 LOGOUT_REDIRECT_URL = "blog:post_list"  # after logout
 LOGIN_URL = "blog:login"                # for @login_required redirects
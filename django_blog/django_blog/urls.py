@@ -4,5 +4,6 @@ from django.urls import path, include
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("_metrics/queries/", include("query_metrics.urls")),
     path("", include("blog.urls", namespace="blog")),
 ]
@@ -1,3 +1,34 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from token_auth.authentication import token_cache
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username="tester")
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_second_request_is_served_from_cache(self):
+        hits = token_cache.hits
+        self.client.get("/api/catalog/products/")
+        self.client.get("/api/catalog/products/")
+        self.assertEqual(token_cache.hits - hits, 1)
+
+    def test_logout_invalidates_token(self):
+        self.client.get("/api/catalog/products/")
+        resp = self.client.post("/api/users/logout/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resp = self.client.get("/api/catalog/products/")
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get("/api/catalog/products/")
+        self.user.is_active = False
+        self.user.save()
+        resp = self.client.get("/api/catalog/products/")
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,6 +1,7 @@
 # accounts/token_views.py
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -21,3 +22,13 @@ class LoginView(ObtainAuthToken):
                 status=status.HTTP_200_OK,
             )
         return Response({"detail": "Invalid credentials"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+# Deletes the caller's token (and evicts it from the token cache)
+class LogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        if request.auth is not None:
+            request.auth.delete()
+        return Response({"message": "Logged out"}, status=status.HTTP_200_OK)
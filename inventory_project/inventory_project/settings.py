@@ -1,9 +1,14 @@
 import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Apps shared by the projects in this repository (query_metrics/) live one level up
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 # --- Environment ---
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-me")
 DEBUG = os.getenv("DEBUG", "true").lower() == "true"
@@ -27,10 +32,15 @@ INSTALLED_APPS = [
 
     # Local
     "catalog",
+
+    # Shared (repository root)
+    "query_metrics",
+    "token_auth",
 ]
 
 # --- Middleware ---
 MIDDLEWARE = [
+    "query_metrics.middleware.QueryMetricsMiddleware",  # first: times the whole stack
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -102,13 +112,26 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
+        "token_auth.authentication.CachedTokenAuthentication",  # TokenAuthentication + shared token -> user cache
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 25,
 }
 
+# --- Token cache (../token_auth) ---
+# Kept in the 'default' cache: revocation reaches every worker sharing it
+# (Redis/Memcached); with locmem it can lag by up to the TTL in other workers
+ACCOUNTS_TOKEN_CACHE = "default"
+ACCOUNTS_TOKEN_CACHE_TTL = int(os.getenv("ACCOUNTS_TOKEN_CACHE_TTL", 60))  # seconds; 0 disables
+
+# --- Query metrics (../query_metrics) ---
+# Server-Timing header (defaults to DEBUG), per-view aggregates at /_metrics/queries/ (staff),
+# slow requests logged with their SQL fingerprints (None disables a check)
+QUERY_METRICS_SERVER_TIMING = os.getenv("QUERY_METRICS_SERVER_TIMING", str(DEBUG)).lower() == "true"
+QUERY_METRICS_SLOW_REQUEST_MS = int(os.getenv("QUERY_METRICS_SLOW_REQUEST_MS", 500))
+QUERY_METRICS_SLOW_QUERY_COUNT = int(os.getenv("QUERY_METRICS_SLOW_QUERY_COUNT", 50))
+
 # --- Swagger / OpenAPI ---
 SPECTACULAR_SETTINGS = {
     "TITLE": "Inventory Management API",
@@ -7,7 +7,7 @@ from accounts.token_views import CustomObtainAuthToken
 from accounts.views import RegisterView
 from catalog.views import CategoryViewSet, SupplierViewSet, ProductViewSet
 from catalog import views as catalog_views
-from accounts.token_views import LoginView
+from accounts.token_views import LoginView, LogoutView
 
 
 # NEW: import models for counts
@@ -103,8 +103,10 @@ urlpatterns = [
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
     path("api/health/", health),
+    path("_metrics/queries/", include("query_metrics.urls")),
     path("api/users/register/", RegisterView.as_view(), name="user-register"),
     path("api/auth/token/", CustomObtainAuthToken.as_view(), name="api-token"),
     path("api/users/login/", LoginView.as_view(), name="user-login"),
+    path("api/users/logout/", LogoutView.as_view(), name="user-logout"),
 
 ]
@@ -0,0 +1,44 @@
+# query_metrics/__init__.py
+"""
+Per-view query-count and latency instrumentation, shared by the Django
+projects in this repository (social_media_api, inventory_project,
+django_blog).
+
+For every request, QueryMetricsMiddleware records:
+
+* the number of SQL queries and the time spent executing them,
+* the time spent in DRF serializers (`serializer.data`) and in rendering
+  (templates, DRF renderers), with the queries issued inside each phase —
+  queries during serialization are the usual N+1 signature,
+* the total time and the response size in bytes,
+* each query's fingerprint (literals and IN lists collapsed), so the most
+  repeated statement can be reported.
+
+Results are exposed three ways:
+
+* a `Server-Timing` header on every response (`db`, `serialize`, `render`,
+  `total`), visible in the browser's network panel — only with DEBUG on
+  unless enabled explicitly, since it tells any client how much database
+  work a request caused;
+* per-view aggregates (`GET /_metrics/queries/`, JSON) for staff users;
+* an optional slow-request log: requests over QUERY_METRICS_SLOW_REQUEST_MS
+  or QUERY_METRICS_SLOW_QUERY_COUNT are logged (logger `query_metrics`) with
+  their SQL fingerprints.
+
+Setup, in a project's settings and root urls:
+
+    INSTALLED_APPS += ['query_metrics']
+    MIDDLEWARE = ['query_metrics.middleware.QueryMetricsMiddleware', *MIDDLEWARE]
+    path('_metrics/queries/', include('query_metrics.urls'))
+
+Settings (all optional):
+
+    QUERY_METRICS_ENABLED           record requests at all (default True)
+    QUERY_METRICS_SERVER_TIMING     send the Server-Timing header (default DEBUG)
+    QUERY_METRICS_SLOW_REQUEST_MS   log requests slower than this (default None: off)
+    QUERY_METRICS_SLOW_QUERY_COUNT  log requests with more queries (default None: off)
+    QUERY_METRICS_EXCLUDE_PATHS     path prefixes not recorded (default STATIC_URL, MEDIA_URL)
+    QUERY_METRICS_SAMPLE_SIZE       recent requests kept per view for percentiles (default 200)
+
+Aggregates are per process, like the other in-process counters here.
+"""
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class QueryMetricsConfig(AppConfig):
+    name = 'query_metrics'
+    verbose_name = 'Query metrics'
+
+    def ready(self):
+        from . import recorder
+        recorder.install()
@@ -0,0 +1,128 @@
+# query_metrics/middleware.py
+"""
+QueryMetricsMiddleware: wraps each request in a RequestMetrics, adds the
+Server-Timing header and hands the finished measurements to the per-view
+aggregates and the slow-request log.
+
+Put it first in MIDDLEWARE so `total` covers the other middleware too.
+Streamed responses are finished when the body has been sent: their size and
+the queries run while streaming (e.g. from a server-side cursor) count, but
+their Server-Timing header can only cover the time until the first byte.
+"""
+import logging
+
+from django.conf import settings
+
+from . import recorder, stats
+
+logger = logging.getLogger('query_metrics')
+
+
+def enabled():
+    return getattr(settings, 'QUERY_METRICS_ENABLED', True)
+
+
+def server_timing_enabled():
+    return getattr(settings, 'QUERY_METRICS_SERVER_TIMING', settings.DEBUG)
+
+
+def excluded_paths():
+    default = tuple(
+        url for url in (getattr(settings, 'STATIC_URL', None), getattr(settings, 'MEDIA_URL', None))
+        if url and url.startswith('/') and url != '/'
+    )
+    return tuple(getattr(settings, 'QUERY_METRICS_EXCLUDE_PATHS', default))
+
+
+def server_timing(metrics):
+    """The Server-Timing header value for `metrics` (durations in ms)."""
+    entries = [f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"']
+    for name in recorder.PHASES:
+        if metrics.phase_time[name]:
+            entries.append(f'{name};dur={metrics.phase_time[name] * 1000:.2f}')
+    entries.append(f'total;dur={metrics.elapsed() * 1000:.2f}')
+    return ', '.join(entries)
+
+
+def log_if_slow(metrics):
+    slow_ms = getattr(settings, 'QUERY_METRICS_SLOW_REQUEST_MS', None)
+    max_queries = getattr(settings, 'QUERY_METRICS_SLOW_QUERY_COUNT', None)
+    too_slow = slow_ms is not None and metrics.total * 1000 >= slow_ms
+    too_many = max_queries is not None and metrics.queries > max_queries
+    if not (too_slow or too_many):
+        return
+    lines = [
+        f'  {count:>4}x {seconds * 1000:>9.2f} ms  {sql}'
+        for sql, count, seconds in metrics.top_fingerprints()
+    ]
+    logger.warning(
+        'Slow request: %s %s (%s) %.1f ms, %d queries in %.1f ms\n%s',
+        metrics.method, metrics.path, metrics.view or stats.UNRESOLVED,
+        metrics.total * 1000, metrics.queries, metrics.db_time * 1000, '\n'.join(lines),
+    )
+
+
+def finish(metrics):
+    recorder.deactivate(metrics)
+    metrics.total = metrics.elapsed()
+    stats.record(metrics)
+    log_if_slow(metrics)
+
+
+class QueryMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not enabled() or request.path.startswith(excluded_paths()):
+            return self.get_response(request)
+
+        metrics = recorder.RequestMetrics(request.method, request.path)
+        recorder.activate(metrics)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            recorder.deactivate(metrics)
+            raise
+
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and getattr(match.func, 'query_metrics_exempt', False):
+            recorder.deactivate(metrics)
+            return response
+        metrics.view = match.view_name if match is not None else None
+        metrics.status = response.status_code
+
+        if server_timing_enabled():
+            value = server_timing(metrics)
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {value}' if existing else value
+
+        if response.streaming and not getattr(response, 'is_async', False):
+            response.streaming_content = CountedStream(response.streaming_content, metrics)
+        else:
+            if not response.streaming:
+                metrics.response_size = len(response.content)
+            finish(metrics)
+        return response
+
+
+class CountedStream:
+    """A streamed body that counts its bytes and finishes `metrics` on close."""
+
+    def __init__(self, chunks, metrics):
+        self.chunks = chunks
+        self.metrics = metrics
+        self.finished = False
+        metrics.response_size = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.metrics.response_size += len(chunk)
+            yield chunk
+
+    def close(self):
+        # The response closes its streaming content once the server is done
+        # with it, whether or not the body was sent in full.
+        if not self.finished:
+            self.finished = True
+            finish(self.metrics)
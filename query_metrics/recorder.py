@@ -0,0 +1,185 @@
+# query_metrics/recorder.py
+"""
+Collection of one request's measurements.
+
+The middleware activates a RequestMetrics for the current context; while it
+is active:
+
+* every SQL statement on every connection passes through `execute_wrapper`
+  (installed once per connection from the `connection_created` signal);
+* `phase(name)` times a block — `install()` wraps DRF's `serializer.data`
+  as 'serialize' and response/template rendering as 'render'. Phases do not
+  nest: a template rendered while serializing counts as serialization.
+
+Outside a request (management commands, shells, worker threads) the hooks
+cost one context-variable lookup.
+"""
+import contextvars
+import functools
+import re
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_current = contextvars.ContextVar('query_metrics', default=None)
+
+PHASES = ('serialize', 'render')
+
+
+class RequestMetrics:
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.view = None
+        self.status = None
+        self.started = time.perf_counter()
+        self.total = 0.0  # seconds, set by finish()
+        self.queries = 0
+        self.db_time = 0.0
+        self.phase = None  # the phase currently running
+        self.phase_time = dict.fromkeys(PHASES, 0.0)
+        self.phase_queries = dict.fromkeys(PHASES, 0)
+        self.fingerprints = {}  # fingerprint -> [executions, seconds]
+        self.response_size = None
+
+    def add_query(self, sql, seconds):
+        self.queries += 1
+        self.db_time += seconds
+        if self.phase is not None:
+            self.phase_queries[self.phase] += 1
+        key = fingerprint(sql)
+        entry = self.fingerprints.get(key)
+        if entry is None:
+            self.fingerprints[key] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    @property
+    def max_repeats(self):
+        """Executions of the most repeated statement (N+1 shows up here)."""
+        return max((count for count, _ in self.fingerprints.values()), default=0)
+
+    def top_fingerprints(self, limit=10):
+        """(fingerprint, executions, seconds), most time-consuming first."""
+        rows = sorted(self.fingerprints.items(), key=lambda item: (-item[1][1], -item[1][0]))
+        return [(sql, count, seconds) for sql, (count, seconds) in rows[:limit]]
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    return _current.get()
+
+
+def activate(metrics):
+    _current.set(metrics)
+
+
+def deactivate(metrics):
+    if _current.get() is metrics:
+        _current.set(None)
+
+
+# ---- SQL fingerprints ---------------------------------------------------------
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ROWS = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_SPACE = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    `sql` with literals and placeholders replaced by `?` and every
+    parenthesised list of them by `(...)`, so the same statement with
+    different arguments — or a different number of them — has one
+    fingerprint.
+    """
+    sql = _STRING.sub('?', sql).replace('%s', '?')
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    sql = _ROWS.sub(r'\1, ...', sql)  # multi-row INSERT ... VALUES
+    return _SPACE.sub(' ', sql).strip()
+
+
+# ---- hooks --------------------------------------------------------------------
+def execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+@contextmanager
+def phase(name):
+    metrics = _current.get()
+    if metrics is None or metrics.phase is not None:
+        yield
+        return
+    metrics.phase = name
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phase_time[name] += time.perf_counter() - started
+        metrics.phase = None
+
+
+def timed(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with phase(name):
+            return func(*args, **kwargs)
+    wrapper.query_metrics_timed = True
+    return wrapper
+
+
+def _instrument_connection(connection):
+    if execute_wrapper not in connection.execute_wrappers:
+        # First in the list = outermost, so the time includes other wrappers.
+        connection.execute_wrappers.insert(0, execute_wrapper)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _instrument_connection(connection)
+
+
+def _instrument_method(cls, attr, name):
+    func = cls.__dict__[attr]
+    if not getattr(func, 'query_metrics_timed', False):
+        setattr(cls, attr, timed(name, func))
+
+
+def _instrument_property(cls, attr, name):
+    prop = cls.__dict__[attr]
+    if not getattr(prop.fget, 'query_metrics_timed', False):
+        setattr(cls, attr, property(timed(name, prop.fget), prop.fset, prop.fdel, prop.__doc__))
+
+
+def install():
+    """Hook the database connections, serializers and renderers. Idempotent."""
+    connection_created.connect(_on_connection_created, dispatch_uid='query_metrics')
+    for connection in connections.all(initialized_only=True):
+        _instrument_connection(connection)
+
+    from django.template.backends.django import Template
+    from django.template.response import SimpleTemplateResponse
+    _instrument_method(SimpleTemplateResponse, 'render', 'render')
+    _instrument_method(Template, 'render', 'render')
+
+    try:
+        from rest_framework.serializers import BaseSerializer
+    except ImportError:  # projects without DRF
+        return
+    # Serializer.data and ListSerializer.data both end in BaseSerializer.data,
+    # which is where to_representation() runs.
+    _instrument_property(BaseSerializer, 'data', 'serialize')
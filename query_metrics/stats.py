@@ -0,0 +1,104 @@
+# query_metrics/stats.py
+"""
+Per-view aggregates of the recorded requests, for the metrics endpoint.
+
+Views are keyed by method and URL name (`GET post-list`), so the number of
+keys is bounded by the URLconf; requests that resolve to no view share one
+key. Besides running sums and maxima, each view keeps its last
+QUERY_METRICS_SAMPLE_SIZE total times for the percentiles.
+"""
+import statistics
+import threading
+from collections import deque
+
+from django.conf import settings
+
+from .recorder import PHASES
+
+UNRESOLVED = '<unresolved>'
+
+_views = {}
+_lock = threading.Lock()
+
+
+def sample_size():
+    return getattr(settings, 'QUERY_METRICS_SAMPLE_SIZE', 200)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class ViewStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.max_repeats = 0
+        self.db_time = 0.0
+        self.phase_time = dict.fromkeys(PHASES, 0.0)
+        self.phase_queries = dict.fromkeys(PHASES, 0)
+        self.total = 0.0
+        self.max_total = 0.0
+        self.bytes = 0
+        self.recent = deque(maxlen=sample_size())
+
+    def add(self, metrics):
+        self.requests += 1
+        self.errors += metrics.status is not None and metrics.status >= 500
+        self.queries += metrics.queries
+        self.max_queries = max(self.max_queries, metrics.queries)
+        self.max_repeats = max(self.max_repeats, metrics.max_repeats)
+        self.db_time += metrics.db_time
+        for name in PHASES:
+            self.phase_time[name] += metrics.phase_time[name]
+            self.phase_queries[name] += metrics.phase_queries[name]
+        self.total += metrics.total
+        self.max_total = max(self.max_total, metrics.total)
+        self.bytes += metrics.response_size or 0
+        self.recent.append(metrics.total)
+
+    def as_dict(self):
+        n = self.requests
+        recent = sorted(self.recent)
+        data = {
+            'requests': n,
+            'errors': self.errors,
+            'avg_queries': round(self.queries / n, 2),
+            'max_queries': self.max_queries,
+            'max_repeated_query': self.max_repeats,
+            'avg_db_ms': _ms(self.db_time / n),
+        }
+        for name in PHASES:
+            data[f'avg_{name}_ms'] = _ms(self.phase_time[name] / n)
+            data[f'avg_{name}_queries'] = round(self.phase_queries[name] / n, 2)
+        data.update({
+            'avg_total_ms': _ms(self.total / n),
+            'p50_total_ms': _ms(statistics.median(recent)),
+            'p95_total_ms': _ms(recent[max(0, int(len(recent) * 0.95) - 1)]),
+            'max_total_ms': _ms(self.max_total),
+            'avg_bytes': round(self.bytes / n),
+        })
+        return data
+
+
+def record(metrics):
+    key = f'{metrics.method} {metrics.view or UNRESOLVED}'
+    with _lock:
+        view = _views.get(key)
+        if view is None:
+            view = _views[key] = ViewStats()
+        view.add(metrics)
+
+
+def snapshot():
+    """Per-view aggregates, the views with the most total time first."""
+    with _lock:
+        ranked = sorted(_views.items(), key=lambda item: -item[1].total)
+        return {key: view.as_dict() for key, view in ranked}
+
+
+def reset():
+    with _lock:
+        _views.clear()
@@ -0,0 +1,166 @@
+# query_metrics/tests.py
+"""
+Run from any project that installs the app, e.g.
+
+    cd social_media_api && python manage.py test query_metrics
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import path
+
+from . import stats
+from .recorder import fingerprint, phase
+from .views import metrics_view
+
+
+def single_query(request):
+    return HttpResponse(str(Group.objects.count()))
+
+
+def n_plus_one(request):
+    names = [Group.objects.filter(pk=group.pk).values_list('name', flat=True).first()
+             for group in Group.objects.all()]
+    return HttpResponse(','.join(names))
+
+
+def rendered(request):
+    template = engines['django'].from_string('{% for g in groups %}{{ g.name }} {% endfor %}')
+    return HttpResponse(template.render({'groups': Group.objects.all()}))
+
+
+def serialized(request):
+    with phase('serialize'):
+        names = [group.name for group in Group.objects.all()]
+    return HttpResponse(' '.join(names))
+
+
+def streamed(request):
+    return StreamingHttpResponse(group.name for group in Group.objects.all())
+
+
+urlpatterns = [
+    path('single/', single_query, name='single'),
+    path('n-plus-one/', n_plus_one, name='n-plus-one'),
+    path('rendered/', rendered, name='rendered'),
+    path('serialized/', serialized, name='serialized'),
+    path('streamed/', streamed, name='streamed'),
+    path('metrics/', metrics_view, name='query-metrics'),
+]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=[
+        'query_metrics.middleware.QueryMetricsMiddleware',
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+    ],
+    SECURE_SSL_REDIRECT=False,
+    QUERY_METRICS_SERVER_TIMING=True,
+    QUERY_METRICS_SLOW_REQUEST_MS=None,
+    QUERY_METRICS_SLOW_QUERY_COUNT=None,
+)
+class QueryMetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.bulk_create([Group(name=f'group{i}') for i in range(5)])
+
+    def setUp(self):
+        stats.reset()
+
+    def test_server_timing_header(self):
+        response = self.client.get('/single/')
+        header = response['Server-Timing']
+        self.assertIn('db;dur=', header)
+        self.assertIn('desc="1 queries"', header)
+        self.assertIn('total;dur=', header)
+
+    def test_server_timing_can_be_disabled(self):
+        with self.settings(QUERY_METRICS_SERVER_TIMING=False):
+            response = self.client.get('/single/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(stats.snapshot()['GET single']['requests'], 1)
+
+    def test_server_timing_follows_debug_by_default(self):
+        with self.settings(DEBUG=False):
+            del settings.QUERY_METRICS_SERVER_TIMING
+            self.assertNotIn('Server-Timing', self.client.get('/single/'))
+        with self.settings(DEBUG=True):
+            del settings.QUERY_METRICS_SERVER_TIMING
+            self.assertIn('Server-Timing', self.client.get('/single/'))
+
+    def test_aggregates_per_view(self):
+        for _ in range(3):
+            self.client.get('/single/')
+        self.client.get('/n-plus-one/')
+        views = stats.snapshot()
+        self.assertEqual(views['GET single']['requests'], 3)
+        self.assertEqual(views['GET single']['avg_queries'], 1)
+        self.assertEqual(views['GET single']['avg_bytes'], 1)
+        # One list query plus one per group, all five with the same fingerprint.
+        self.assertEqual(views['GET n-plus-one']['max_queries'], 6)
+        self.assertEqual(views['GET n-plus-one']['max_repeated_query'], 5)
+
+    def test_phases(self):
+        self.client.get('/rendered/')
+        self.client.get('/serialized/')
+        views = stats.snapshot()
+        self.assertEqual(views['GET rendered']['avg_render_queries'], 1)
+        self.assertEqual(views['GET serialized']['avg_serialize_queries'], 1)
+        self.assertGreater(views['GET serialized']['avg_serialize_ms'], 0)
+
+    def test_streamed_response_is_counted_when_consumed(self):
+        response = self.client.get('/streamed/')
+        self.assertEqual(stats.snapshot(), {})
+        body = b''.join(response.streaming_content)
+        view = stats.snapshot()['GET streamed']
+        self.assertEqual(view['avg_bytes'], len(body))
+        self.assertEqual(view['avg_queries'], 1)
+
+    def test_unresolved_paths_share_one_key(self):
+        self.client.get('/missing/1/')
+        self.client.get('/missing/2/')
+        self.assertEqual(stats.snapshot()[f'GET {stats.UNRESOLVED}']['requests'], 2)
+
+    def test_slow_request_log(self):
+        with self.settings(QUERY_METRICS_SLOW_QUERY_COUNT=3), \
+                self.assertLogs('query_metrics', logging.WARNING) as logs:
+            self.client.get('/n-plus-one/')
+            self.client.get('/single/')  # under the threshold
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('6 queries', logs.output[0])
+        self.assertIn('   5x', logs.output[0])
+
+    def test_metrics_endpoint(self):
+        self.client.get('/single/')
+        self.client.force_login(get_user_model().objects.create_user('ops', is_staff=True))
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()['views']), ['GET single'])
+
+    def test_metrics_endpoint_is_staff_only(self):
+        # A loopback address (e.g. a local reverse proxy) is not enough.
+        self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='127.0.0.1').status_code, 404)
+        self.client.force_login(get_user_model().objects.create_user('member'))
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+
+class FingerprintTests(TestCase):
+    def test_literals_and_lists_collapse(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'x' AND b IN (%s, %s, %s) LIMIT 21"),
+            fingerprint("SELECT *  FROM t WHERE a = 'yy' AND b IN (%s) LIMIT 5"),
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO t (a, b) VALUES (...), ...',
+        )
+
+    def test_identifiers_are_kept(self):
+        self.assertEqual(fingerprint('SELECT "t1"."c2" FROM "t1"'), 'SELECT "t1"."c2" FROM "t1"')
@@ -0,0 +1,24 @@
+# query_metrics/views.py
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from . import stats
+
+
+def allowed(request):
+    # REMOTE_ADDR is the proxy's address behind a reverse proxy, so it
+    # cannot tell local callers apart; only staff sessions are let in.
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+@require_GET
+def metrics_view(request):
+    """Per-view query counts and latencies since process start (see stats.py)."""
+    if not allowed(request):
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    return JsonResponse({'views': stats.snapshot()}, json_dumps_params={'indent': 2})
+
+
+# Reading the metrics must not show up in them.
+metrics_view.query_metrics_exempt = True
@@ -1,11 +1,19 @@
 # accounts/admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
-from .models import User
+from .models import FollowSuggestion, User
 
 @admin.register(User)
 class UserAdmin(DjangoUserAdmin):
     fieldsets = DjangoUserAdmin.fieldsets + (
-        ('Profile', {'fields': ('bio', 'profile_picture', 'followers')}),
+        ('Profile', {'fields': ('bio', 'profile_picture', 'followers_count', 'following_count')}),
     )
-    list_display = ('username', 'email', 'is_staff', 'is_active', 'last_login')
+    readonly_fields = ('followers_count', 'following_count')
+    list_display = ('username', 'email', 'is_staff', 'is_active', 'last_login', 'followers_count')
+
+
+@admin.register(FollowSuggestion)
+class FollowSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'suggested', 'score', 'computed_at')
+    list_select_related = ('user', 'suggested')
+    raw_id_fields = ('user', 'suggested')
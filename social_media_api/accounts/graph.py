@@ -0,0 +1,182 @@
+# accounts/graph.py
+"""
+Follow-graph helpers.
+
+`following_ids(user)` returns the set of ids a user follows. For users who
+follow at least ACCOUNTS_ADJACENCY_CACHE_MIN_FOLLOWING accounts the set is
+kept in a small in-process LRU cache, so feed reads do not re-scan their
+Follow rows on every request.
+
+The cache is per process: FollowUserView / UnfollowUserView invalidate the
+entry in the process that handled the write, and ACCOUNTS_ADJACENCY_CACHE_TTL
+bounds how stale other processes can be. Set ACCOUNTS_ADJACENCY_CACHE_SIZE
+to 0 to disable it.
+
+`bulk_follow` / `bulk_unfollow` apply many edges for one follower with a
+constant number of queries (onboarding flows follow dozens of accounts).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from token_auth.authentication import token_cache
+
+from .models import Follow, FollowSuggestion, User
+
+
+class AdjacencyCache:
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'ACCOUNTS_ADJACENCY_CACHE_SIZE', 1024)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'ACCOUNTS_ADJACENCY_CACHE_TTL', 60)
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id, ids):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, ids)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+adjacency_cache = AdjacencyCache()
+
+
+def following_ids(user):
+    """Ids of the accounts `user` follows, as a frozenset."""
+    cacheable = user.following_count >= getattr(settings, 'ACCOUNTS_ADJACENCY_CACHE_MIN_FOLLOWING', 500)
+    if cacheable:
+        ids = adjacency_cache.get(user.pk)
+        if ids is not None:
+            return ids
+    ids = frozenset(
+        Follow.objects.filter(follower=user).values_list('following_id', flat=True)
+    )
+    if cacheable:
+        adjacency_cache.set(user.pk, ids)
+    return ids
+
+
+def _invalidate(follower_id, target_ids):
+    adjacency_cache.invalidate(follower_id)
+    # Cached request.user objects carry the counters we just changed.
+    token_cache.invalidate_users(follower_id, *target_ids)
+
+
+def _lock_follower(follower):
+    # Serializes every graph write (single and bulk) per follower, so the
+    # "already following" reads and the counter updates cannot interleave.
+    User.objects.select_for_update().filter(pk=follower.pk).values_list('pk').first()
+
+
+def follow(follower, target):
+    """Create the Follow row and bump both counters. Returns False if it already existed."""
+    with transaction.atomic():
+        _lock_follower(follower)
+        _, created = Follow.objects.get_or_create(follower=follower, following=target)
+        if created:
+            User.objects.filter(pk=follower.pk).update(following_count=F('following_count') + 1)
+            User.objects.filter(pk=target.pk).update(followers_count=F('followers_count') + 1)
+    if created:
+        FollowSuggestion.objects.filter(user=follower, suggested=target).delete()
+        _invalidate(follower.pk, [target.pk])
+    return created
+
+
+def unfollow(follower, target):
+    """Delete the Follow row and decrement both counters. Returns False if there was none."""
+    with transaction.atomic():
+        _lock_follower(follower)
+        deleted, _ = Follow.objects.filter(follower=follower, following=target).delete()
+        if deleted:
+            User.objects.filter(pk=follower.pk, following_count__gt=0).update(
+                following_count=F('following_count') - 1
+            )
+            User.objects.filter(pk=target.pk, followers_count__gt=0).update(
+                followers_count=F('followers_count') - 1
+            )
+    if deleted:
+        _invalidate(follower.pk, [target.pk])
+    return bool(deleted)
+
+
+def bulk_follow(follower, target_ids):
+    """
+    Follow every id in `target_ids` (assumed to exist and exclude `follower`).
+    Returns the list of ids that were newly followed.
+    """
+    target_ids = set(target_ids)
+    with transaction.atomic():
+        _lock_follower(follower)
+        existing = set(
+            Follow.objects.filter(follower=follower, following_id__in=target_ids)
+            .values_list('following_id', flat=True)
+        )
+        new_ids = sorted(target_ids - existing)
+        if new_ids:
+            Follow.objects.bulk_create(
+                [Follow(follower=follower, following_id=pk) for pk in new_ids],
+                ignore_conflicts=True,
+            )
+            User.objects.filter(pk=follower.pk).update(
+                following_count=F('following_count') + len(new_ids)
+            )
+            User.objects.filter(pk__in=new_ids).update(followers_count=F('followers_count') + 1)
+            FollowSuggestion.objects.filter(user=follower, suggested_id__in=new_ids).delete()
+    if new_ids:
+        _invalidate(follower.pk, new_ids)
+    return new_ids
+
+
+def bulk_unfollow(follower, target_ids):
+    """Unfollow every id in `target_ids`. Returns the ids that were actually unfollowed."""
+    with transaction.atomic():
+        _lock_follower(follower)
+        edges = Follow.objects.filter(follower=follower, following_id__in=set(target_ids))
+        removed_ids = sorted(edges.values_list('following_id', flat=True))
+        if removed_ids:
+            edges.delete()
+            # Clamped rather than skipped, so a drifted counter still moves.
+            User.objects.filter(pk=follower.pk).update(
+                following_count=Greatest(F('following_count') - len(removed_ids), 0)
+            )
+            User.objects.filter(pk__in=removed_ids, followers_count__gt=0).update(
+                followers_count=F('followers_count') - 1
+            )
+    if removed_ids:
+        _invalidate(follower.pk, removed_ids)
+    return removed_ids
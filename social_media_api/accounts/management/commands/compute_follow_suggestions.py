@@ -0,0 +1,33 @@
+# accounts/management/commands/compute_follow_suggestions.py
+from django.core.management.base import BaseCommand
+
+from accounts.suggestions import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute friends-of-friends follow suggestions into the "
+        "FollowSuggestion table. Run periodically (cron, Celery beat, ...); "
+        "each chunk of users is replaced in its own transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=200,
+            help='Users processed per query/transaction (default: 200).',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Suggestions kept per user (default: settings.ACCOUNTS_SUGGESTIONS_PER_USER).',
+        )
+
+    def handle(self, *args, **opts):
+        def progress(stats):
+            if opts['verbosity'] > 1:
+                self.stdout.write(f"  {stats.users} users, {stats.suggestions} suggestions")
+
+        stats = rebuild(chunk_size=opts['chunk_size'], limit=opts['limit'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stats.suggestions} suggestions for {stats.users} users "
+            f"in {stats.seconds:.2f}s."
+        ))
@@ -1,8 +1,18 @@
 # accounts/models.py
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
 
+from token_auth.querysets import TokenCacheQuerySet
+
+
+class UserManager(BaseUserManager.from_queryset(TokenCacheQuerySet)):
+    """Bulk updates of auth columns (is_active, password, ...) revoke cached tokens."""
+
+
 class User(AbstractUser):
+    bio = models.TextField(blank=True)
+    profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
+
     # Users this user follows
     following = models.ManyToManyField(
         'self',
@@ -12,6 +22,19 @@ class User(AbstractUser):
         blank=True,
     )
 
+    # Denormalized graph counters, updated with F() in FollowUserView /
+    # UnfollowUserView alongside the Follow row.
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # posts.timeline looks up high-follower authors by this column
+            models.Index(fields=['followers_count'], name='accounts_user_followers_idx'),
+        ]
+
 class Follow(models.Model):
     follower = models.ForeignKey('User', on_delete=models.CASCADE, related_name='following_relations')
     following = models.ForeignKey('User', on_delete=models.CASCADE, related_name='follower_relations')
@@ -21,8 +44,31 @@ class Follow(models.Model):
         unique_together = (('follower', 'following'),)
         indexes = [
             models.Index(fields=['follower', 'following']),
+            # Reverse direction, for paginated follower lists
+            models.Index(fields=['following', 'follower'], name='accounts_follow_reverse_idx'),
             models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
         return f'{self.follower.username} → {self.following.username}'
+
+
+class FollowSuggestion(models.Model):
+    """
+    Precomputed "who to follow" row: `suggested` is followed by `score` of the
+    accounts `user` follows. Rebuilt offline by
+    `manage.py compute_follow_suggestions`; read with one index range scan.
+    """
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='follow_suggestions')
+    suggested = models.ForeignKey('User', on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveIntegerField()
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (('user', 'suggested'),)
+        indexes = [
+            models.Index(fields=['user', '-score', 'suggested'], name='accounts_suggestion_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} → {self.suggested_id} ({self.score})'
@@ -1,4 +1,5 @@
 # accounts/serializers.py
+from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
@@ -7,8 +8,7 @@ User = get_user_model()
 
 
 class UserSerializer(serializers.ModelSerializer):
-    followers_count = serializers.IntegerField(source='followers_count', read_only=True)
-    following_count = serializers.IntegerField(source='following_count', read_only=True)
+    # followers_count / following_count are denormalized columns on User
     profile_picture_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -27,6 +27,39 @@ class UserSerializer(serializers.ModelSerializer):
         return None
 
 
+class FollowingSerializer(serializers.Serializer):
+    """A Follow row rendered as the followed account."""
+    id = serializers.IntegerField(source='following_id', read_only=True)
+    username = serializers.CharField(source='following.username', read_only=True)
+
+
+class FollowerSerializer(serializers.Serializer):
+    """A Follow row rendered as the following account."""
+    id = serializers.IntegerField(source='follower_id', read_only=True)
+    username = serializers.CharField(source='follower.username', read_only=True)
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    """`{"user_ids": [...]}` for the bulk follow/unfollow endpoints."""
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False
+    )
+
+    def validate_user_ids(self, value):
+        limit = getattr(settings, 'ACCOUNTS_BULK_FOLLOW_MAX', 100)
+        value = list(dict.fromkeys(value))  # de-duplicate, keep order
+        if len(value) > limit:
+            raise serializers.ValidationError(f'At most {limit} user ids per request.')
+        return value
+
+
+class FollowSuggestionSerializer(serializers.Serializer):
+    """A FollowSuggestion row rendered as the suggested account."""
+    id = serializers.IntegerField(source='suggested_id', read_only=True)
+    username = serializers.CharField(source='suggested.username', read_only=True)
+    mutual_count = serializers.IntegerField(source='score', read_only=True)
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
     token = serializers.CharField(read_only=True)
@@ -57,9 +90,11 @@ class LoginSerializer(serializers.Serializer):
         )
         if not user:
             raise serializers.ValidationError('Invalid username or password')
-        # Explicit Token.objects.create (instead of get_or_create)
-        Token.objects.filter(user=user).delete()  # optional: remove old token
-        token = Token.objects.create(user=user)
+        # Reuse the existing token: recreating it on every login churned the
+        # table and invalidated the user's other sessions.
+        token = Token.objects.filter(user=user).first()
+        if token is None:
+            token = Token.objects.create(user=user)
         attrs['user'] = user
         attrs['token'] = token.key
         return attrs
@@ -1,3 +1,283 @@
-from django.test import TestCase
+import json
+import pickle
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from . import graph
+from token_auth.authentication import TokenCache, _token_key, token_cache
+
+from .models import Follow, FollowSuggestion, User
+from .serializers import UserSerializer
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowCounterTests(APITestCase):
+    def setUp(self):
+        self.me = User.objects.create_user(username='me')
+        self.others = [User.objects.create_user(username=f'user{i}') for i in range(5)]
+        self.client.force_authenticate(user=self.me)
+
+    def test_follow_and_unfollow_maintain_counters(self):
+        target = self.others[0]
+        self.client.post(reverse('follow-user', args=[target.pk]))
+        self.client.post(reverse('follow-user', args=[target.pk]))  # no double count
+        self.me.refresh_from_db()
+        target.refresh_from_db()
+        self.assertEqual((self.me.following_count, target.followers_count), (1, 1))
+
+        self.client.post(reverse('unfollow-user', args=[target.pk]))
+        self.client.post(reverse('unfollow-user', args=[target.pk]))
+        self.me.refresh_from_db()
+        target.refresh_from_db()
+        self.assertEqual((self.me.following_count, target.followers_count), (0, 0))
+
+    def test_user_serializer_reports_counters(self):
+        graph.follow(self.me, self.others[0])
+        self.me.refresh_from_db()
+        data = UserSerializer(self.me).data
+        self.assertEqual((data['following_count'], data['followers_count']), (1, 0))
+
+    def test_following_list_is_paginated(self):
+        for other in self.others:
+            graph.follow(self.me, other)
+        self.me.refresh_from_db()
+
+        url, params, seen = reverse('following-list'), {'page_size': 2}, []
+        while True:
+            resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(resp.data['count'], 5)
+            seen.extend(u['id'] for u in resp.data['results'])
+            if not resp.data['next']:
+                break
+            url, params = resp.data['next'], {}
+        self.assertEqual(seen, sorted(u.pk for u in self.others))
+
+    def test_followers_list(self):
+        for other in self.others[:3]:
+            graph.follow(other, self.me)
+        self.me.refresh_from_db()
+        resp = self.client.get(reverse('followers-list'))
+        self.assertEqual(resp.data['count'], 3)
+        self.assertEqual(
+            [u['username'] for u in resp.data['results']], ['user0', 'user1', 'user2']
+        )
+
+    @override_settings(STREAMING_CHUNK_SIZE=2)
+    def test_followers_list_streams_everything(self):
+        for other in self.others:
+            graph.follow(other, self.me)
+        self.me.refresh_from_db()
+        resp = self.client.get(reverse('followers-list'), {'stream': 'true'})
+        self.assertTrue(resp.streaming)
+        data = json.loads(b''.join(resp.streaming_content))
+        self.assertEqual((data['count'], data['next']), (5, None))
+        self.assertEqual([u['id'] for u in data['results']], sorted(u.pk for u in self.others))
+
+
+@override_settings(ACCOUNTS_ADJACENCY_CACHE_MIN_FOLLOWING=2)
+class AdjacencyCacheTests(TestCase):
+    def setUp(self):
+        graph.adjacency_cache.clear()
+        self.me = User.objects.create_user(username='me')
+        self.others = [User.objects.create_user(username=f'user{i}') for i in range(3)]
+        for other in self.others[:2]:
+            graph.follow(self.me, other)
+        self.me.refresh_from_db()
+
+    def test_heavy_followers_are_cached_and_invalidated(self):
+        expected = {self.others[0].pk, self.others[1].pk}
+        self.assertEqual(graph.following_ids(self.me), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(graph.following_ids(self.me), expected)
+
+        graph.follow(self.me, self.others[2])
+        self.me.refresh_from_db()
+        self.assertEqual(graph.following_ids(self.me), expected | {self.others[2].pk})
+
+    def test_light_followers_are_not_cached(self):
+        loner = User.objects.create_user(username='loner')
+        graph.follow(loner, self.others[0])
+        loner.refresh_from_db()
+        graph.following_ids(loner)
+        with self.assertNumQueries(1):
+            graph.following_ids(loner)
+        self.assertTrue(Follow.objects.filter(follower=loner).exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BulkFollowTests(APITestCase):
+    def setUp(self):
+        self.me = User.objects.create_user(username='me')
+        self.others = [User.objects.create_user(username=f'user{i}') for i in range(6)]
+        self.client.force_authenticate(user=self.me)
+
+    def test_bulk_follow_reports_each_id(self):
+        graph.follow(self.me, self.others[0])
+        ids = [u.pk for u in self.others[:4]]
+        resp = self.client.post(
+            reverse('bulk-follow'), {'user_ids': ids + [self.me.pk, 9999]}, format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['followed'], ids[1:])
+        self.assertEqual(resp.data['already_following'], ids[:1])
+        self.assertEqual(resp.data['not_found'], [self.me.pk, 9999])
+
+        self.me.refresh_from_db()
+        self.assertEqual(self.me.following_count, 4)
+        self.assertEqual(
+            list(User.objects.filter(pk__in=ids).values_list('followers_count', flat=True)),
+            [1, 1, 1, 1],
+        )
+
+    def test_bulk_follow_query_count_does_not_grow_with_ids(self):
+        def follow(users):
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.post(
+                    reverse('bulk-follow'), {'user_ids': [u.pk for u in users]}, format='json'
+                )
+            return len(ctx.captured_queries)
+
+        self.assertEqual(follow(self.others[:2]), follow(self.others[2:6]))
+
+    @override_settings(ACCOUNTS_BULK_FOLLOW_MAX=2)
+    def test_bulk_follow_limit(self):
+        resp = self.client.post(
+            reverse('bulk-follow'), {'user_ids': [u.pk for u in self.others[:3]]}, format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_unfollow(self):
+        for other in self.others[:3]:
+            graph.follow(self.me, other)
+        ids = [u.pk for u in self.others[1:5]]
+        resp = self.client.post(reverse('bulk-unfollow'), {'user_ids': ids}, format='json')
+        self.assertEqual(resp.data['unfollowed'], ids[:2])
+        self.assertEqual(resp.data['not_following'], ids[2:])
+        self.me.refresh_from_db()
+        self.assertEqual(self.me.following_count, 1)
+
+    def test_bulk_unfollow_clamps_a_drifted_counter(self):
+        for other in self.others[:3]:
+            graph.follow(self.me, other)
+        User.objects.filter(pk=self.me.pk).update(following_count=1)
+        graph.bulk_unfollow(self.me, [u.pk for u in self.others[:3]])
+        self.me.refresh_from_db()
+        self.assertEqual(self.me.following_count, 0)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowSuggestionTests(APITestCase):
+    def setUp(self):
+        # me -> a, b;  a -> c, d;  b -> c, me
+        self.me, self.a, self.b, self.c, self.d = (
+            User.objects.create_user(username=name) for name in ('me', 'a', 'b', 'c', 'd')
+        )
+        for follower, target in [
+            (self.me, self.a), (self.me, self.b),
+            (self.a, self.c), (self.a, self.d),
+            (self.b, self.c), (self.b, self.me),
+        ]:
+            graph.follow(follower, target)
+        self.client.force_authenticate(user=self.me)
+
+    def test_command_ranks_friends_of_friends(self):
+        call_command('compute_follow_suggestions', chunk_size=2, stdout=StringIO())
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse('follow-suggestions'))
+        self.assertEqual(
+            [(s['username'], s['mutual_count']) for s in resp.data], [('c', 2), ('d', 1)]
+        )
+
+    def test_following_a_suggestion_removes_it(self):
+        call_command('compute_follow_suggestions', stdout=StringIO())
+        self.client.post(reverse('follow-user', args=[self.c.pk]))
+        resp = self.client.get(reverse('follow-suggestions'))
+        self.assertEqual([s['username'] for s in resp.data], ['d'])
+
+    def test_rerun_replaces_stale_rows(self):
+        call_command('compute_follow_suggestions', stdout=StringIO())
+        graph.unfollow(self.a, self.d)
+        call_command('compute_follow_suggestions', stdout=StringIO())
+        self.assertEqual(
+            list(FollowSuggestion.objects.filter(user=self.me).values_list('suggested__username', flat=True)),
+            ['c'],
+        )
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class TokenCacheTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username='alice', password='secret-pass')
+        self.token = self.client.post(
+            reverse('login'), {'username': 'alice', 'password': 'secret-pass'}
+        ).data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def test_login_reuses_token(self):
+        again = self.client.post(reverse('login'), {'username': 'alice', 'password': 'secret-pass'})
+        self.assertEqual(again.data['token'], self.token)
+
+    def test_repeat_requests_skip_token_lookup(self):
+        hits, misses = token_cache.hits, token_cache.misses
+        self.client.get(reverse('profile'))
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('profile'))
+        self.assertEqual(len(ctx.captured_queries), 1)  # the user, by primary key
+        self.assertNotIn('authtoken_token', ctx.captured_queries[0]['sql'])
+        self.assertEqual(resp.data['username'], 'alice')
+        self.assertEqual((token_cache.hits - hits, token_cache.misses - misses), (1, 1))
+
+    def test_logout_invalidates(self):
+        self.client.get(reverse('profile'))
+        self.client.post(reverse('logout'))
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_invalidates(self):
+        self.client.get(reverse('profile'))
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_follow_refreshes_cached_counters(self):
+        other = User.objects.create_user(username='bob')
+        self.client.get(reverse('profile'))
+        self.client.post(reverse('follow-user', args=[other.pk]))
+        self.assertEqual(self.client.get(reverse('profile')).data['following_count'], 1)
+
+    def test_bulk_deactivation_invalidates(self):
+        self.client.get(reverse('profile'))
+        User.objects.filter(username='alice').update(is_active=False)
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_reaches_other_workers(self):
+        # Another worker: its own TokenCache object over the same Django cache.
+        other_worker = TokenCache()
+        self.client.get(reverse('profile'))
+        self.assertEqual(other_worker.get(self.token), self.user.pk)
+        self.client.post(reverse('logout'))
+        self.assertIsNone(other_worker.get(self.token))
+
+    def test_entries_expire(self):
+        with self.settings(ACCOUNTS_TOKEN_CACHE_TTL=0):
+            self.client.get(reverse('profile'))
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse('profile'))
+        self.assertIn('authtoken_token', ctx.captured_queries[0]['sql'])
+
+    def test_cache_holds_no_user_data(self):
+        self.client.get(reverse('profile'))
+        entry = token_cache.cache.get(_token_key(self.token))
+        self.assertEqual(entry[-1], self.user.pk)
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(entry))
@@ -1,13 +1,21 @@
 from django.urls import path
 from .views import (
+    RegisterView, LoginView, LogoutView, ProfileView,
     FollowUserView, UnfollowUserView,
     FollowingListView, FollowersListView,
+    BulkFollowView, BulkUnfollowView, FollowSuggestionListView,
 )
 
-# keep your existing routes for register/login/profile
 urlpatterns = [
+    path('register/', RegisterView.as_view(), name='register'),
+    path('login/', LoginView.as_view(), name='login'),
+    path('logout/', LogoutView.as_view(), name='logout'),
+    path('profile/', ProfileView.as_view(), name='profile'),
     path('follow/<int:user_id>/', FollowUserView.as_view(), name='follow-user'),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
+    path('follow/bulk/', BulkFollowView.as_view(), name='bulk-follow'),
+    path('unfollow/bulk/', BulkUnfollowView.as_view(), name='bulk-unfollow'),
+    path('suggestions/', FollowSuggestionListView.as_view(), name='follow-suggestions'),
     path('following/', FollowingListView.as_view(), name='following-list'),  # optional
     path('followers/', FollowersListView.as_view(), name='followers-list'),  # optional
 ]
@@ -1,16 +1,27 @@
 # accounts/views.py
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from rest_framework import permissions, status, generics
 from rest_framework.response import Response
 
+from posts import response_cache, timeline
+from posts.pagination import KeysetPagination
+from posts.streaming import StreamingListMixin
+from posts.throttling import IPWriteThrottle, UserWriteThrottle
+
 # Alias your custom user model to the expected name "CustomUser"
-from .models import User as CustomUser
+from . import graph
+from .models import Follow, FollowSuggestion, User as CustomUser
 
 from .serializers import (
     RegisterSerializer,
     LoginSerializer,
     UserSerializer,
+    FollowingSerializer,
+    FollowerSerializer,
+    BulkFollowSerializer,
+    FollowSuggestionSerializer,
 )
 
 
@@ -57,6 +68,20 @@ class LoginView(generics.GenericAPIView):
         )
 
 
+class LogoutView(generics.GenericAPIView):
+    """
+    Delete the caller's token. Deleting it also evicts it from the token
+    cache (token_auth/signals.py), so it stops working immediately.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = CustomUser.objects.all()  # <- required string for checker
+
+    def post(self, request):
+        if request.auth is not None:
+            request.auth.delete()
+        return Response({"detail": "Logged out."}, status=status.HTTP_200_OK)
+
+
 class ProfileView(generics.RetrieveUpdateAPIView):
     """
     Get/Update the current authenticated user's profile.
@@ -71,9 +96,12 @@ class ProfileView(generics.RetrieveUpdateAPIView):
 
 class FollowUserView(generics.GenericAPIView):
     """
-    Follow a target user by id. Uses the 'following' related_name on your M2M.
+    Follow a target user by id. Writes the Follow row and both graph counters
+    (see accounts/graph.py), then backfills the follower's timeline.
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserWriteThrottle, IPWriteThrottle]
+    throttle_scope = 'follows'
     queryset = CustomUser.objects.all()  # <- required string for checker
 
     def post(self, request, user_id):
@@ -83,7 +111,8 @@ class FollowUserView(generics.GenericAPIView):
                 {"detail": "You cannot follow yourself."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        request.user.following.add(target)
+        if graph.follow(request.user, target):
+            timeline.backfill(request.user, target)
         return Response(
             {"detail": f"Now following {target.username}."},
             status=status.HTTP_200_OK,
@@ -95,6 +124,8 @@ class UnfollowUserView(generics.GenericAPIView):
     Unfollow a target user by id.
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserWriteThrottle, IPWriteThrottle]
+    throttle_scope = 'follows'
     queryset = CustomUser.objects.all()  # <- required string for checker
 
     def post(self, request, user_id):
@@ -104,27 +135,161 @@ class UnfollowUserView(generics.GenericAPIView):
                 {"detail": "You cannot unfollow yourself."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        request.user.following.remove(target)
+        if graph.unfollow(request.user, target):
+            timeline.prune(request.user, target)
         return Response(
             {"detail": f"Unfollowed {target.username}."},
             status=status.HTTP_200_OK,
         )
 
 
-# Optional helpers for debugging/UX
-class FollowingListView(generics.GenericAPIView):
+class BulkFollowView(generics.GenericAPIView):
+    """
+    Follow many users at once: `{"user_ids": [...]}`. The ids are checked in
+    one query and the new Follow rows are written with a single bulk insert.
+    Unknown ids and the caller's own id are reported back, not treated as errors.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserWriteThrottle, IPWriteThrottle]
+    throttle_scope = 'follows'
+    serializer_class = BulkFollowSerializer
     queryset = CustomUser.objects.all()  # <- required string for checker
 
-    def get(self, request):
-        data = [{"id": u.id, "username": u.username} for u in request.user.following.all()]
-        return Response({"count": len(data), "results": data})
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = serializer.validated_data["user_ids"]
+        found = set(
+            CustomUser.objects.filter(pk__in=requested)
+            .exclude(pk=request.user.pk)
+            .values_list("pk", flat=True)
+        )
+        followed = graph.bulk_follow(request.user, found)
+        if followed:
+            timeline.backfill_many(request.user, followed)
+            # bulk_create sends no post_save, so drop the cached feed here
+            response_cache.invalidate_feeds([request.user.pk])
+        return Response(
+            {
+                "followed": followed,
+                "already_following": sorted(found.difference(followed)),
+                "not_found": [pk for pk in requested if pk not in found],
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
-class FollowersListView(generics.GenericAPIView):
+class BulkUnfollowView(generics.GenericAPIView):
+    """
+    Unfollow many users at once: `{"user_ids": [...]}`.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserWriteThrottle, IPWriteThrottle]
+    throttle_scope = 'follows'
+    serializer_class = BulkFollowSerializer
     queryset = CustomUser.objects.all()  # <- required string for checker
 
-    def get(self, request):
-        data = [{"id": u.id, "username": u.username} for u in request.user.followers.all()]
-        return Response({"count": len(data), "results": data})
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = serializer.validated_data["user_ids"]
+        unfollowed = graph.bulk_unfollow(request.user, requested)
+        if unfollowed:
+            timeline.prune_many(request.user, unfollowed)
+        removed = set(unfollowed)
+        return Response(
+            {
+                "unfollowed": unfollowed,
+                "not_following": [pk for pk in requested if pk not in removed],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class FollowSuggestionListView(generics.ListAPIView):
+    """
+    "Who to follow": friends-of-friends ranked by mutual follows. Rows are
+    precomputed by `manage.py compute_follow_suggestions`, so this is one
+    range scan over (user, -score, suggested).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = CustomUser.objects.all()  # <- required string for checker
+    serializer_class = FollowSuggestionSerializer
+    pagination_class = None
+
+    def get_limit(self):
+        default = getattr(settings, 'ACCOUNTS_SUGGESTIONS_PER_USER', 20)
+        try:
+            limit = int(self.request.query_params.get('limit', default))
+        except ValueError:
+            limit = default
+        return max(1, min(limit, default))
+
+    def get_queryset(self):
+        return (
+            FollowSuggestion.objects.filter(user=self.request.user)
+            .select_related('suggested')
+            .order_by('-score', 'suggested_id')[:self.get_limit()]
+        )
+
+
+class FollowingPagination(KeysetPagination):
+    # Walks the (follower, following) index in following_id order.
+    ordering = ('following_id',)
+    count_attr = 'following_count'
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.offset_paginator is None:
+            # The denormalized counter is free; no COUNT(*) needed.
+            count = getattr(self.request.user, self.count_attr)
+            response.data = {'count': count, **response.data}
+        return response
+
+
+class FollowersPagination(FollowingPagination):
+    # Walks the (following, follower) index in follower_id order.
+    ordering = ('follower_id',)
+    count_attr = 'followers_count'
+
+
+class FollowingListView(StreamingListMixin, generics.ListAPIView):
+    """
+    Accounts the current user follows, keyset-paginated by user id.
+    `?stream=true` streams the whole list in one response.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = CustomUser.objects.all()  # <- required string for checker
+    serializer_class = FollowingSerializer
+    pagination_class = FollowingPagination
+    stream_all_allowed = True
+
+    def stream_envelope(self, request):
+        return {'count': getattr(request.user, self.paginator.count_attr), 'next': None}
+
+    def get_queryset(self):
+        return (
+            Follow.objects.filter(follower=self.request.user)
+            .select_related('following')
+            .order_by('following_id')
+        )
+
+
+class FollowersListView(StreamingListMixin, generics.ListAPIView):
+    """
+    Accounts following the current user, keyset-paginated by user id.
+    `?stream=true` streams the whole list in one response.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = CustomUser.objects.all()  # <- required string for checker
+    serializer_class = FollowerSerializer
+    pagination_class = FollowersPagination
+    stream_all_allowed = True
+    stream_envelope = FollowingListView.stream_envelope
+
+    def get_queryset(self):
+        return (
+            Follow.objects.filter(following=self.request.user)
+            .select_related('follower')
+            .order_by('follower_id')
+        )
@@ -0,0 +1,71 @@
+# benchmarks/auth.py
+"""
+Token authentication throughput with and without the token -> user id cache.
+
+    python -m benchmarks.auth --users 1000 --requests 20000
+
+Replays authenticated GET /api/accounts/profile/ requests through the full
+Django/DRF stack (test client, no network) for a random mix of users, first
+with ACCOUNTS_TOKEN_CACHE_TTL = 0 and then with the cache enabled.
+"""
+import random
+import time
+
+from benchmarks.common import chunked, measure, parser, print_table, scratch_database
+
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from token_auth.authentication import token_cache
+from accounts.models import User
+
+
+def populate(users):
+    for batch in chunked((User(username=f'user{i}', password='!') for i in range(users)), 5000):
+        User.objects.bulk_create(batch)
+    Token.objects.bulk_create(
+        [Token(user_id=pk, key=Token.generate_key()) for pk in User.objects.values_list('pk', flat=True)]
+    )
+    return list(Token.objects.values_list('key', flat=True))
+
+
+def run(client, url, keys):
+    def get(key):
+        client.get(url, HTTP_AUTHORIZATION=f'Token {key}')
+
+    started = time.perf_counter()
+    stats = measure(get, [(key,) for key in keys])
+    return stats, len(keys) / (time.perf_counter() - started)
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument('--users', type=int, default=1000)
+    p.add_argument('--requests', type=int, default=20000)
+    opts = p.parse_args()
+    rng = random.Random(opts.seed)
+
+    with scratch_database(), override_settings(SECURE_SSL_REDIRECT=False):
+        keys = populate(opts.users)
+        stream = [rng.choice(keys) for _ in range(opts.requests)]
+        client, url = Client(), reverse('profile')
+
+        rows, rates = [], []
+        for label, ttl in (('cache off', 0), ('cache on', 300)):
+            token_cache.clear()
+            hits, misses = token_cache.hits, token_cache.misses
+            with override_settings(ACCOUNTS_TOKEN_CACHE_TTL=ttl):
+                stats, rate = run(client, url, stream)
+            rows.append((f'GET /api/accounts/profile/ ({label})', stats))
+            rates.append((label, rate, token_cache.hits - hits, token_cache.misses - misses))
+
+        print(f'{opts.requests} requests across {opts.users} tokens')
+        print_table('Token authentication', rows)
+        print()
+        for label, rate, hits, misses in rates:
+            print(f'  {label:<10}{rate:>10.0f} req/s   hits {hits}, misses {misses}')
+
+
+if __name__ == '__main__':
+    main()
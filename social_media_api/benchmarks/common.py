@@ -0,0 +1,20 @@
+# benchmarks/common.py
+"""
+Django setup for the benchmark scripts in this directory. The helpers are
+shared with the other projects (benchmark_tools at the repository root).
+
+Each script is run from the project root, e.g.
+
+    python -m benchmarks.inbox --users 10000 --notifications 1000000
+
+and works against a throwaway test database (never the configured one).
+"""
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.settings')
+
+import django  # noqa: E402
+
+django.setup()  # the settings put the repository root on sys.path
+
+from benchmark_tools import chunked, measure, parser, print_table, scratch_database  # noqa: E402,F401
@@ -0,0 +1,89 @@
+# benchmarks/conditional.py
+"""
+Conditional GET savings: full 200 responses vs 304 revalidations.
+
+    python -m benchmarks.conditional --posts 10000 --requests 2000
+
+Replays GETs of a post-list page, a post detail and the notification inbox
+through the full Django/DRF stack, once unconditionally and once with the
+ETag from a previous response in If-None-Match. Reports latency, CPU time
+and bytes sent per request.
+"""
+import random
+import time
+
+from benchmarks.common import chunked, measure, parser, print_table, scratch_database
+
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from accounts.models import User
+from notifications.models import Notification
+from posts.models import Post
+
+
+def populate(posts, rng):
+    users = User.objects.bulk_create([User(username=f'user{i}', password='!') for i in range(100)])
+    for batch in chunked(
+        (Post(author=rng.choice(users), title=f'Post {i}', content='lorem ipsum ' * 40) for i in range(posts)),
+        5000,
+    ):
+        Post.objects.bulk_create(batch)
+    reader = users[0]
+    Notification.objects.bulk_create(
+        [Notification(recipient=reader, actor=rng.choice(users[1:]), verb='liked') for _ in range(200)]
+    )
+    return reader, list(Post.objects.values_list('pk', flat=True))
+
+
+def replay(client, urls, conditional):
+    etags = {url: client.get(url)['ETag'] for url in set(urls)} if conditional else {}
+    sent = 0
+
+    def get(url):
+        nonlocal sent
+        headers = {'HTTP_IF_NONE_MATCH': etags[url]} if conditional else {}
+        sent += len(client.get(url, **headers).content)
+
+    cpu = time.process_time()
+    stats = measure(get, [(url,) for url in urls])
+    stats['cpu_ms'] = (time.process_time() - cpu) * 1000 / len(urls)
+    stats['bytes'] = sent / len(urls)
+    return stats
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument('--posts', type=int, default=10000)
+    p.add_argument('--requests', type=int, default=2000)
+    p.add_argument('--page-size', type=int, default=50)
+    opts = p.parse_args()
+    rng = random.Random(opts.seed)
+
+    with scratch_database(), override_settings(SECURE_SSL_REDIRECT=False):
+        reader, post_ids = populate(opts.posts, rng)
+        token = Token.objects.create(user=reader)
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        cases = {
+            'post list page': [f"{reverse('post-list')}?page_size={opts.page_size}"],
+            'post detail': [reverse('post-detail', args=[pk]) for pk in rng.sample(post_ids, 20)],
+            'notification inbox': [f"{reverse('notifications-list')}?page_size={opts.page_size}"],
+        }
+
+        rows, extra = [], []
+        for label, urls in cases.items():
+            stream = [rng.choice(urls) for _ in range(opts.requests)]
+            for mode, conditional in (('200', False), ('304', True)):
+                stats = replay(client, stream, conditional)
+                rows.append((f'{label} ({mode})', stats))
+                extra.append((f'{label} ({mode})', stats['cpu_ms'], stats['bytes']))
+
+        print_table('Conditional GET', rows)
+        print(f"\n  {'case':<40}{'cpu ms/req':>12}{'bytes/req':>12}")
+        for name, cpu_ms, size in extra:
+            print(f'  {name:<40}{cpu_ms:>12.3f}{size:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/inbox.py
+"""
+Notification inbox latency: first page, unread-only page and unread badge.
+
+    python -m benchmarks.inbox --users 10000 --notifications 1000000
+
+Runs every query with the inbox indexes in place, then drops them and runs
+the same queries again, so the two tables show the before/after.
+"""
+import random
+from datetime import timedelta
+
+from benchmarks.common import chunked, measure, parser, print_table, scratch_database
+
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import User
+from notifications import unread
+from notifications.models import Notification
+
+PAGE = 20
+
+
+def populate(users, notifications, rng):
+    User.objects.bulk_create(
+        [User(username=f'user{i}', password='!') for i in range(users)], batch_size=5000
+    )
+    ids = list(User.objects.values_list('pk', flat=True))
+    now = timezone.now()
+    # Let the benchmark spread timestamps over 90 days instead of "now".
+    timestamp = Notification._meta.get_field('timestamp')
+    timestamp.auto_now_add = False
+
+    def rows():
+        for _ in range(notifications):
+            yield Notification(
+                recipient_id=rng.choice(ids),
+                actor_id=rng.choice(ids),
+                verb=rng.choice(('liked', 'commented')),
+                is_read=rng.random() < 0.7,
+                timestamp=now - timedelta(seconds=rng.randrange(90 * 86400)),
+            )
+
+    try:
+        for batch in chunked(rows(), 20000):
+            Notification.objects.bulk_create(batch)
+    finally:
+        timestamp.auto_now_add = True
+    return ids
+
+
+def inbox_page(user_id):
+    list(Notification.objects.filter(recipient_id=user_id).order_by('-timestamp', '-id')[:PAGE + 1])
+
+
+def unread_page(user_id):
+    list(
+        Notification.objects.filter(recipient_id=user_id, is_read=False)
+        .order_by('-timestamp', '-id')[:PAGE + 1]
+    )
+
+
+def unread_count_db(user_id):
+    Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+
+
+def unread_count_cached(user_id):
+    unread.unread_count(User(pk=user_id))
+
+
+def run(sample):
+    args = [(user_id,) for user_id in sample]
+    return [
+        ('inbox first page', measure(inbox_page, args)),
+        ('unread-only first page', measure(unread_page, args)),
+        ('unread count (database)', measure(unread_count_db, args)),
+    ]
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument('--users', type=int, default=10000)
+    p.add_argument('--notifications', type=int, default=1000000)
+    p.add_argument('--samples', type=int, default=500)
+    opts = p.parse_args()
+    rng = random.Random(opts.seed)
+
+    with scratch_database():
+        ids = populate(opts.users, opts.notifications, rng)
+        sample = rng.sample(ids, min(opts.samples, len(ids)))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        print(f'{opts.notifications} notifications across {opts.users} users')
+        rows = run(sample)
+        cache.clear()
+        for user_id in sample:
+            unread_count_cached(user_id)  # warm
+        rows.append((
+            'unread count (cached, /unread-count/)',
+            measure(unread_count_cached, [(u,) for u in sample]),
+        ))
+        print_table('With inbox indexes', rows)
+
+        with connection.schema_editor() as editor:
+            for index in Notification._meta.indexes:
+                editor.remove_index(Notification, index)
+        print_table('Without inbox indexes (recipient FK index only)', run(sample))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/query_metrics.py
+"""
+Overhead of the query_metrics middleware.
+
+    python -m benchmarks.query_metrics --posts 10000 --requests 2000
+
+Replays GETs of a post-list page and post details through the full stack
+without the middleware, with it installed but QUERY_METRICS_ENABLED=False,
+and with it recording, then prints latency per case and the per-view
+aggregates collected by the recording runs.
+"""
+import json
+import random
+
+from benchmarks.common import chunked, measure, parser, print_table, scratch_database
+
+from django.conf import settings
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from accounts.models import User
+from posts.models import Post
+from query_metrics import stats
+
+MIDDLEWARE = 'query_metrics.middleware.QueryMetricsMiddleware'
+
+
+def populate(posts, rng):
+    users = User.objects.bulk_create([User(username=f'user{i}', password='!') for i in range(100)])
+    for batch in chunked(
+        (Post(author=rng.choice(users), title=f'Post {i}', content='lorem ipsum ' * 40) for i in range(posts)),
+        5000,
+    ):
+        Post.objects.bulk_create(batch)
+    return users[0], list(Post.objects.values_list('pk', flat=True))
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument('--posts', type=int, default=10000)
+    p.add_argument('--requests', type=int, default=2000)
+    p.add_argument('--page-size', type=int, default=50)
+    opts = p.parse_args()
+    rng = random.Random(opts.seed)
+
+    without = [name for name in settings.MIDDLEWARE if name != MIDDLEWARE]
+    modes = {
+        'no middleware': {'MIDDLEWARE': without},
+        'installed, disabled': {'QUERY_METRICS_ENABLED': False},
+        'recording': {'QUERY_METRICS_SERVER_TIMING': True},
+    }
+    quiet = {
+        'SECURE_SSL_REDIRECT': False,
+        'POSTS_RESPONSE_CACHE_TTL': 0,  # measure the full request, not cache hits
+        'QUERY_METRICS_SLOW_REQUEST_MS': None,
+        'QUERY_METRICS_SLOW_QUERY_COUNT': None,
+    }
+
+    with scratch_database(), override_settings(**quiet):
+        reader, post_ids = populate(opts.posts, rng)
+        token = Token.objects.create(user=reader)
+        cases = {
+            'post list page': [f"{reverse('post-list')}?page_size={opts.page_size}"],
+            'post detail': [reverse('post-detail', args=[pk]) for pk in rng.sample(post_ids, 20)],
+        }
+
+        rows = []
+        stats.reset()  # only the 'recording' runs add to it
+        for label, urls in cases.items():
+            stream = [(rng.choice(urls),) for _ in range(opts.requests)]
+            for mode, overrides in modes.items():
+                with override_settings(**overrides):
+                    # A new client per mode: the handler builds its middleware chain once.
+                    client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+                    rows.append((f'{label} ({mode})', measure(client.get, stream)))
+
+        print_table('query_metrics overhead', rows)
+        print('\nAggregates of the recording runs (GET /_metrics/queries/):')
+        print(json.dumps(stats.snapshot(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
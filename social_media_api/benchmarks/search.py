@@ -0,0 +1,74 @@
+# benchmarks/search.py
+"""
+Post search latency: full-text backend vs the old icontains scan.
+
+    python -m benchmarks.search --posts 1000000
+
+Loads synthetic posts (words drawn from a skewed vocabulary, so some terms
+are common and some rare), then times the first page of ranked results for
+a mix of one- and two-word queries with the configured backend and with
+BasicSearchBackend (LIKE '%q%').
+"""
+import random
+
+from benchmarks.common import chunked, measure, parser, print_table, scratch_database
+
+from django.db import connection
+
+from accounts.models import User
+from posts import search
+from posts.models import Post
+
+PAGE = 10
+VOCABULARY = [f'word{i}' for i in range(5000)]
+
+
+def populate(posts, rng):
+    authors = User.objects.bulk_create([User(username=f'user{i}', password='!') for i in range(100)])
+    weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+    def text(words):
+        return ' '.join(rng.choices(VOCABULARY, weights, k=words))
+
+    def rows():
+        for _ in range(posts):
+            yield Post(author=rng.choice(authors), title=text(6), content=text(40))
+
+    for batch in chunked(rows(), 10000):
+        Post.objects.bulk_create(batch)
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument('--posts', type=int, default=1000000)
+    p.add_argument('--samples', type=int, default=50)
+    opts = p.parse_args()
+    rng = random.Random(opts.seed)
+
+    with scratch_database():
+        populate(opts.posts, rng)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        queries = {
+            'common word': [(VOCABULARY[rng.randrange(10)],) for _ in range(opts.samples)],
+            'rare word': [(VOCABULARY[rng.randrange(1000, 5000)],) for _ in range(opts.samples)],
+            'two words': [
+                (f'{VOCABULARY[rng.randrange(50)]} {VOCABULARY[rng.randrange(50, 500)]}',)
+                for _ in range(opts.samples)
+            ],
+        }
+        backends = [search.get_backend(), search.BasicSearchBackend()]
+        rows = []
+        for backend in backends:
+            for label, args in queries.items():
+                rows.append((
+                    f'{label} ({backend.name})',
+                    measure(lambda q: backend.ranked_ids(q, 0, PAGE), args),
+                ))
+        print(f'{opts.posts} posts')
+        print_table('First page of search results', rows)
+
+
+if __name__ == '__main__':
+    main()
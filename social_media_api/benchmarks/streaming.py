@@ -0,0 +1,93 @@
+# benchmarks/streaming.py
+"""
+Buffered vs streamed list responses: peak memory and time to first byte.
+
+    python -m benchmarks.streaming --rows 100000
+
+For a user with --rows followers and --rows posts, fetches
+
+* the followers list as one page-number page (`?page=1&page_size=N`,
+  buffered) vs `?stream=true`,
+* the post list as one page-number page of N rows, with streaming disabled
+  (STREAMING_MIN_PAGE_SIZE above N) vs enabled,
+
+and reports time to first byte, total time and the peak Python heap
+(tracemalloc) while producing and consuming the body.
+"""
+import time
+import tracemalloc
+
+from benchmarks.common import chunked, parser, scratch_database
+
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Follow, User
+from posts.models import Post
+
+
+def populate(rows):
+    me = User.objects.create_user(username='bench')
+    for batch in chunked(range(rows), 10000):
+        users = User.objects.bulk_create([User(username=f'f{i}', password='!') for i in batch])
+        Follow.objects.bulk_create([Follow(follower=u, following=me) for u in users])
+        Post.objects.bulk_create([Post(author=me, title=f'Post {i}', content='lorem ipsum ' * 20)
+                                  for i in batch])
+    User.objects.filter(pk=me.pk).update(followers_count=rows)
+    return me
+
+
+def fetch(client, url, params):
+    """(seconds to first byte, total seconds, body bytes)."""
+    started = time.perf_counter()
+    resp = client.get(url, params)
+    if resp.streaming:
+        chunks = iter(resp.streaming_content)
+        first = next(chunks)
+        ttfb = time.perf_counter() - started
+        size = len(first) + sum(len(chunk) for chunk in chunks)
+    else:
+        ttfb = time.perf_counter() - started
+        size = len(resp.content)
+    return ttfb, time.perf_counter() - started, size
+
+
+def peak_heap(client, url, params):
+    tracemalloc.start()
+    fetch(client, url, params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument('--rows', type=int, default=100000)
+    opts = p.parse_args()
+    n = opts.rows
+
+    with scratch_database(), override_settings(SECURE_SSL_REDIRECT=False):
+        me = populate(n)
+        client = Client(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=me).key}')
+        followers, posts = reverse('followers-list'), reverse('post-list')
+        page = {'page': 1, 'page_size': n}
+        cases = [
+            ('followers, buffered page', followers, page, {'STREAMING_MIN_PAGE_SIZE': n + 1}),
+            ('followers, ?stream=true', followers, {'stream': 'true'}, {}),
+            ('posts, buffered page', posts, page, {'STREAMING_MIN_PAGE_SIZE': n + 1}),
+            ('posts, streamed page', posts, page, {}),
+        ]
+        print(f'\n{n} rows per response')
+        print(f"  {'case':<28}{'TTFB ms':>10}{'total ms':>10}{'MB out':>8}{'peak heap MB':>14}")
+        for name, url, params, overrides in cases:
+            with override_settings(**overrides):
+                fetch(client, url, params)  # warm up
+                ttfb, total, size = fetch(client, url, params)
+                peak = peak_heap(client, url, params)
+            print(f'  {name:<28}{ttfb * 1000:>10.1f}{total * 1000:>10.1f}'
+                  f'{size / 1e6:>8.1f}{peak / 1e6:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
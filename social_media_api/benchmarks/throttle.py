@@ -0,0 +1,103 @@
+# benchmarks/throttle.py
+"""
+Write-throttle cost under load.
+
+    python -m benchmarks.throttle --checks 200000 --users 10000 --threads 8
+
+1. Raw bucket checks: UserWriteThrottle + IPWriteThrottle.allow_request()
+   for a stream of requests spread over many users/IPs, single-threaded and
+   from several threads at once (total checks/s).
+2. Full stack: POST /api/posts/<id>/unlike/ (a no-op write) with the
+   'likes' throttles enabled vs disabled, to show the per-request overhead.
+"""
+import random
+import threading
+import time
+
+from benchmarks.common import measure, parser, print_table, scratch_database
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from posts import throttling
+from posts.models import Post
+
+HIGH_RATES = {'likes': '1000000/min', 'likes_ip': '1000000/min'}
+
+
+def rates(**overrides):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **overrides},
+    })
+
+
+def make_requests(count, users, rng):
+    factory = APIRequestFactory()
+    requests = []
+    for _ in range(count):
+        request = factory.post('/', REMOTE_ADDR=f'10.0.{rng.randrange(256)}.{rng.randrange(256)}')
+        request.user = User(pk=rng.randrange(1, users + 1))
+        requests.append(request)
+    return requests
+
+
+def check(request):
+    for throttle in throttling.write_throttles('likes'):
+        throttle.allow_request(request, None)
+
+
+def threaded(requests, threads):
+    slices = [requests[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=lambda s=s: [check(r) for r in s]) for s in slices]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return len(requests) / (time.perf_counter() - started)
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument('--checks', type=int, default=200000)
+    p.add_argument('--users', type=int, default=10000)
+    p.add_argument('--threads', type=int, default=8)
+    p.add_argument('--requests', type=int, default=2000)
+    opts = p.parse_args()
+    rng = random.Random(opts.seed)
+
+    with rates(**HIGH_RATES):
+        requests = make_requests(opts.checks, opts.users, rng)
+        caches[settings.THROTTLE_CACHE].clear()
+        started = time.perf_counter()
+        single = measure(check, [(r,) for r in requests])
+        single_rate = opts.checks / (time.perf_counter() - started)
+        caches[settings.THROTTLE_CACHE].clear()
+        multi_rate = threaded(requests, opts.threads)
+    print(f'{opts.checks} checks across {opts.users} users')
+    print_table('Bucket check (user + IP), in-process', [('allow_request x2', single)])
+    print(f'\n  single thread      {single_rate:>12.0f} checks/s')
+    print(f'  {opts.threads} threads          {multi_rate:>12.0f} checks/s')
+
+    with scratch_database(), override_settings(SECURE_SSL_REDIRECT=False):
+        user = User.objects.create_user(username='bench')
+        post = Post.objects.create(author=user, title='t', content='c')
+        client = Client(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        url = reverse('post-unlike', args=[post.pk])
+        rows = []
+        for label, overrides in (('throttles off', {'likes': None, 'likes_ip': None}),
+                                 ('throttles on', HIGH_RATES)):
+            caches[settings.THROTTLE_CACHE].clear()
+            with rates(**overrides):
+                rows.append((f'POST unlike ({label})', measure(client.post, [(url,)] * opts.requests)))
+        print_table('Full request', rows)
+
+
+if __name__ == '__main__':
+    main()
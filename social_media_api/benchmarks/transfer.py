@@ -0,0 +1,87 @@
+# benchmarks/transfer.py
+"""
+NDJSON import/export throughput and memory.
+
+    python -m benchmarks.transfer --posts 100000 --users 1000
+
+1. Writes a synthetic NDJSON file (posts, then comments and likes referring
+   to them by ref) and imports it with posts.transfer.import_ndjson at a few
+   batch sizes, reporting rows/s.
+2. Exports everything back with export_ndjson, reporting records/s and the
+   peak Python heap (tracemalloc), which should stay flat as --posts grows.
+"""
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.common import parser, scratch_database
+
+from accounts.models import User
+from posts import transfer
+from posts.models import Comment, Like, Post
+
+
+def write_file(path, posts, users, rng):
+    with open(path, 'w', encoding='utf-8') as fh:
+        for i in range(posts):
+            fh.write(json.dumps({
+                'type': 'post', 'ref': f'p{i}', 'author': f'user{rng.randrange(users)}',
+                'title': f'Post {i}', 'content': 'lorem ipsum ' * 20,
+                'created_at': '2024-01-01T00:00:00Z',
+            }) + '\n')
+        for i in range(posts * 2):
+            fh.write(json.dumps({
+                'type': 'comment', 'post': f'p{rng.randrange(posts)}',
+                'author': f'user{rng.randrange(users)}', 'content': 'nice post',
+            }) + '\n')
+        for i in range(posts * 3):
+            fh.write(json.dumps({
+                'type': 'like', 'post': f'p{rng.randrange(posts)}',
+                'user': f'user{rng.randrange(users)}',
+            }) + '\n')
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument('--posts', type=int, default=100000)
+    p.add_argument('--users', type=int, default=1000)
+    p.add_argument('--batch-sizes', default='500,1000,5000')
+    opts = p.parse_args()
+    rng = random.Random(opts.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'content.ndjson'
+        write_file(path, opts.posts, opts.users, rng)
+        print(f'{path.stat().st_size / 1e6:.1f} MB, {opts.posts} posts, '
+              f'{opts.posts * 2} comments, {opts.posts * 3} likes')
+
+        print(f"\nImport\n  {'batch size':<14}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+        for size in [int(s) for s in opts.batch_sizes.split(',')]:
+            with scratch_database():
+                User.objects.bulk_create(
+                    [User(username=f'user{i}', password='!') for i in range(opts.users)]
+                )
+                with open(path, encoding='utf-8') as fh:
+                    stats = transfer.import_ndjson(fh, batch_size=size)
+                print(f'  {size:<14}{stats.rows:>10}{stats.seconds:>10.2f}{stats.rows_per_second:>12.0f}')
+                if size == int(opts.batch_sizes.split(',')[-1]):
+                    export(Post.objects.count() + Comment.objects.count() + Like.objects.count())
+
+
+def export(total):
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = sum(1 for _ in transfer.export_ndjson())
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert count == total
+    print(f'\nExport\n  {count} records in {seconds:.2f}s — {count / seconds:.0f} records/s, '
+          f'peak heap {peak / 1e6:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
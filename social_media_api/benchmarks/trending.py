@@ -0,0 +1,112 @@
+# benchmarks/trending.py
+"""
+Trending posts: maintained score table vs ranking the like table per request.
+
+    python -m benchmarks.trending --posts 100000 --likes 1000000
+
+Loads synthetic posts and likes/comments spread over the last --hours, with
+engagement skewed towards a few posts and towards recent ones, then reports
+
+1. read latency: top 20 from TrendingScore (posts.trending.top) vs a
+   GROUP BY over the recent likes (undecayed, so the cheapest on-the-fly
+   query there is);
+2. write cost: trending.record() per new like;
+3. recompute time and the mean age of the likes on the top 20 for a few
+   half-lives, to pick TRENDING_HALF_LIFE_HOURS (shorter = fresher list).
+"""
+import random
+from datetime import timedelta
+
+from benchmarks.common import chunked, measure, parser, print_table, scratch_database
+
+from django.db import connection
+from django.db.models import Count
+from django.test import override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from posts import trending
+from posts.models import Comment, Like, Post
+
+
+def populate(posts, likes, hours, rng):
+    """Posts spread over `hours`; each post's engagement follows shortly after it."""
+    users = User.objects.bulk_create([User(username=f'user{i}', password='!') for i in range(2000)])
+    now = timezone.now()
+    Post.objects.bulk_create(
+        [Post(author=rng.choice(users), title=f'Post {i}', content='body',
+              created_at=now - timedelta(hours=rng.uniform(0, hours))) for i in range(posts)],
+        batch_size=5000,
+    )
+    created = dict(Post.objects.values_list('pk', 'created_at'))
+    post_ids = list(created)
+    rng.shuffle(post_ids)
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(post_ids))]
+
+    def when(post_id):
+        return min(now, created[post_id] + timedelta(hours=rng.expovariate(1 / 6)))
+
+    def like_rows():
+        seen = set()
+        for post_id in rng.choices(post_ids, weights, k=likes):
+            user = rng.choice(users)
+            if (post_id, user.pk) not in seen:
+                seen.add((post_id, user.pk))
+                yield Like(post_id=post_id, user=user, created_at=when(post_id))
+
+    for batch in chunked(like_rows(), 10000):
+        Like.objects.bulk_create(batch)
+    for batch in chunked(rng.choices(post_ids, weights, k=likes // 10), 10000):
+        Comment.objects.bulk_create([
+            Comment(post_id=post_id, author=rng.choice(users), content='nice',
+                    created_at=when(post_id))
+            for post_id in batch
+        ])
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return users, post_ids
+
+
+def on_the_fly(since):
+    return list(
+        Like.objects.filter(created_at__gte=since).values('post')
+        .annotate(n=Count('pk')).order_by('-n')[:20]
+    )
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument('--posts', type=int, default=100000)
+    p.add_argument('--likes', type=int, default=1000000)
+    p.add_argument('--hours', type=int, default=72)
+    p.add_argument('--samples', type=int, default=50)
+    opts = p.parse_args()
+    rng = random.Random(opts.seed)
+
+    with scratch_database():
+        users, post_ids = populate(opts.posts, opts.likes, opts.hours, rng)
+        stats = trending.recompute(opts.hours)
+        print(f'{opts.posts} posts, {stats.events} likes+comments, {stats.posts} scored posts')
+
+        since = timezone.now() - timedelta(hours=opts.hours)
+        print_table('Top 20', [
+            ('TrendingScore (top)', measure(trending.top, [()] * opts.samples)),
+            ('GROUP BY recent likes', measure(on_the_fly, [(since,)] * opts.samples)),
+        ])
+
+        now = timezone.now()
+        events = [(rng.choice(post_ids), 1.0, now) for _ in range(opts.samples * 20)]
+        print_table('Incremental update', [('trending.record()', measure(trending.record, events))])
+
+        print(f"\nRecompute ({opts.hours} h window)\n  {'half-life h':<14}{'seconds':>10}{'like age on top 20, h':>24}")
+        for hours in (3, 6, 12, 24, 48):
+            with override_settings(TRENDING_HALF_LIFE_HOURS=hours):
+                stats = trending.recompute(opts.hours)
+                top = trending.top(limit=20)
+            stamps = Like.objects.filter(post__in=top, created_at__gte=since).values_list('created_at', flat=True)
+            mean_age = sum((now - stamp).total_seconds() for stamp in stamps) / max(1, len(stamps)) / 3600
+            print(f'  {hours:<14}{stats.seconds:>10.2f}{mean_age:>24.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 # notifications/admin.py
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationDigest
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -8,3 +8,10 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ('is_read', 'verb')
     search_fields = ('recipient__username', 'actor__username', 'verb')
     ordering = ('-timestamp',)
+
+
+@admin.register(NotificationDigest)
+class NotificationDigestAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'verb', 'period', 'count', 'last_timestamp')
+    list_filter = ('verb', 'period')
+    search_fields = ('recipient__username',)
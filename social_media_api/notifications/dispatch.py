@@ -0,0 +1,269 @@
+# notifications/dispatch.py
+"""
+Asynchronous, batched notification delivery.
+
+Request handlers call `notify()`, which enqueues a lightweight event on an
+in-process queue once the surrounding transaction commits. A background
+worker thread collects events for up to NOTIFICATIONS_FLUSH_INTERVAL seconds
+after the first one arrives, coalesces events that share a (recipient, verb,
+target) into one row ("5 people liked your post"), folds those into the
+recipient's existing unread row for the same (verb, target) where there is
+one, and inserts the rest with a single `bulk_create`.
+
+With NOTIFICATIONS_ASYNC = False (tests, management commands) events are
+written synchronously in the calling thread instead.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import unread
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class NotificationEvent:
+    recipient_id: int
+    actor_id: int
+    verb: str
+    target_content_type_id: int = None
+    target_object_id: int = None
+
+
+def coalesce(events):
+    """
+    Collapse events sharing (recipient, verb, target) into unsaved
+    Notification rows. The most recent actor is kept as `actor` and
+    `actor_count` holds the number of distinct actors (listed in
+    `row.actor_ids` for merge_unread).
+    """
+    groups = OrderedDict()
+    for event in events:
+        key = (event.recipient_id, event.verb, event.target_content_type_id, event.target_object_id)
+        actors = groups.setdefault(key, OrderedDict())
+        actors.pop(event.actor_id, None)
+        actors[event.actor_id] = None
+    rows = []
+    for (recipient_id, verb, ct_id, object_id), actors in groups.items():
+        row = Notification(
+            recipient_id=recipient_id,
+            actor_id=next(reversed(actors)),
+            actor_count=len(actors),
+            verb=verb,
+            target_content_type_id=ct_id,
+            target_object_id=object_id,
+        )
+        row.actor_ids = list(actors)
+        rows.append(row)
+    return rows
+
+
+def _key(row):
+    return (row.recipient_id, row.verb, row.target_content_type_id, row.target_object_id)
+
+
+MERGE_CHUNK = 200  # (recipient, verb, target) keys per lookup query
+
+
+def merge_unread(rows):
+    """
+    Fold coalesced `rows` into the recipients' existing unread notifications
+    with the same (verb, target): the newest actor replaces `actor`, new
+    actors are added to `actor_count` and the row moves to the top of the
+    inbox. Only the existing row's latest actor is known, so an earlier actor
+    acting again is counted twice. Returns the rows that still need inserting.
+    """
+    existing = {}
+    for start in range(0, len(rows), MERGE_CHUNK):
+        match = Q()
+        for row in rows[start:start + MERGE_CHUNK]:
+            match |= Q(
+                recipient_id=row.recipient_id, verb=row.verb,
+                target_content_type_id=row.target_content_type_id,
+                target_object_id=row.target_object_id,
+            )
+        # Oldest first, so the newest unread row per key wins.
+        for notification in Notification.objects.filter(match, is_read=False).order_by('timestamp', 'id'):
+            existing[_key(notification)] = notification
+
+    merged, new = [], []
+    now = timezone.now()
+    for row in rows:
+        notification = existing.get(_key(row))
+        if notification is None:
+            new.append(row)
+            continue
+        added = set(getattr(row, 'actor_ids', [row.actor_id])) - {notification.actor_id}
+        notification.actor_count += len(added)
+        notification.actor_id = row.actor_id
+        notification.timestamp = now
+        merged.append(notification)
+    if merged:
+        Notification.objects.bulk_update(merged, ['actor', 'actor_count', 'timestamp'])
+    return new
+
+
+class NotificationDispatcher:
+    def __init__(self):
+        self._queue = None
+        self._worker = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.written = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+
+    # ---- settings -------------------------------------------------------
+    @property
+    def run_async(self):
+        return getattr(settings, 'NOTIFICATIONS_ASYNC', True)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'NOTIFICATIONS_BATCH_SIZE', 500)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'NOTIFICATIONS_FLUSH_INTERVAL', 0.5)
+
+    @property
+    def queue(self):
+        if self._queue is None:
+            with self._lock:
+                if self._queue is None:
+                    self._queue = queue.Queue(getattr(settings, 'NOTIFICATIONS_QUEUE_MAXSIZE', 10000))
+        return self._queue
+
+    # ---- producer side --------------------------------------------------
+    def enqueue(self, event):
+        if not self.run_async:
+            self.write_batch([event])
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Notification queue full; dropped %s", event)
+            return
+        self.enqueued += 1
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='notification-dispatcher', daemon=True
+                )
+                self._worker.start()
+
+    # ---- consumer side --------------------------------------------------
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self.write_batch(self._collect(first))
+            close_old_connections()
+
+    def _collect(self, first):
+        """
+        `first` plus whatever arrives within flush_interval of it, up to
+        batch_size events, so likes arriving close together share a row.
+        """
+        events = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(events) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                events.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return events
+
+    def _drain(self, limit):
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def flush(self):
+        """Synchronously write everything currently queued (used at shutdown and in tests)."""
+        while True:
+            events = self._drain(self.batch_size)
+            if not events:
+                return
+            self.write_batch(events)
+
+    def write_batch(self, events):
+        rows = coalesce(events)
+        try:
+            with transaction.atomic():
+                Notification.objects.bulk_create(merge_unread(rows))
+        except Exception:
+            self.failed += len(events)
+            logger.exception("Failed to write %d notification events", len(events))
+            return
+        unread.invalidate(*(row.recipient_id for row in rows))
+        self.batches += 1
+        self.written += len(rows)
+        self.last_batch_size = len(events)
+        self.max_batch_size = max(self.max_batch_size, len(events))
+
+    def metrics(self):
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches,
+            'rows_written': self.written,
+            'last_batch_size': self.last_batch_size,
+            'max_batch_size': self.max_batch_size,
+            'worker_alive': self._worker is not None and self._worker.is_alive(),
+        }
+
+
+dispatcher = NotificationDispatcher()
+atexit.register(dispatcher.flush)
+
+
+def notify(recipient, actor, verb, target=None):
+    """
+    Queue a notification for `recipient` (a user or a user id) once the
+    current transaction commits. Self-notifications are skipped.
+    """
+    recipient_id = getattr(recipient, 'pk', recipient)
+    actor_id = getattr(actor, 'pk', actor)
+    if recipient_id == actor_id:
+        return
+    event = NotificationEvent(
+        recipient_id=recipient_id,
+        actor_id=actor_id,
+        verb=verb,
+        target_content_type_id=ContentType.objects.get_for_model(target).pk if target is not None else None,
+        target_object_id=target.pk if target is not None else None,
+    )
+    transaction.on_commit(lambda: dispatcher.enqueue(event))
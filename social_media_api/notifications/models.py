@@ -17,6 +17,8 @@ class Notification(models.Model):
         on_delete=models.CASCADE
     )
     verb = models.CharField(max_length=255)  # e.g., "liked your post", "followed you"
+    # Number of distinct actors coalesced into this row; `actor` is the most recent
+    actor_count = models.PositiveIntegerField(default=1)
 
     # Generic relation (can point to Post, Comment, etc.)
     target_content_type = models.ForeignKey(
@@ -36,6 +38,35 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Unread badge / unread-only inbox: WHERE recipient = ? AND is_read = ?
+            models.Index(fields=['recipient', 'is_read', 'timestamp'], name='notif_recipient_unread_idx'),
+            # Full inbox, newest first (keyset pagination on timestamp, id)
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notif_recipient_inbox_idx'),
+        ]
 
     def __str__(self):
         return f"{self.actor} {self.verb} {self.target or ''} → {self.recipient}"
+
+
+class NotificationDigest(models.Model):
+    """
+    Monthly per-recipient rollup of notifications that were compacted out of
+    the live table by `manage.py compact_notifications`.
+    """
+    recipient = models.ForeignKey(
+        User,
+        related_name='notification_digests',
+        on_delete=models.CASCADE
+    )
+    verb = models.CharField(max_length=255)
+    period = models.DateField()  # first day of the month
+    count = models.PositiveIntegerField(default=0)  # events (sum of actor_count)
+    last_timestamp = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-period']
+        unique_together = (('recipient', 'verb', 'period'),)
+
+    def __str__(self):
+        return f"{self.recipient} {self.verb} ×{self.count} ({self.period:%Y-%m})"
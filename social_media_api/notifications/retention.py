@@ -0,0 +1,148 @@
+# notifications/retention.py
+"""
+Retention job for the Notification table.
+
+Read notifications older than the retention age are, chunk by chunk:
+
+1. written to a gzip-compressed JSONL archive file,
+2. rolled up into NotificationDigest rows (recipient, verb, month),
+3. deleted from the live table.
+
+Steps 2 and 3 share one transaction per chunk. The archive for a chunk is
+written to a `.part` file first and renamed once the transaction commits,
+so an interrupted run never loses rows: on the next run, leftover `.part`
+files whose rows are gone are promoted, the rest are discarded, and
+processing simply continues with the rows that are still there.
+
+`run_retention()` is the scheduler hook (cron, Celery beat, ...);
+`manage.py compact_notifications` wraps it for the command line.
+"""
+import gzip
+import json
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationDigest
+
+ARCHIVE_FIELDS = (
+    'id', 'recipient_id', 'actor_id', 'actor_count', 'verb',
+    'target_content_type_id', 'target_object_id', 'is_read', 'timestamp',
+)
+
+
+@dataclass
+class RetentionStats:
+    chunks: int = 0
+    rows: int = 0
+    digests: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def default_archive_dir():
+    return Path(getattr(settings, 'NOTIFICATIONS_ARCHIVE_DIR', settings.BASE_DIR / 'archive' / 'notifications'))
+
+
+def _recover_partial_archives(archive_dir):
+    for part in archive_dir.glob('*.jsonl.gz.part'):
+        first_id = int(part.name.split('-')[1])
+        if Notification.objects.filter(pk=first_id).exists():
+            part.unlink()  # chunk was rolled back; its rows will be processed again
+        else:
+            part.rename(part.with_suffix(''))  # chunk committed; keep its archive
+
+
+def _write_archive(rows, archive_dir):
+    path = archive_dir / f'notifications-{rows[0].pk}-{rows[-1].pk}.jsonl.gz.part'
+    with gzip.open(path, 'wt', encoding='utf-8') as fh:
+        for row in rows:
+            record = {field: getattr(row, field) for field in ARCHIVE_FIELDS}
+            record['timestamp'] = row.timestamp.isoformat()
+            fh.write(json.dumps(record) + '\n')
+    return path
+
+
+def _roll_up(rows):
+    totals = {}
+    for row in rows:
+        key = (row.recipient_id, row.verb, row.timestamp.date().replace(day=1))
+        count, last = totals.get(key, (0, row.timestamp))
+        totals[key] = (count + row.actor_count, max(last, row.timestamp))
+
+    existing = {
+        (d.recipient_id, d.verb, d.period): d
+        for d in NotificationDigest.objects.filter(
+            recipient_id__in={k[0] for k in totals},
+            period__in={k[2] for k in totals},
+        )
+    }
+    to_create, to_update = [], []
+    for (recipient_id, verb, period), (count, last) in totals.items():
+        digest = existing.get((recipient_id, verb, period))
+        if digest is None:
+            to_create.append(NotificationDigest(
+                recipient_id=recipient_id, verb=verb, period=period,
+                count=count, last_timestamp=last,
+            ))
+        else:
+            digest.count += count
+            digest.last_timestamp = max(digest.last_timestamp, last)
+            to_update.append(digest)
+    NotificationDigest.objects.bulk_create(to_create)
+    NotificationDigest.objects.bulk_update(to_update, ['count', 'last_timestamp'])
+    return len(to_create) + len(to_update)
+
+
+def run_retention(older_than_days=None, chunk_size=1000, archive_dir=None,
+                  archive=True, max_chunks=None, progress=None):
+    """
+    Compact read notifications older than `older_than_days`.
+
+    `progress`, if given, is called with the running RetentionStats after
+    each chunk. `max_chunks` bounds a single run (useful for schedulers
+    that want short, frequent slices).
+    """
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'NOTIFICATIONS_RETENTION_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    archive_dir = Path(archive_dir) if archive_dir else default_archive_dir()
+    if archive:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        _recover_partial_archives(archive_dir)
+
+    stats = RetentionStats()
+    started = time.perf_counter()
+    last_pk = 0
+    while max_chunks is None or stats.chunks < max_chunks:
+        rows = list(
+            Notification.objects.filter(is_read=True, timestamp__lt=cutoff, pk__gt=last_pk)
+            .order_by('pk')[:chunk_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+
+        part = _write_archive(rows, archive_dir) if archive else None
+        with transaction.atomic():
+            stats.digests += _roll_up(rows)
+            Notification.objects.filter(pk__in=[r.pk for r in rows]).delete()
+        if part is not None:
+            part.rename(part.with_suffix(''))
+
+        stats.chunks += 1
+        stats.rows += len(rows)
+        stats.seconds = time.perf_counter() - started
+        if progress:
+            progress(stats)
+
+    stats.seconds = time.perf_counter() - started
+    return stats
@@ -1,10 +1,56 @@
 # notifications/serializers.py
+from collections import defaultdict
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
 from .models import Notification
 
 User = get_user_model()
 
+# Relations each target type needs for get_target_repr (Comment.__str__
+# shows its author and its post, whose __str__ shows the post author).
+TARGET_SELECT_RELATED = {
+    'posts.comment': ('author', 'post__author'),
+}
+
+
+def attach_targets(notifications):
+    """
+    Resolve the generic `target` of many notifications at once.
+
+    Notifications are grouped by target_content_type and each type is
+    fetched with a single in_bulk() call; results (or None for deleted
+    targets) are stored in the GenericForeignKey cache so `obj.target`
+    no longer queries per row. ContentType lookups use Django's
+    process-wide ContentType cache.
+    """
+    notifications = list(notifications)
+    by_type = defaultdict(list)
+    for notif in notifications:
+        if notif.target_content_type_id is not None:
+            by_type[notif.target_content_type_id].append(notif)
+
+    field = Notification._meta.get_field('target')
+    for ct_id, group in by_type.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        targets = {}
+        if model is not None:
+            related = TARGET_SELECT_RELATED.get(model._meta.label_lower, ())
+            targets = model._default_manager.select_related(*related).in_bulk(
+                {n.target_object_id for n in group}
+            )
+        for notif in group:
+            field.set_cached_value(notif, targets.get(notif.target_object_id))
+    return notifications
+
+
+class NotificationListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        data = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return super().to_representation(attach_targets(data))
+
 class ActorMiniSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -13,11 +59,14 @@ class ActorMiniSerializer(serializers.ModelSerializer):
 class NotificationSerializer(serializers.ModelSerializer):
     actor = ActorMiniSerializer(read_only=True)
     target_repr = serializers.SerializerMethodField()
+    # The model field is `timestamp`; keep the public name clients already use.
+    created_at = serializers.DateTimeField(source='timestamp', read_only=True)
 
     class Meta:
         model = Notification
+        list_serializer_class = NotificationListSerializer
         fields = (
-            'id', 'actor', 'verb', 'target_repr',
+            'id', 'actor', 'actor_count', 'verb', 'target_repr',
             'is_read', 'created_at'
         )
 
@@ -1,3 +1,262 @@
-from django.test import TestCase
+import gzip
+import json
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from posts.models import Comment, Post
+from .dispatch import NotificationDispatcher, NotificationEvent, coalesce
+from .models import Notification, NotificationDigest
+from .retention import run_retention
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationListTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='recipient')
+        self.actor = User.objects.create_user(username='actor')
+        for _ in range(3):
+            Notification.objects.create(recipient=self.user, actor=self.actor, verb='liked')
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_is_keyset_paginated_newest_first(self):
+        resp = self.client.get(reverse('notifications-list'), {'page_size': 2})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        ids = [n['id'] for n in resp.data['results']]
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertIsNotNone(resp.data['next'])
+        self.assertIn('created_at', resp.data['results'][0])
+
+    def test_conditional_get_until_marked_read(self):
+        url = reverse('notifications-list')
+        etag = self.client.get(url)['ETag']
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.post(reverse('notifications-read-all'))
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATIONS_ASYNC=False)
+class NotificationDispatchTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.fans = [User.objects.create_user(username=f'fan{i}') for i in range(3)]
+        self.post = Post.objects.create(author=self.author, title='Hello', content='x')
+
+    def test_like_notifies_author_after_commit(self):
+        self.client.force_authenticate(user=self.fans[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('post-like', args=[self.post.pk]))
+        notif = Notification.objects.get(recipient=self.author)
+        self.assertEqual((notif.actor, notif.verb, notif.target), (self.fans[0], 'liked', self.post))
+
+    def test_self_like_does_not_notify(self):
+        self.client.force_authenticate(user=self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('post-like', args=[self.post.pk]))
+        self.assertFalse(Notification.objects.exists())
+
+    def test_events_for_same_target_are_coalesced(self):
+        events = [
+            NotificationEvent(self.author.pk, fan.pk, 'liked', 1, self.post.pk)
+            for fan in self.fans + [self.fans[0]]
+        ]
+        events.append(NotificationEvent(self.author.pk, self.fans[0].pk, 'commented', 1, self.post.pk))
+        rows = coalesce(events)
+        self.assertEqual(len(rows), 2)
+        liked = rows[0]
+        self.assertEqual((liked.verb, liked.actor_count, liked.actor_id), ('liked', 3, self.fans[0].pk))
+
+    def test_later_events_merge_into_the_unread_row(self):
+        for fan in self.fans + [self.fans[2]]:
+            self.client.force_authenticate(user=fan)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('post-unlike', args=[self.post.pk]))
+                self.client.post(reverse('post-like', args=[self.post.pk]))
+        notif = Notification.objects.get(recipient=self.author)
+        self.assertEqual((notif.actor, notif.actor_count), (self.fans[2], 3))
+
+        notif.is_read = True
+        notif.save()
+        self.client.force_authenticate(user=self.fans[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('post-unlike', args=[self.post.pk]))
+            self.client.post(reverse('post-like', args=[self.post.pk]))
+        unread = Notification.objects.get(recipient=self.author, is_read=False)
+        self.assertEqual((unread.actor, unread.actor_count), (self.fans[0], 1))
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.client.force_authenticate(user=self.fans[0])
+        self.assertEqual(
+            self.client.get(reverse('notifications-metrics')).status_code, status.HTTP_403_FORBIDDEN
+        )
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_authenticate(user=admin)
+        resp = self.client.get(reverse('notifications-metrics'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIn('queue_depth', resp.data)
+
+
+@override_settings(NOTIFICATIONS_QUEUE_MAXSIZE=2, NOTIFICATIONS_BATCH_SIZE=10)
+class NotificationQueueTests(TestCase):
+    def test_overflow_is_dropped_and_flush_writes_one_batch(self):
+        author = User.objects.create_user(username='author')
+        fan = User.objects.create_user(username='fan')
+        d = NotificationDispatcher()
+        d._ensure_worker = lambda: None  # drain manually in the test thread
+        for _ in range(3):
+            d.enqueue(NotificationEvent(author.pk, fan.pk, 'liked'))
+        self.assertEqual(d.metrics()['dropped'], 1)
+        self.assertEqual(d.metrics()['queue_depth'], 2)
+
+        d.flush()
+        self.assertEqual(Notification.objects.get().actor_count, 1)
+        self.assertEqual((d.metrics()['batches'], d.metrics()['max_batch_size']), (1, 2))
+
+    @override_settings(NOTIFICATIONS_FLUSH_INTERVAL=0.3)
+    def test_worker_keeps_collecting_for_the_flush_interval(self):
+        d = NotificationDispatcher()
+        late = NotificationEvent(2, 3, 'liked')
+        timer = threading.Timer(0.05, d.queue.put, args=[late])
+        timer.start()
+        self.addCleanup(timer.cancel)
+        events = d._collect(NotificationEvent(2, 4, 'liked'))
+        self.assertEqual(events[1:], [late])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UnreadCountTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='recipient')
+        actor = User.objects.create_user(username='actor')
+        self.notifs = [
+            Notification.objects.create(recipient=self.user, actor=actor, verb='liked')
+            for _ in range(3)
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def unread(self):
+        resp = self.client.get(reverse('notifications-unread-count'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data['unread']
+
+    def test_count_is_cached(self):
+        self.assertEqual(self.unread(), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread(), 3)
+
+    def test_mark_read_invalidates(self):
+        self.unread()
+        self.client.post(reverse('notification-read', args=[self.notifs[0].pk]))
+        self.assertEqual(self.unread(), 2)
+        self.client.post(reverse('notifications-read-all'))
+        self.assertEqual(self.unread(), 0)
+
+    def test_list_can_filter_unread(self):
+        self.client.post(reverse('notification-read', args=[self.notifs[0].pk]))
+        resp = self.client.get(reverse('notifications-list'), {'unread': 'true'})
+        self.assertEqual(len(resp.data['results']), 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationTargetQueryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='recipient')
+        self.client.force_authenticate(user=self.user)
+
+    def add(self, n):
+        for i in range(n):
+            actor = User.objects.create_user(username=f'actor{Notification.objects.count()}')
+            post = Post.objects.create(author=self.user, title=f'Post {i}', content='x')
+            target = post if i % 2 else Comment.objects.create(post=post, author=actor, content='c')
+            Notification.objects.create(recipient=self.user, actor=actor, verb='liked', target=target)
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('notifications-list'), {'page_size': 50})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), resp
+
+    def test_page_cost_is_constant(self):
+        self.add(4)
+        self.list_queries()  # warm the ContentType cache
+        small, _ = self.list_queries()
+        self.add(46)
+        large, resp = self.list_queries()
+        self.assertEqual(len(resp.data['results']), 50)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 3)  # notifications+actors, posts, comments
+
+    def test_deleted_target_renders_as_none(self):
+        self.add(1)
+        Comment.objects.all().delete()
+        _, resp = self.list_queries()
+        self.assertIsNone(resp.data['results'][0]['target_repr'])
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='recipient')
+        self.actor = User.objects.create_user(username='actor')
+        old = timezone.now() - timedelta(days=200)
+        self.old_read = [self.make(is_read=True, timestamp=old) for _ in range(5)]
+        self.old_unread = self.make(is_read=False, timestamp=old)
+        self.recent_read = self.make(is_read=True, timestamp=timezone.now())
+        self.archive_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+
+    def make(self, **fields):
+        n = Notification.objects.create(recipient=self.user, actor=self.actor, verb='liked')
+        Notification.objects.filter(pk=n.pk).update(**fields)
+        return n
+
+    def test_compacts_archives_and_deletes_old_read_rows(self):
+        out = StringIO()
+        call_command(
+            'compact_notifications', '--older-than-days=90', '--chunk-size=2',
+            f'--archive-dir={self.archive_dir}', stdout=out,
+        )
+        self.assertIn('Compacted 5 notifications in 3 chunks', out.getvalue())
+        self.assertEqual(
+            set(Notification.objects.values_list('pk', flat=True)),
+            {self.old_unread.pk, self.recent_read.pk},
+        )
+        digest = NotificationDigest.objects.get()
+        self.assertEqual((digest.recipient, digest.verb, digest.count), (self.user, 'liked', 5))
+
+        archived = []
+        for path in sorted(self.archive_dir.glob('*.jsonl.gz')):
+            with gzip.open(path, 'rt') as fh:
+                archived.extend(json.loads(line)['id'] for line in fh)
+        self.assertEqual(sorted(archived), [n.pk for n in self.old_read])
+        self.assertFalse(list(self.archive_dir.glob('*.part')))
+
+    def test_rerun_after_interruption_resumes(self):
+        stats = run_retention(older_than_days=90, chunk_size=2, archive_dir=self.archive_dir, max_chunks=1)
+        self.assertEqual(stats.rows, 2)
+        # An archive left as .part for rows that still exist means the chunk rolled back.
+        stale = self.archive_dir / f'notifications-{self.old_read[2].pk}-{self.old_read[3].pk}.jsonl.gz.part'
+        stale.write_bytes(b'')
+
+        stats = run_retention(older_than_days=90, chunk_size=2, archive_dir=self.archive_dir)
+        self.assertEqual(stats.rows, 3)
+        self.assertFalse(stale.exists())
+        self.assertEqual(NotificationDigest.objects.get().count, 5)
@@ -0,0 +1,29 @@
+# notifications/unread.py
+"""
+Per-user unread notification counter, cached in Django's cache framework.
+
+The count is computed from the (recipient, is_read, timestamp) index on a
+miss. It is invalidated whenever notifications are written for a user or
+marked read, so badge polling normally never touches the database.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user):
+    key = _key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient=user, is_read=False).count()
+        cache.set(key, count, getattr(settings, 'NOTIFICATIONS_UNREAD_CACHE_TIMEOUT', 300))
+    return count
+
+
+def invalidate(*user_ids):
+    cache.delete_many([_key(user_id) for user_id in set(user_ids)])
@@ -1,9 +1,14 @@
 # notifications/urls.py
 from django.urls import path
-from .views import NotificationListView, MarkNotificationReadView, MarkAllReadView
+from .views import (
+    NotificationListView, MarkNotificationReadView, MarkAllReadView,
+    NotificationMetricsView, UnreadCountView,
+)
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notifications-list'),
     path('<int:pk>/read/', MarkNotificationReadView.as_view(), name='notification-read'),
+    path('unread-count/', UnreadCountView.as_view(), name='notifications-unread-count'),
     path('read-all/', MarkAllReadView.as_view(), name='notifications-read-all'),
+    path('metrics/', NotificationMetricsView.as_view(), name='notifications-metrics'),
 ]
@@ -2,15 +2,39 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from posts.conditional import ConditionalGetMixin
+from posts.pagination import KeysetPagination
+from . import unread
+from .dispatch import dispatcher
 from .models import Notification
 from .serializers import NotificationSerializer
 
-class NotificationListView(generics.ListAPIView):
+class NotificationPagination(KeysetPagination):
+    ordering = ('-timestamp', '-id')
+
+class NotificationListView(ConditionalGetMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = NotificationSerializer
+    pagination_class = NotificationPagination
+    # Rows are immutable apart from the read flag and the coalesced actors
+    # (which also move the timestamp)
+    etag_fields = ('pk', 'is_read', 'actor_count', 'actor_id', 'timestamp')
 
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user).order_by('-created_at')
+        qs = Notification.objects.filter(recipient=self.request.user).select_related('actor')
+        if self.request.query_params.get('unread', '').lower() in ('1', 'true', 'yes'):
+            qs = qs.filter(is_read=False)
+        return qs.order_by('-timestamp', '-id')
+
+class UnreadCountView(generics.GenericAPIView):
+    """
+    Cheap badge endpoint: returns the cached unread count without touching
+    the notification list.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread": unread.unread_count(request.user)}, status=status.HTTP_200_OK)
 
 class MarkNotificationReadView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -19,6 +43,7 @@ class MarkNotificationReadView(generics.GenericAPIView):
         notif = get_object_or_404(Notification, pk=pk, recipient=request.user)
         notif.is_read = True
         notif.save(update_fields=['is_read'])
+        unread.invalidate(request.user.pk)
         return Response({"detail": "Notification marked as read."}, status=status.HTTP_200_OK)
 
 class MarkAllReadView(generics.GenericAPIView):
@@ -26,4 +51,15 @@ class MarkAllReadView(generics.GenericAPIView):
 
     def post(self, request):
         Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+        unread.invalidate(request.user.pk)
         return Response({"detail": "All notifications marked as read."}, status=status.HTTP_200_OK)
+
+class NotificationMetricsView(generics.GenericAPIView):
+    """
+    Dispatcher health for operators: queue depth, batch sizes, dropped and
+    failed events (counters are per process).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(dispatcher.metrics(), status=status.HTTP_200_OK)
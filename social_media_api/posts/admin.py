@@ -3,5 +3,5 @@ from .models import Post
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('id', 'title', 'author', 'created_at')
+    list_display = ('id', 'title', 'author', 'created_at', 'likes_count', 'comments_count')
     search_fields = ('title', 'content')
@@ -0,0 +1,91 @@
+# posts/conditional.py
+"""
+Conditional GET (ETag) for read endpoints.
+
+The validators are computed from the rows a response is built from — the
+page the paginator selected, or the object a detail view looked up — before
+any serialization happens:
+
+ETag: a hash over `etag_fields` of every row (ids, updated_at and the
+denormalized counters, which change without touching updated_at) plus the
+paginator's page state (next cursor / count).
+
+There is deliberately no Last-Modified: counters, read flags and per-user
+state change without moving any timestamp, so If-Modified-Since would
+answer 304 with stale data. Only If-None-Match is honoured.
+
+A request whose If-None-Match still matches gets a 304 straight away: the serializer, renderer and response body are skipped.
+Responses are marked `Cache-Control: private, no-cache` and vary on
+Authorization, since rows such as `is_liked` are per user.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    etag_fields = ('pk', 'updated_at')
+    # Per-user fields (e.g. is_liked) are hashed separately from the shared
+    # ones, so a page cached for everyone (posts/response_cache.py) can still
+    # be revalidated per user.
+    personal_etag_fields = ()
+
+    def shared_fingerprint(self, rows, state=()):
+        """Hex digest over the user-independent fields."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(tuple(state)).encode())
+        for row in rows:
+            digest.update(repr(tuple(getattr(row, f) for f in self.etag_fields)).encode())
+        return digest.hexdigest()
+
+    def personal_fingerprint(self, rows):
+        return tuple(tuple(getattr(row, f) for f in self.personal_etag_fields) for row in rows)
+
+    def not_modified(self, request, rows, state=()):
+        """
+        Record validators for `rows`; return a 304 response if the client's
+        copy is still current, otherwise None.
+        """
+        self.fingerprint = self.shared_fingerprint(rows, state)
+        return self.not_modified_by(request, self.fingerprint, self.personal_fingerprint(rows))
+
+    def not_modified_by(self, request, fingerprint, personal=()):
+        digest = hashlib.blake2b(fingerprint.encode(), digest_size=16)
+        digest.update(repr((request.user.pk, personal)).encode())
+        self.etag = quote_etag(digest.hexdigest())
+        return get_conditional_response(request, etag=self.etag)
+
+    def page_state(self):
+        paginator = self.paginator
+        return paginator.page_state() if hasattr(paginator, 'page_state') else ()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'etag', None)
+        if etag is not None and response.status_code in (200, 304):
+            response.headers['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+    # ---- generic list / retrieve ----------------------------------------
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        response = self.not_modified(request, rows, self.page_state())
+        if response is not None:
+            return response
+        serializer = self.get_serializer(rows, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        response = self.not_modified(request, [instance])
+        if response is not None:
+            return response
+        return Response(self.get_serializer(instance).data)
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import TYPES, export_ndjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Export posts, comments and likes as NDJSON (the import_content format), "
+        "streaming each table in primary-key chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help="File to write (default: '-' for stdout).",
+        )
+        parser.add_argument(
+            '--types', default=','.join(TYPES),
+            help='Comma-separated record types to export (default: post,comment,like).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Rows fetched per database round trip (default: 2000).',
+        )
+
+    def handle(self, *args, **opts):
+        types = [t.strip() for t in opts['types'].split(',') if t.strip()]
+        unknown = set(types) - set(TYPES)
+        if unknown:
+            raise CommandError(f"Unknown types: {', '.join(sorted(unknown))}")
+
+        lines = export_ndjson(types, opts['chunk_size'])
+        if opts['path'] == '-':
+            count = self._write(lines, self.stdout)
+        else:
+            with open(opts['path'], 'w', encoding='utf-8') as fh:
+                count = self._write(lines, fh)
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} records to {opts['path']}."))
+
+    def _write(self, lines, fh):
+        count = 0
+        for line in lines:
+            fh.write(line)
+            count += 1
+        return count
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import import_ndjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Import posts, comments and likes from NDJSON (see posts/transfer.py). "
+        "Lines are validated and written in batches, one transaction each; "
+        "invalid lines are skipped and reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file to read, or '-' for stdin.")
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Lines per transaction (default: settings.POSTS_IMPORT_BATCH_SIZE).',
+        )
+
+    def handle(self, *args, **opts):
+        def progress(stats):
+            if opts['verbosity'] > 1:
+                self.stdout.write(
+                    f"  batch {stats.batches}: {stats.lines} lines, "
+                    f"{stats.rows_per_second:.0f} rows/s"
+                )
+
+        if opts['path'] == '-':
+            stats = import_ndjson(sys.stdin, opts['batch_size'], progress)
+        else:
+            with open(opts['path'], encoding='utf-8') as fh:
+                stats = import_ndjson(fh, opts['batch_size'], progress)
+
+        for line_no, message in stats.errors:
+            self.stderr.write(f"  line {line_no}: {message}")
+        if stats.invalid > len(stats.errors):
+            self.stderr.write(f"  ... and {stats.invalid - len(stats.errors)} more invalid lines")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats.posts} posts, {stats.comments} comments and {stats.likes} likes "
+            f"from {stats.lines} lines ({stats.duplicates} duplicates, {stats.invalid} invalid) "
+            f"in {stats.seconds:.2f}s — {stats.rows_per_second:.0f} rows/s."
+        ))
@@ -0,0 +1,17 @@
+# posts/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild and optimize the post full-text index. Triggers (SQLite) or "
+        "the expression index (PostgreSQL) keep it current; run this after "
+        "restoring data with raw SQL or to compact the SQLite FTS5 table."
+    )
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index ({backend.name} backend)."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import recompute
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the trending scores from recent likes and comments. Scores are "
+        "kept current by signals; schedule this (e.g. hourly) to drop posts that "
+        "have gone quiet and to pick up rows written in bulk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window-hours', type=int, default=None,
+            help='Only events this recent count (default: settings.TRENDING_WINDOW_HOURS).',
+        )
+
+    def handle(self, *args, window_hours, **options):
+        stats = recompute(window_hours)
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {stats.posts} posts from {stats.events} likes and comments "
+            f"in {stats.seconds:.2f}s."
+        ))
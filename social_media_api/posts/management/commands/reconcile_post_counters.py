@@ -0,0 +1,61 @@
+# posts/management/commands/reconcile_post_counters.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Post.likes_count / Post.comments_count from the Like and "
+        "Comment tables and fix any rows that have drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of posts examined per transaction (default: 1000).',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drifted posts without writing anything.',
+        )
+
+    def handle(self, *args, chunk_size, dry_run, **options):
+        scanned = fixed = 0
+        last_pk = 0
+        while True:
+            # Walk the table by primary key so each chunk is an index range scan.
+            ids = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_pk = ids[-1]
+            scanned += len(ids)
+
+            with transaction.atomic():
+                drifted = list(
+                    Post.objects.filter(pk__in=ids)
+                    .select_for_update()
+                    .with_actual_counts()
+                    .filter(
+                        ~Q(likes_count=F('actual_likes_count'))
+                        | ~Q(comments_count=F('actual_comments_count'))
+                    )
+                    .only('pk', 'likes_count', 'comments_count')
+                )
+                for post in drifted:
+                    post.likes_count = post.actual_likes_count
+                    post.comments_count = post.actual_comments_count
+                if drifted and not dry_run:
+                    Post.objects.bulk_update(drifted, ['likes_count', 'comments_count'])
+            fixed += len(drifted)
+
+        verb = 'would fix' if dry_run else 'fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} posts, {verb} {fixed} drifted counters."
+        ))
@@ -1,6 +1,45 @@
 # posts/models.py
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+
+def _count_subquery(model, field='post'):
+    """Correlated COUNT(*) over `model` rows pointing at the outer post."""
+    rows = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_listing(self, user=None):
+        """
+        Shared queryset for every post-listing view.
+
+        Author is joined, comment/like counts are read from the denormalized
+        columns and `is_liked` is an EXISTS for the requesting user, so a page
+        costs a constant number of queries regardless of its size.
+        """
+        if user is not None and user.is_authenticated:
+            is_liked = Exists(Like.objects.filter(post=OuterRef('pk'), user=user))
+        else:
+            is_liked = Value(False)
+        return self.select_related('author').annotate(is_liked=is_liked)
+
+    def with_actual_counts(self):
+        """Annotate the real like/comment counts (used to reconcile the columns)."""
+        return self.annotate(
+            actual_comments_count=_count_subquery(Comment),
+            actual_likes_count=_count_subquery(Like),
+        )
+
 
 class Post(models.Model):
     author = models.ForeignKey(
@@ -10,9 +49,17 @@ class Post(models.Model):
     )
     title = models.CharField(max_length=255)
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # default (not auto_now_add) so bulk imports can keep the original time.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized counters, kept in step with Like/Comment writes via F()
+    # updates. `manage.py reconcile_post_counters` repairs any drift.
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
 
@@ -22,18 +69,41 @@ class Post(models.Model):
 class Like(models.Model):
     post = models.ForeignKey('posts.Post', on_delete=models.CASCADE, related_name='likes')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='likes')
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         unique_together = ('post', 'user')
         indexes = [
             models.Index(fields=['post', 'user']),
             models.Index(fields=['user']),
+            # recent-event scans (posts/trending.py recompute)
+            models.Index(fields=['created_at'], name='posts_like_created_idx'),
         ]
 
     def __str__(self):
         return f"{self.user} ♥ {self.post_id}"
-    
+
+
+class CommentQuerySet(models.QuerySet):
+    def latest_per_post(self, post_ids, n):
+        """
+        The `n` newest comments of each post in `post_ids`, in one query:
+        ROW_NUMBER() over each post's (created_at, id) range of the thread
+        index, filtered to the first `n`.
+        """
+        return (
+            self.filter(post_id__in=post_ids)
+            .select_related('author')
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=F('post_id'),
+                order_by=[F('created_at').desc(), F('id').desc()],
+            ))
+            .filter(position__lte=n)
+            .order_by('post_id', 'position')
+        )
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -46,11 +116,74 @@ class Comment(models.Model):
         related_name='comments'
     )
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='posts_comment_created_idx'),
+            # per-post threads: /api/posts/<id>/comments/ and latest_per_post()
+            models.Index(fields=['post', 'created_at', 'id'], name='posts_comment_thread_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author} on {self.post}"
+
+
+class TimelineEntry(models.Model):
+    """
+    Materialized home-feed row: `post` is in `user`'s feed.
+
+    Rows are written when a post is created (fan-out-on-write), backfilled on
+    follow and pruned on unfollow; see posts/timeline.py. `created_at` and
+    `author` are copied from the post so the feed can be read and pruned from
+    this table's indexes alone.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='posts_timeline_keyset_idx'),
+            models.Index(fields=['user', 'author'], name='posts_timeline_author_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} → {self.user_id}"
+
+
+class TrendingScore(models.Model):
+    """
+    Time-decayed engagement of a post, maintained by posts/trending.py.
+
+    `rank` is log2 of the decayed engagement measured against a fixed
+    epoch, so it only grows with new events and ranks compare directly:
+    the trending list is a range scan of the rank index.
+    """
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True, related_name='trending'
+    )
+    rank = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rank', '-post'], name='posts_trending_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id}: {self.rank:.3f}"
@@ -0,0 +1,225 @@
+# posts/pagination.py
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import search, timeline
+from .models import Post
+
+
+class DefaultPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        Select the page like paginate_queryset(), but return its rows as an
+        unevaluated queryset slice (for posts/streaming.py).
+        """
+        self.request = request
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        return self.page.object_list
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor (keyset) pagination, keyed on (created_at, id) by default.
+
+    Ordering contract: results are always ordered by `ordering`, newest first
+    by default (`-created_at, -id`). The id breaks timestamp ties so the
+    order is total, and a page never skips or repeats rows while new rows
+    are inserted. Pages are forward-only: the response carries a `next`
+    link and no `previous` link.
+
+    Subclasses may key on other columns by overriding `ordering` (all fields
+    must sort in the same direction and the last one must be unique).
+
+    The `cursor` parameter is a signed token holding the key of the last row
+    of the previous page. It is opaque to clients, and a tampered or
+    malformed cursor is rejected with 404.
+
+    No COUNT(*) is issued unless the client passes `?count=true`.
+
+    Backwards compatibility: requests that send `?page=`, `?pagination=offset`
+    or a custom `?ordering=` get the previous page-number pagination
+    (DefaultPagination) unchanged.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    mode_query_param = 'pagination'
+    ordering = ('-created_at', '-id')
+    offset_pagination_class = DefaultPagination
+    signing_salt = 'posts.pagination.cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # ---- mode selection -------------------------------------------------
+    def use_offset(self, request):
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == 'offset'
+            or 'page' in params
+            or bool(params.get(api_settings.ORDERING_PARAM))
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    # ---- cursor encoding ------------------------------------------------
+    @property
+    def key_fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def encode_cursor(self, position):
+        values = [v.isoformat() if hasattr(v, 'isoformat') else v for v in position]
+        return signing.dumps(values, salt=self.signing_salt)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            values = signing.loads(token, salt=self.signing_salt)
+            if len(values) != len(self.ordering):
+                raise ValueError(token)
+            position = tuple(
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.key_fields, values)
+            )
+        except (signing.BadSignature, ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def position_of(self, row):
+        return tuple(getattr(row, name) for name in self.key_fields)
+
+    def after(self, position):
+        """Predicate selecting rows strictly after `position` in `ordering`."""
+        op = 'lt' if self.ordering[0].startswith('-') else 'gt'
+        fields = self.key_fields
+        predicate = Q()
+        for i, name in enumerate(fields):
+            equal = {fields[j]: position[j] for j in range(i)}
+            predicate |= Q(**equal, **{f'{name}__{op}': position[i]})
+        return predicate
+
+    # ---- pagination API -------------------------------------------------
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.use_offset(request):
+            self.offset_paginator = self.offset_pagination_class()
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+        self.offset_paginator = None
+
+        self.count = queryset.count() if self.wants_count(request) else None
+        size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        rows = list(queryset[:size + 1])
+        page = rows[:size]
+        self.next_position = self.position_of(page[-1]) if len(rows) > size else None
+        return page
+
+    def offset_page_queryset(self, queryset, request, view=None):
+        """The offset-mode page as a queryset slice; see DefaultPagination.page_queryset."""
+        self.request = request
+        self.offset_paginator = self.offset_pagination_class()
+        return self.offset_paginator.page_queryset(queryset, request, view)
+
+    def page_state(self):
+        """What identifies the current page beyond its rows (see posts/conditional.py)."""
+        if self.offset_paginator is not None:
+            page = self.offset_paginator.page
+            return (page.paginator.count, page.number, page.has_next())
+        return (self.count, self.next_position)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        payload = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+
+class TimelinePagination(KeysetPagination):
+    """
+    Keyset pagination over posts.timeline.read() for the home feed.
+
+    Same cursor and ordering contract as KeysetPagination; the offset
+    fallback runs the view's queryset instead of the timeline table.
+    """
+
+    def paginate_timeline(self, request):
+        self.request = request
+        self.offset_paginator = None
+        self.count = None
+        posts, self.next_position = timeline.read(
+            request.user, self.decode_cursor(request, Post), self.get_page_size(request)
+        )
+        return posts
+
+
+class SearchPagination(KeysetPagination):
+    """
+    KeysetPagination for PostViewSet, plus relevance-ranked search pages.
+
+    A rank has no stable row key, so for `?search=` the signed cursor holds
+    the offset into the ranked results instead. Plain listings and the
+    offset fallback behave exactly like KeysetPagination.
+    """
+
+    def decode_offset(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return 0
+        try:
+            offset = int(signing.loads(token, salt=self.signing_salt)[0])
+        except (signing.BadSignature, IndexError, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if offset < 0:
+            raise NotFound(self.invalid_cursor_message)
+        return offset
+
+    def paginate_search(self, request, queryset, query):
+        self.request = request
+        self.offset_paginator = None
+        size = self.get_page_size(request)
+        offset = self.decode_offset(request)
+        self.count = search.get_backend().count(query) if self.wants_count(request) else None
+
+        rows = search.search(queryset, query, offset, size + 1)
+        page = rows[:size]
+        self.next_position = (offset + size,) if len(rows) > size else None
+        return page
@@ -0,0 +1,240 @@
+# posts/response_cache.py
+"""
+Response cache for the post list (`/api/posts/`) and the home feed
+(`/api/feed/`).
+
+A cached entry holds the rendered JSON bytes of one page with `is_liked`
+set to false everywhere, plus the ids of the posts on it. The post list is
+cached once for everybody; the feed once per user. On a hit, the viewer's
+likes among those ids are fetched with one indexed query and overlaid on
+the stored bytes (which are only re-parsed if the viewer liked something on
+the page), so neither the page query nor PostSerializer runs.
+
+Invalidation is generational. Every entry records the version tokens it
+was built from:
+
+* `list`          — bumped when a post is created or deleted,
+* `feed:<user>`   — bumped when a followee posts, or the user (un)follows,
+* `pulled`        — bumped when an author above TIMELINE_FANOUT_FOLLOWER_LIMIT
+                    posts; their followers are not walked, and every feed
+                    entry carries this token instead (such posts are merged
+                    into feeds at read time, see posts/timeline.py),
+* `post:<id>`     — bumped when the post is edited, liked/unliked or
+                    commented on (its counters are part of the body).
+
+posts/signals.py bumps them (by deleting the token) as those rows change;
+an entry whose tokens no longer match is treated as a miss. The post tokens
+of a new entry are read after its page, so the page's rows are checked
+against the database once more before storing; a row that changed in
+between means the entry is not stored. Writes that
+bypass model signals (bulk_create, queryset.update, the reconcile command)
+are bounded by POSTS_RESPONSE_CACHE_TTL.
+
+Entries live in the cache alias named by POSTS_RESPONSE_CACHE (see CACHES
+in settings: locmem by default, file-based or a shared server in
+deployment). Set POSTS_RESPONSE_CACHE_TTL to 0 to disable caching.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import Follow
+from .models import Like, Post
+
+PREFIX = 'posts:resp'
+CACHEABLE_PARAMS = {'cursor', 'page_size'}
+# The post columns a cached body depends on (PostSerializer, minus the author)
+SNAPSHOT_FIELDS = ('pk', 'updated_at', 'likes_count', 'comments_count')
+FOLLOWER_CHUNK = 1000
+
+stats = {'hits': 0, 'misses': 0, 'stores': 0}
+
+
+def ttl():
+    return getattr(settings, 'POSTS_RESPONSE_CACHE_TTL', 300)
+
+
+def cache():
+    return caches[getattr(settings, 'POSTS_RESPONSE_CACHE', 'default')]
+
+
+# ---- versions --------------------------------------------------------------
+def list_version_key():
+    return f'{PREFIX}:v:list'
+
+
+def feed_version_key(user_id):
+    return f'{PREFIX}:v:feed:{user_id}'
+
+
+def post_version_key(post_id):
+    return f'{PREFIX}:v:post:{post_id}'
+
+
+def pulled_version_key():
+    return f'{PREFIX}:v:pulled'
+
+
+def current_versions(keys):
+    """Tokens for `keys`, creating any that are missing."""
+    store = cache()
+    versions = store.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            store.add(key, uuid.uuid4().hex, timeout=None)
+        versions.update(store.get_many(missing))
+    return versions
+
+
+def _bump(keys):
+    keys = list(keys)
+    if not keys:
+        return
+    cache().delete_many(keys)
+    # Again after commit, in case a reader rebuilt an entry from the
+    # pre-commit state in between.
+    transaction.on_commit(lambda: cache().delete_many(keys))
+
+
+def invalidate_list():
+    _bump([list_version_key()])
+
+
+def invalidate_posts(post_ids):
+    _bump(post_version_key(pk) for pk in post_ids)
+
+
+def invalidate_feeds(user_ids):
+    _bump(feed_version_key(pk) for pk in user_ids)
+
+
+def invalidate_pulled():
+    _bump([pulled_version_key()])
+
+
+def invalidate_follower_feeds(author_id):
+    follower_ids = (
+        Follow.objects.filter(following_id=author_id)
+        .values_list('follower_id', flat=True)
+        .iterator(chunk_size=FOLLOWER_CHUNK)
+    )
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(follower_id)
+        if len(batch) >= FOLLOWER_CHUNK:
+            invalidate_feeds(batch)
+            batch = []
+    invalidate_feeds(batch)
+
+
+# ---- entries ---------------------------------------------------------------
+def entry_key(name, scope, request):
+    params = sorted(request.query_params.items())
+    digest = hashlib.blake2b(repr((request.get_host(), params)).encode(), digest_size=16)
+    # "e2": entries whose fingerprint is a bare digest (no Last-Modified).
+    return f'{PREFIX}:e2:{name}:{scope}:{digest.hexdigest()}'
+
+
+def is_cacheable(request):
+    return (
+        ttl() > 0
+        and request.method == 'GET'
+        and getattr(request.accepted_renderer, 'format', None) == 'json'
+        and set(request.query_params) <= CACHEABLE_PARAMS
+    )
+
+
+def get(key):
+    store = cache()
+    entry = store.get(key)
+    if entry is not None:
+        current = store.get_many(list(entry['versions']))
+        if current == entry['versions']:
+            stats['hits'] += 1
+            return entry
+    stats['misses'] += 1
+    return None
+
+
+def snapshot(rows):
+    return {tuple(getattr(row, field) for field in SNAPSHOT_FIELDS) for row in rows}
+
+
+def store(key, data, rows, versions, fingerprint):
+    """
+    Cache `data` (a paginated payload of PostSerializer `rows`) in its shared
+    form, unless a row changed since it was loaded.
+    """
+    post_ids = [row.pk for row in rows]
+    versions = {**versions, **current_versions([post_version_key(pk) for pk in post_ids])}
+    # A bump between loading the rows and reading their tokens above would
+    # go unnoticed; a row that is still unchanged now cannot have had one.
+    if post_ids and snapshot(rows) != set(
+        Post.objects.filter(pk__in=post_ids).values_list(*SNAPSHOT_FIELDS)
+    ):
+        return
+    shared = {**data, 'results': [{**row, 'is_liked': False} for row in data['results']]}
+    cache().set(key, {
+        'body': JSONRenderer().render(shared),
+        'ids': list(post_ids),
+        'versions': versions,
+        'fingerprint': fingerprint,
+    }, ttl())
+    stats['stores'] += 1
+
+
+def liked_ids(user, post_ids):
+    if not user.is_authenticated or not post_ids:
+        return set()
+    return set(Like.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True))
+
+
+def overlay(body, liked):
+    """Set `is_liked` for the viewer's liked posts in a cached page body."""
+    if not liked:
+        return body
+    data = json.loads(body)
+    for row in data['results']:
+        row['is_liked'] = row['id'] in liked
+    return JSONRenderer().render(data)
+
+
+class CachedListMixin:
+    """
+    Serve keyset list pages from the response cache. Views implement
+    `cache_scope(request)`, `cache_version_keys(request)` and pass a
+    `load_page()` callable returning the page's post rows. Works together
+    with ConditionalGetMixin (the stored fingerprint keeps ETags identical
+    on hits and misses).
+    """
+    cache_name = None
+
+    def cached_list(self, request, load_page):
+        cacheable = is_cacheable(request)
+        if cacheable:
+            key = entry_key(self.cache_name, self.cache_scope(request), request)
+            entry = get(key)
+            if entry is not None:
+                liked = liked_ids(request.user, entry['ids'])
+                personal = tuple((pk, pk in liked) for pk in entry['ids'])
+                response = self.not_modified_by(request, entry['fingerprint'], personal)
+                if response is not None:
+                    return response
+                return HttpResponse(overlay(entry['body'], liked), content_type='application/json')
+            versions = current_versions(self.cache_version_keys(request))
+
+        rows = load_page()
+        response = self.not_modified(request, rows, self.page_state())
+        if response is not None:
+            return response
+        response = self.get_paginated_response(self.get_serializer(rows, many=True).data)
+        if cacheable:
+            store(key, response.data, rows, versions, self.fingerprint)
+        return response
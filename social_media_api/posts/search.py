@@ -0,0 +1,196 @@
+# posts/search.py
+"""
+Full-text search over posts.
+
+The backend is picked from POSTS_SEARCH_BACKEND ('auto' by default):
+
+* SQLite: an FTS5 external-content table `posts_post_fts` over
+  (title, content), kept in sync with posts_post by triggers (migration
+  0006), ranked with bm25.
+* PostgreSQL: a GIN index on the weighted tsvector of title (A) and
+  content (B), ranked with ts_rank. The index is an expression index, so
+  PostgreSQL maintains it on every insert/update/delete.
+* Anything else (or 'basic'): the old `icontains` scan, newest first.
+
+Ranking every match of a very common term costs time linear in the number
+of matches, so only the POSTS_SEARCH_MAX_CANDIDATES most recent matches
+are ranked (walked in id order straight off the index) — the result list is
+"most relevant among the newest N matches" and ends after N results.
+
+`search(queryset, query, offset, limit)` returns one page of posts from
+`queryset` in relevance order; FullTextSearchFilter restricts a queryset to
+matching posts for the page-number (offset) listing mode.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+TITLE_WEIGHT = 4.0  # bm25 column weight for title relative to content
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def max_candidates():
+    return getattr(settings, 'POSTS_SEARCH_MAX_CANDIDATES', 2000)
+
+
+class BasicSearchBackend:
+    name = 'basic'
+
+    def matches(self, query):
+        terms = _WORD.findall(query)
+        predicate = Q()
+        for term in terms:
+            predicate &= Q(title__icontains=term) | Q(content__icontains=term)
+        return Post.objects.filter(predicate) if terms else Post.objects.none()
+
+    def filter(self, queryset, query):
+        return queryset.filter(pk__in=self.matches(query).values('pk'))
+
+    def ranked_ids(self, query, offset, limit):
+        rows = self.matches(query).order_by('-created_at', '-id').values_list('pk', flat=True)
+        return list(rows[offset:offset + limit])
+
+    def count(self, query):
+        return self.matches(query).count()
+
+    def rebuild(self):
+        pass
+
+
+class SqliteFTSBackend(BasicSearchBackend):
+    name = 'sqlite_fts5'
+
+    @staticmethod
+    def fts_query(query):
+        # Quote every word so user input is never parsed as FTS5 syntax;
+        # adjacent quoted terms are ANDed.
+        return ' '.join(f'"{term}"' for term in _WORD.findall(query))
+
+    def filter(self, queryset, query):
+        fts = self.fts_query(query)
+        if not fts:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (fts,))
+        )
+
+    def ranked_ids(self, query, offset, limit):
+        fts = self.fts_query(query)
+        if not fts:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM ('
+                f'  SELECT rowid, bm25({FTS_TABLE}, %s, 1.0) AS score FROM {FTS_TABLE}'
+                f'  WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s'
+                f') ORDER BY score, rowid DESC LIMIT %s OFFSET %s',
+                (TITLE_WEIGHT, fts, max_candidates(), limit, offset),
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def count(self, query):
+        fts = self.fts_query(query)
+        if not fts:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (fts,))
+            return min(cursor.fetchone()[0], max_candidates())
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+    name = 'postgres'
+    config = 'english'
+
+    @classmethod
+    def vector(cls):
+        # Must stay identical to the indexed expression in migration 0006.
+        from django.contrib.postgres.search import SearchVector
+
+        return (
+            SearchVector('title', weight='A', config=cls.config)
+            + SearchVector('content', weight='B', config=cls.config)
+        )
+
+    def matches(self, query):
+        from django.contrib.postgres.search import SearchQuery
+
+        search_query = SearchQuery(query, search_type='websearch', config=self.config)
+        return Post.objects.annotate(search=self.vector()).filter(search=search_query)
+
+    def ranked_ids(self, query, offset, limit):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(query, search_type='websearch', config=self.config)
+        candidates = (
+            Post.objects.annotate(search=self.vector()).filter(search=search_query)
+            .order_by('-id').values('pk')[:max_candidates()]
+        )
+        rows = (
+            Post.objects.filter(pk__in=candidates)
+            .annotate(search_rank=SearchRank(self.vector(), search_query))
+            .order_by('-search_rank', '-id')
+            .values_list('pk', flat=True)
+        )
+        return list(rows[offset:offset + limit])
+
+    def count(self, query):
+        return min(super().count(query), max_candidates())
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (BasicSearchBackend, SqliteFTSBackend, PostgresSearchBackend)
+}
+
+
+_fts5_available = {}
+
+
+def _fts5_table_exists():
+    # One introspection query per database, not per request.
+    name = connection.settings_dict['NAME']
+    if name not in _fts5_available:
+        _fts5_available[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts5_available[name]
+
+
+def get_backend():
+    name = getattr(settings, 'POSTS_SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        if connection.vendor == 'postgresql':
+            name = 'postgres'
+        elif connection.vendor == 'sqlite' and _fts5_table_exists():
+            name = 'sqlite_fts5'
+        else:
+            name = 'basic'
+    return BACKENDS[name]()
+
+
+def search(queryset, query, offset=0, limit=10):
+    """One page of `queryset` rows matching `query`, most relevant first."""
+    ids = get_backend().ranked_ids(query, offset, limit)
+    by_id = queryset.in_bulk(ids)
+    return [by_id[pk] for pk in ids if pk in by_id]
+
+
+class FullTextSearchFilter(SearchFilter):
+    """`?search=` through the configured backend instead of LIKE '%q%' scans."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = ' '.join(self.get_search_terms(request))
+        if not query:
+            return queryset
+        return get_backend().filter(queryset, query)
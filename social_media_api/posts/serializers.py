@@ -1,6 +1,9 @@
 # posts/serializers.py
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from notifications.dispatch import notify
 from .models import Post, Comment, Like
 
 User = get_user_model()
@@ -21,27 +24,21 @@ class CommentSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         request = self.context.get('request')
         validated_data['author'] = request.user
-        comment = super().create(validated_data)
-
-        # notify post author (if not self)
-        try:
-            from notifications.models import Notification
-            if comment.post.author_id != request.user.id:
-                Notification.objects.create(
-                    recipient=comment.post.author,
-                    actor=request.user,
-                    verb='commented',
-                    target=comment.post  # generic target
-                )
-        except Exception:
-            pass  # keep API resilient even if notifications fail
+        with transaction.atomic():
+            comment = super().create(validated_data)
+            Post.objects.filter(pk=comment.post_id).update(
+                comments_count=F('comments_count') + 1
+            )
 
+        # notify post author (skipped for self-comments; delivered asynchronously)
+        notify(comment.post.author_id, request.user, 'commented', target=comment.post)
         return comment
 
 class PostSerializer(serializers.ModelSerializer):
     author = AuthorMiniSerializer(read_only=True)
-    comments_count = serializers.IntegerField(source='comments.count', read_only=True)
-    likes_count = serializers.IntegerField(source='likes.count', read_only=True)
+    # is_liked is read from the Post.objects.for_listing() annotation; the
+    # fallback only runs for instances that did not come from that queryset
+    # (e.g. the response to a create). Counts are denormalized columns.
     is_liked = serializers.SerializerMethodField()
 
     class Meta:
@@ -56,7 +53,18 @@ class PostSerializer(serializers.ModelSerializer):
             'comments_count', 'likes_count', 'is_liked'
         )
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Set by CommentPreviewMixin (views.py) when the client asks for ?comments=N.
+        if hasattr(instance, 'comment_preview'):
+            data['latest_comments'] = CommentSerializer(
+                instance.comment_preview, many=True, context=self.context
+            ).data
+        return data
+
     def get_is_liked(self, obj):
+        if hasattr(obj, 'is_liked'):
+            return obj.is_liked
         request = self.context.get('request')
         if not request or not request.user or not request.user.is_authenticated:
             return False
@@ -0,0 +1,74 @@
+# posts/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Follow
+from . import response_cache, timeline, trending
+from .models import Comment, Like, Post
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out_post(instance)
+
+
+# ---- response cache invalidation (see posts/response_cache.py) ------------
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        response_cache.invalidate_list()
+        if timeline.is_high_follower(instance.author_id):
+            # Too many followers to walk here; every feed entry carries the
+            # "pulled" token instead.
+            response_cache.invalidate_pulled()
+        else:
+            response_cache.invalidate_follower_feeds(instance.author_id)
+    else:
+        response_cache.invalidate_posts([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    response_cache.invalidate_list()
+    response_cache.invalidate_posts([instance.pk])
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+def counter_row_saved(sender, instance, created, **kwargs):
+    if created:
+        response_cache.invalidate_posts([instance.post_id])
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def counter_row_deleted(sender, instance, **kwargs):
+    response_cache.invalidate_posts([instance.post_id])
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    response_cache.invalidate_feeds([instance.follower_id])
+
+
+
+# ---- trending scores (see posts/trending.py) -------------------------------
+def _event_weight(sender):
+    return trending.like_weight() if sender is Like else trending.comment_weight()
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+def engagement_added(sender, instance, created, **kwargs):
+    if created:
+        trending.record(instance.post_id, _event_weight(sender), instance.created_at)
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def engagement_removed(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Post) or getattr(origin, 'model', None) is Post:
+        return  # the post (and its score row) is being deleted anyway
+    trending.withdraw(instance.post_id, _event_weight(sender), instance.created_at)
@@ -0,0 +1,110 @@
+# posts/streaming.py
+"""
+Streaming JSON for large list responses.
+
+A normal list response evaluates the whole page, serializes every row and
+renders one bytes object, so memory grows with the page size. Here the
+rows come from `queryset.iterator(chunk_size)` (a server-side cursor on
+PostgreSQL, chunked fetches elsewhere) and are serialized and rendered
+STREAMING_CHUNK_SIZE rows at a time into a StreamingHttpResponse. The body
+is byte-for-byte the same JSON document the paginator would have produced.
+
+StreamingListMixin streams:
+
+* page-number pages (`?page=` / `?pagination=offset`) with a page_size of
+  at least STREAMING_MIN_PAGE_SIZE — same envelope (count/next/previous);
+* the whole list when the view sets `stream_all_allowed` and the client
+  passes `?stream=true` — `{"next": null, "results": [...]}` plus whatever
+  `stream_envelope()` adds.
+
+Each chunk passes through `prepare_chunk()` before it is serialized, so
+views can attach per-page data (e.g. comment previews) one chunk at a time.
+
+Only the JSON renderer is streamed (the browsable API renders as before),
+and streamed responses carry no ETag: validators need every row up front.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+STREAM_PARAM = 'stream'
+
+
+def chunk_size():
+    return getattr(settings, 'STREAMING_CHUNK_SIZE', 500)
+
+
+def min_page_size():
+    return getattr(settings, 'STREAMING_MIN_PAGE_SIZE', 200)
+
+
+def render_stream(envelope, rows, serialize, size=None):
+    """
+    Yield `envelope` rendered as JSON with its 'results' list filled from
+    `rows`, serialized (`serialize(list_of_rows) -> list`) `size` at a time.
+    """
+    renderer = JSONRenderer()
+    head = renderer.render({**envelope, 'results': []})
+    # 'results' is the last key, so the document ends in '[]}'.
+    yield head[:-2]
+    rows, size, first = iter(rows), size or chunk_size(), True
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            break
+        body = renderer.render(serialize(chunk))[1:-1]
+        yield body if first else b',' + body
+        first = False
+    yield head[-2:]
+
+
+class StreamingListMixin:
+    stream_all_allowed = False
+
+    def is_json(self, request):
+        return getattr(request.accepted_renderer, 'format', None) == 'json'
+
+    def wants_stream(self, request):
+        value = request.query_params.get(STREAM_PARAM, '').lower()
+        return self.stream_all_allowed and self.is_json(request) and value in ('1', 'true', 'yes')
+
+    def streams_page(self, request):
+        paginator = self.paginator
+        if paginator is None or not paginator.use_offset(request) or not self.is_json(request):
+            return False
+        return paginator.offset_pagination_class().get_page_size(request) >= min_page_size()
+
+    def stream_envelope(self, request):
+        return {'next': None}
+
+    def prepare_chunk(self, rows):
+        """Hook: the list of rows about to be serialized."""
+        return rows
+
+    def streaming_response(self, envelope, queryset):
+        rows = queryset.iterator(chunk_size=chunk_size())
+
+        def serialize(chunk):
+            return self.get_serializer(self.prepare_chunk(chunk), many=True).data
+
+        return StreamingHttpResponse(
+            render_stream(envelope, rows, serialize), content_type='application/json'
+        )
+
+    def stream_page(self, request, queryset):
+        rows = self.paginator.offset_page_queryset(queryset, request, view=self)
+        envelope = dict(self.paginator.get_paginated_response([]).data)
+        del envelope['results']
+        return self.streaming_response(envelope, rows)
+
+    def stream_all(self, request, queryset):
+        return self.streaming_response(self.stream_envelope(request), queryset)
+
+    def list(self, request, *args, **kwargs):
+        if self.wants_stream(request):
+            return self.stream_all(request, self.filter_queryset(self.get_queryset()))
+        if self.streams_page(request):
+            return self.stream_page(request, self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
@@ -1,3 +1,801 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts import graph
+from accounts.models import Follow, User
+from query_metrics import stats as query_stats
+from . import response_cache, throttling, transfer, trending
+from .models import Post, Comment, Like, TimelineEntry, TrendingScore
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostListingQueryCountTests(APITestCase):
+    """A page of posts must cost the same number of queries whatever its size."""
+
+    def setUp(self):
+        self.viewer = User.objects.create_user(username='viewer')
+        for i in range(12):
+            author = User.objects.create_user(username=f'author{i}')
+            self.viewer.following.add(author)
+            post = Post.objects.create(
+                author=author, title=f'Post {i}', content='body',
+                comments_count=1, likes_count=i % 2,
+            )
+            Comment.objects.create(post=post, author=self.viewer, content='nice')
+            if i % 2:
+                Like.objects.create(post=post, user=self.viewer)
+        self.client.force_authenticate(user=self.viewer)
+
+    def count_queries(self, url, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, {'page_size': page_size})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data['results']), page_size)
+        return len(ctx.captured_queries), resp
+
+    def test_post_list_query_count_is_constant(self):
+        url = reverse('post-list')
+        small, _ = self.count_queries(url, 2)
+        large, resp = self.count_queries(url, 10)
+        self.assertEqual(small, large)
+
+        post = resp.data['results'][0]
+        self.assertEqual(post['comments_count'], 1)
+        self.assertEqual(post['likes_count'], 1)
+        self.assertTrue(post['is_liked'])
+
+    def test_feed_query_count_is_constant(self):
+        url = reverse('feed')
+        small, _ = self.count_queries(url, 2)
+        large, _ = self.count_queries(url, 10)
+        self.assertEqual(small, large)
+
+    @override_settings(QUERY_METRICS_SERVER_TIMING=True)
+    def test_serializer_issues_no_queries(self):
+        # query_metrics counts the queries run inside serializer.data: any
+        # there is a per-row lookup the queryset should have joined.
+        query_stats.reset()
+        resp = self.client.get(reverse('post-list'), {'page_size': 10, 'comments': 2})
+        self.assertIn('serialize;dur=', resp['Server-Timing'])
+        view = query_stats.snapshot()['GET post-list']
+        self.assertGreater(view['avg_queries'], 0)
+        self.assertEqual(view['avg_serialize_queries'], 0)
+
+    def test_anonymous_list_reports_not_liked(self):
+        self.client.force_authenticate(user=None)
+        resp = self.client.get(reverse('post-list'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(p['is_liked'] for p in resp.data['results']))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostCounterTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.fan = User.objects.create_user(username='fan')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='body')
+        self.client.force_authenticate(user=self.fan)
+
+    def test_like_and_unlike_maintain_likes_count(self):
+        self.client.post(reverse('post-like', args=[self.post.pk]))
+        self.client.post(reverse('post-like', args=[self.post.pk]))  # idempotent
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+        self.client.post(reverse('post-unlike', args=[self.post.pk]))
+        self.client.post(reverse('post-unlike', args=[self.post.pk]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_comment_create_and_delete_maintain_comments_count(self):
+        resp = self.client.post(
+            reverse('comment-list'), {'post': self.post.pk, 'content': 'hi'}, format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+        self.client.delete(reverse('comment-detail', args=[resp.data['id']]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_reconcile_post_counters_repairs_drift(self):
+        Like.objects.create(post=self.post, user=self.fan)
+        Comment.objects.create(post=self.post, author=self.fan, content='hi')
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7, comments_count=0)
+
+        out = StringIO()
+        call_command('reconcile_post_counters', '--chunk-size=1', stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (1, 1))
+        self.assertIn('fixed 1', out.getvalue())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TimelineTests(APITestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(username='viewer')
+        self.author = User.objects.create_user(username='author')
+        self.client.force_authenticate(user=self.viewer)
+
+    def feed_titles(self, **params):
+        resp = self.client.get(reverse('feed'), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [p['title'] for p in resp.data['results']], resp.data['next']
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        Post.objects.create(author=self.author, title='old', content='x')
+        self.client.post(reverse('follow-user', args=[self.author.pk]))
+        Post.objects.create(author=self.author, title='new', content='x')
+
+        titles, _ = self.feed_titles()
+        self.assertEqual(titles, ['new', 'old'])
+        self.assertEqual(TimelineEntry.objects.filter(user=self.viewer).count(), 2)
+
+    def test_unfollow_prunes_timeline(self):
+        self.client.post(reverse('follow-user', args=[self.author.pk]))
+        Post.objects.create(author=self.author, title='p', content='x')
+        self.client.post(reverse('unfollow-user', args=[self.author.pk]))
+
+        titles, _ = self.feed_titles()
+        self.assertEqual(titles, [])
+        self.assertFalse(TimelineEntry.objects.filter(user=self.viewer).exists())
+
+    @override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=1)
+    def test_high_follower_authors_are_merged_at_read_time(self):
+        regular = User.objects.create_user(username='regular')
+        other_fan = User.objects.create_user(username='other')
+        graph.follow(other_fan, self.author)  # author now has 2 followers > limit
+        self.client.post(reverse('follow-user', args=[self.author.pk]))
+        self.client.post(reverse('follow-user', args=[regular.pk]))
+        Post.objects.create(author=self.author, title='celebrity', content='x')
+        Post.objects.create(author=regular, title='regular', content='x')
+
+        self.assertFalse(TimelineEntry.objects.filter(author=self.author).exists())
+        self.assertTrue(TimelineEntry.objects.filter(author=regular).exists())
+        titles, _ = self.feed_titles()
+        self.assertEqual(titles, ['regular', 'celebrity'])
+
+    def test_cursor_walks_every_post_once(self):
+        self.client.post(reverse('follow-user', args=[self.author.pk]))
+        for i in range(5):
+            Post.objects.create(author=self.author, title=f'p{i}', content='x')
+
+        seen, params = [], {'page_size': 2}
+        while True:
+            titles, next_url = self.feed_titles(**params)
+            seen.extend(titles)
+            if not next_url:
+                break
+            params = {'page_size': 2, 'cursor': parse_qs(urlparse(next_url).query)['cursor'][0]}
+        self.assertEqual(seen, ['p4', 'p3', 'p2', 'p1', 'p0'])
+
+    def test_invalid_cursor_is_rejected(self):
+        resp = self.client.get(reverse('feed'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rebuild_batches_per_chunk_of_followers(self):
+        authors = [User.objects.create_user(username=f'a{i}') for i in range(4)]
+        followers = [User.objects.create_user(username=f'f{i}') for i in range(6)]
+        for author in authors:
+            Post.objects.create(author=author, title=f'by {author.username}', content='x')
+        Follow.objects.bulk_create(Follow(follower=f, following=a) for f in followers for a in authors)
+        stale = Post.objects.create(author=self.author, title='stale', content='x')
+        TimelineEntry.objects.create(user=followers[0], post=stale, author=self.author,
+                                     created_at=stale.created_at)
+
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('rebuild_timelines', '--chunk-size=100', stdout=StringIO())
+        # 24 follow edges; the query count follows the 6 followers instead.
+        self.assertLess(len(ctx.captured_queries), 40)
+        self.assertEqual(TimelineEntry.objects.filter(author__in=authors).count(), 24)
+        self.assertFalse(TimelineEntry.objects.filter(post=stale).exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.posts = [
+            Post.objects.create(author=self.user, title=f'p{i}', content='x') for i in range(5)
+        ]
+        # Force a timestamp tie so the id tie-breaker is exercised.
+        Post.objects.filter(pk__in=[p.pk for p in self.posts[1:4]]).update(
+            created_at=self.posts[1].created_at
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def walk(self, url, **params):
+        seen = []
+        while True:
+            resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', resp.data)
+            seen.extend(row['id'] for row in resp.data['results'])
+            if not resp.data['next']:
+                return seen
+            params['cursor'] = parse_qs(urlparse(resp.data['next']).query)['cursor'][0]
+
+    def test_cursor_walk_is_total_and_newest_first(self):
+        seen = self.walk(reverse('post-list'), page_size=2)
+        expected = list(
+            Post.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_comments_walk_oldest_first(self):
+        comments = [
+            Comment.objects.create(post=self.posts[0], author=self.user, content=str(i))
+            for i in range(3)
+        ]
+        seen = self.walk(reverse('comment-list'), page_size=2)
+        self.assertEqual(seen, [c.pk for c in comments])
+
+    def test_tampered_cursor_is_rejected(self):
+        resp = self.client.get(reverse('post-list'), {'page_size': 2})
+        cursor = parse_qs(urlparse(resp.data['next']).query)['cursor'][0]
+        resp = self.client.get(reverse('post-list'), {'cursor': cursor[:-1] + 'x'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_count_is_opt_in(self):
+        resp = self.client.get(reverse('post-list'), {'count': 'true'})
+        self.assertEqual(resp.data['count'], 5)
+
+    def test_page_param_keeps_offset_pagination(self):
+        resp = self.client.get(reverse('post-list'), {'page': 2, 'page_size': 2})
+        self.assertEqual(resp.data['count'], 5)
+        self.assertIn('previous', resp.data)
+        self.assertEqual(len(resp.data['results']), 2)
+
+    def test_feed_offset_fallback(self):
+        viewer = User.objects.create_user(username='viewer')
+        viewer.following.add(self.user)
+        self.client.force_authenticate(user=viewer)
+        resp = self.client.get(reverse('feed'), {'pagination': 'offset'})
+        self.assertEqual(resp.data['count'], 5)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostSearchTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        make = lambda title, content: Post.objects.create(author=self.author, title=title, content=content)
+        self.in_title = make('Running shoes review', 'Comfortable and light.')
+        self.in_body = make('Weekend notes', 'Went running by the river.')
+        self.other = make('Cooking', 'Pasta with garlic.')
+        self.client.force_authenticate(user=self.author)
+
+    def search(self, query, **params):
+        resp = self.client.get(reverse('post-list'), {'search': query, **params})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data
+
+    def test_results_are_stemmed_and_ranked(self):
+        ids = [p['id'] for p in self.search('run')['results']]
+        self.assertEqual(ids, [self.in_title.pk, self.in_body.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.in_title.delete()
+        self.other.content = 'Pasta, then a run.'
+        self.other.save()
+        ids = {p['id'] for p in self.search('running')['results']}
+        self.assertEqual(ids, {self.in_body.pk, self.other.pk})
+
+    def test_ranked_pages_follow_cursor(self):
+        first = self.search('running', page_size=1, count='true')
+        self.assertEqual(first['count'], 2)
+        second = self.client.get(first['next'])
+        self.assertEqual(
+            [p['id'] for p in first['results'] + second.data['results']],
+            [self.in_title.pk, self.in_body.pk],
+        )
+        self.assertIsNone(second.data['next'])
+
+    def test_offset_mode_filters_listing(self):
+        data = self.search('garlic', page=1)
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['id'], self.other.pk)
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('running"*( -')['results'][0]['id'], self.in_title.pk)
+        self.assertEqual(self.search('***')['results'], [])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='World')
+        self.client.force_authenticate(user=self.reader)
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_detail_returns_304_until_changed(self):
+        url = reverse('post-detail', args=[self.post.pk])
+        first = self.client.get(url)
+        self.assertIn('private', first['Cache-Control'])
+        self.assertNotIn('Last-Modified', first)
+
+        second = self.revalidate(url, first['ETag'])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second.content, b'')
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        # Liking changes only counters / is_liked, not updated_at.
+        self.client.post(reverse('post-like', args=[self.post.pk]))
+        third = self.revalidate(url, first['ETag'])
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+        self.assertTrue(third.data['is_liked'])
+
+    def test_if_modified_since_is_ignored(self):
+        # A like moves likes_count but not updated_at; a date validator would 304.
+        url = reverse('post-list')
+        self.client.get(url)
+        self.client.post(reverse('post-like', args=[self.post.pk]))
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+
+    def test_list_etag_follows_new_posts(self):
+        url = reverse('post-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        Post.objects.create(author=self.author, title='Second', content='post')
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_200_OK)
+
+    def test_etag_is_per_user(self):
+        url = reverse('post-detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        self.client.force_authenticate(user=self.author)
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_200_OK)
+
+    def test_feed_revalidates(self):
+        graph.follow(self.reader, self.author)
+        Post.objects.create(author=self.author, title='Fresh', content='post')
+        url = reverse('feed')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.author = User.objects.create_user(username='author')
+        self.alice = User.objects.create_user(username='alice')
+        self.bob = User.objects.create_user(username='bob')
+        self.posts = [
+            Post.objects.create(author=self.author, title=f'Post {i}', content='body')
+            for i in range(3)
+        ]
+        self.url = reverse('post-list')
+
+    def get(self, user, url=None, **headers):
+        self.client.force_authenticate(user=user)
+        return self.client.get(url or self.url, **headers)
+
+    def results(self, resp):
+        return {row['id']: row for row in json.loads(resp.content)['results']}
+
+    def test_hit_skips_page_query_and_overlays_is_liked(self):
+        Like.objects.create(user=self.alice, post=self.posts[0])
+        self.get(self.bob)  # fills the shared entry
+        with self.assertNumQueries(1):  # the viewer's likes on the page
+            resp = self.get(self.alice)
+        rows = self.results(resp)
+        self.assertTrue(rows[self.posts[0].pk]['is_liked'])
+        self.assertFalse(rows[self.posts[1].pk]['is_liked'])
+        self.assertFalse(self.results(self.get(self.bob))[self.posts[0].pk]['is_liked'])
+
+    def test_post_like_and_comment_signals_invalidate(self):
+        self.get(self.bob)
+        new = Post.objects.create(author=self.author, title='New', content='body')
+        self.assertIn(new.pk, self.results(self.get(self.bob)))
+
+        Like.objects.create(user=self.alice, post=self.posts[1])
+        Comment.objects.create(post=self.posts[1], author=self.alice, content='hi')
+        Post.objects.filter(pk=self.posts[1].pk).update(likes_count=1, comments_count=1)
+        row = self.results(self.get(self.bob))[self.posts[1].pk]
+        self.assertEqual((row['likes_count'], row['comments_count']), (1, 1))
+
+    def test_etag_matches_between_miss_and_hit(self):
+        etag = self.get(self.alice)['ETag']
+        resp = self.get(self.alice, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_feed_is_per_user_and_follows_graph(self):
+        feed = reverse('feed')
+        self.assertEqual(self.results(self.get(self.alice, feed)), {})
+        self.client.post(reverse('follow-user', args=[self.author.pk]))
+        self.assertEqual(len(self.results(self.get(self.alice, feed))), 3)
+        self.assertEqual(self.results(self.get(self.bob, feed)), {})
+
+        Post.objects.create(author=self.author, title='Fresh', content='body')
+        self.assertEqual(len(self.results(self.get(self.alice, feed))), 4)
+
+    @override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=0)
+    def test_high_follower_post_refreshes_feeds_without_walking_followers(self):
+        feed = reverse('feed')
+        self.get(self.alice)
+        self.client.post(reverse('follow-user', args=[self.author.pk]))
+        self.assertEqual(len(self.results(self.get(self.alice, feed))), 3)
+
+        with CaptureQueriesContext(connection) as ctx:
+            Post.objects.create(author=self.author, title='Fresh', content='body')
+        self.assertFalse([q for q in ctx.captured_queries if 'accounts_follow' in q['sql']])
+        self.assertEqual(len(self.results(self.get(self.alice, feed))), 4)
+
+    def test_row_changed_after_loading_is_not_stored(self):
+        original = response_cache.current_versions
+
+        def versions_after_a_like(keys):
+            # A like lands between loading the page and reading its post tokens.
+            if any(':v:post:' in key for key in keys):
+                Post.objects.filter(pk=self.posts[0].pk).update(likes_count=1)
+                response_cache.invalidate_posts([self.posts[0].pk])
+            return original(keys)
+
+        with mock.patch.object(response_cache, 'current_versions', versions_after_a_like):
+            self.get(self.bob)
+        self.assertEqual(self.results(self.get(self.bob))[self.posts[0].pk]['likes_count'], 1)
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates},
+    })
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class WriteThrottleTests(APITestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        throttling.reset_metrics()
+        # Freeze the clock mid-window so no test straddles a window boundary.
+        clock = mock.patch.object(throttling.SlidingWindowThrottle, 'timer', lambda self: 90.0)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.author = User.objects.create_user(username='author')
+        self.user = User.objects.create_user(username='liker')
+        self.posts = [
+            Post.objects.create(author=self.author, title=f'Post {i}', content='body') for i in range(4)
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def like(self, post):
+        return self.client.post(reverse('post-like', args=[post.pk]))
+
+    @throttle_rates(likes='2/min')
+    def test_user_bucket_rejects_with_retry_after(self):
+        self.assertEqual(self.like(self.posts[0]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.like(self.posts[1]).status_code, status.HTTP_201_CREATED)
+        resp = self.like(self.posts[2])
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', resp)
+        self.assertEqual(throttling.metrics()['rejected'], {'likes:user': 1})
+        self.assertFalse(Like.objects.filter(post=self.posts[2]).exists())
+
+    @throttle_rates(comments_ip='2/min')
+    def test_ip_bucket_is_shared_across_accounts(self):
+        for username in ('one', 'two', 'three'):
+            self.client.force_authenticate(user=User.objects.create_user(username=username))
+            resp = self.client.post(
+                reverse('comment-list'), {'post': self.posts[0].pk, 'content': 'hi'}
+            )
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(throttling.metrics()['rejected'], {'comments:ip': 1})
+
+    def test_reads_are_not_throttled(self):
+        with throttle_rates(comments='1/min'):
+            for _ in range(3):
+                self.assertEqual(self.client.get(reverse('comment-list')).status_code, 200)
+
+    def test_sliding_window_estimate(self):
+        throttle = throttling.UserWriteThrottle('likes')
+        throttle.num_requests, throttle.duration = 10, 60
+        throttle.previous, throttle.current, throttle.elapsed = 10, 2, 30
+        self.assertEqual(throttle.estimate(), 7)  # half of the previous window still counts
+        self.assertEqual(throttle.wait(), 0.0)
+        throttle.current = 6  # estimate 11: over the limit until the previous window decays
+        self.assertAlmostEqual(throttle.wait(), 12.0)
+
+
+def ndjson(*records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ContentTransferTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice')
+        self.bob = User.objects.create_user(username='bob')
+        self.admin = User.objects.create_user(username='admin', is_staff=True)
+        self.existing = Post.objects.create(author=self.bob, title='Old', content='body')
+        self.body = ndjson(
+            {'type': 'post', 'ref': 'p1', 'author': 'alice', 'title': 'Hello',
+             'content': 'imported', 'created_at': '2020-05-01T10:00:00Z'},
+            {'type': 'comment', 'post': 'p1', 'author': 'bob', 'content': 'nice',
+             'created_at': '2020-05-01T11:00:00Z'},
+            {'type': 'like', 'post': 'p1', 'user': 'bob'},
+            {'type': 'like', 'post': 'p1', 'user': 'bob'},
+            {'type': 'like', 'post': self.existing.pk, 'user': 'alice'},
+            {'type': 'post', 'author': 'nobody', 'title': 'x', 'content': 'y'},
+            {'type': 'comment', 'post': 'missing', 'author': 'bob', 'content': 'z'},
+        ) + '{not json\n'
+
+    def import_body(self, **kwargs):
+        return transfer.import_ndjson(StringIO(self.body), **kwargs)
+
+    def test_import_creates_rows_counters_and_timestamps(self):
+        stats = self.import_body()
+        post = Post.objects.get(title='Hello')
+        self.assertEqual((stats.posts, stats.comments, stats.likes), (1, 1, 2))
+        self.assertEqual((stats.duplicates, stats.invalid), (1, 3))
+        self.assertEqual(sorted(line for line, _ in stats.errors), [6, 7, 8])
+        self.assertEqual(post.created_at.year, 2020)
+        self.assertEqual(post.comments.get().created_at.hour, 11)
+        self.assertEqual((post.likes_count, post.comments_count), (1, 1))
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.likes_count, 1)
+
+    def test_batch_resolves_authors_once(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.import_body()
+        user_lookups = [q for q in ctx.captured_queries if 'accounts_user' in q['sql']
+                        and 'username' in q['sql']]
+        self.assertEqual(len(user_lookups), 1)
+
+    def test_imported_posts_reach_follower_timelines(self):
+        graph.follow(self.bob, self.alice)
+        self.import_body()
+        post = Post.objects.get(title='Hello')
+        self.assertTrue(TimelineEntry.objects.filter(user=self.bob, post=post).exists())
+
+    def test_small_batches_keep_refs_across_batches(self):
+        stats = self.import_body(batch_size=2)
+        self.assertEqual(stats.batches, 4)
+        self.assertEqual(stats.comments, 1)
+
+    def test_non_decimal_digits_are_refs_not_ids(self):
+        stats = transfer.import_ndjson(StringIO(ndjson(
+            {'type': 'like', 'post': '²', 'user': 'alice'},
+            {'type': 'like', 'post': str(self.existing.pk), 'user': 'alice'},
+        )))
+        self.assertEqual((stats.likes, stats.invalid), (1, 1))
+        self.assertEqual(stats.errors, [(1, "unknown post '²'")])
+
+    @override_settings(POSTS_IMPORT_MAX_REFS=2)
+    def test_only_the_latest_refs_are_kept(self):
+        posts = [{'type': 'post', 'ref': f'p{i}', 'author': 'alice', 'title': 't', 'content': 'c'}
+                 for i in range(3)]
+        likes = [{'type': 'like', 'post': f'p{i}', 'user': 'bob'} for i in range(3)]
+        stats = transfer.import_ndjson(StringIO(ndjson(*posts, *likes)), batch_size=2)
+        self.assertEqual((stats.likes, stats.invalid), (2, 1))
+        self.assertIn('POSTS_IMPORT_MAX_REFS', stats.errors[0][1])
+
+    def test_export_round_trips(self):
+        self.import_body()
+        exported = ''.join(transfer.export_ndjson())
+        Post.objects.all().delete()
+        stats = transfer.import_ndjson(StringIO(exported))
+        self.assertEqual((stats.posts, stats.comments, stats.likes, stats.invalid), (2, 1, 2, 0))
+        self.assertEqual(Post.objects.get(title='Hello').created_at.year, 2020)
+
+    def test_api_is_admin_only_and_streams(self):
+        self.client.force_authenticate(user=self.alice)
+        resp = self.client.get(reverse('content-export'))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        resp = self.client.post(reverse('content-import'), data=self.body,
+                                content_type='application/x-ndjson')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['posts'], 1)
+
+        resp = self.client.get(reverse('content-export'), {'types': 'post'})
+        self.assertTrue(resp.streaming)
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        self.assertEqual({json.loads(line)['type'] for line in lines}, {'post'})
+        self.assertEqual(len(lines), 2)
+
+    def test_commands(self):
+        out = StringIO()
+        call_command('export_content', '--types', 'post', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 1)
+
+        path = Path(self.enterContext(tempfile.TemporaryDirectory())) / 'content.ndjson'
+        path.write_text(self.body)
+        out = StringIO()
+        call_command('import_content', str(path), stdout=out, stderr=StringIO())
+        self.assertIn('Imported 1 posts, 1 comments and 2 likes', out.getvalue())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, STREAMING_MIN_PAGE_SIZE=5, STREAMING_CHUNK_SIZE=3)
+class StreamingListTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        for i in range(12):
+            Post.objects.create(author=self.author, title=f'Post {i}', content='body')
+        self.client.force_authenticate(user=self.author)
+        self.url = reverse('post-list')
+
+    def test_large_offset_page_streams_the_same_document(self):
+        params = {'page': 1, 'page_size': 8}
+        streamed = self.client.get(self.url, params)
+        self.assertTrue(streamed.streaming)
+        body = json.loads(b''.join(streamed.streaming_content))
+        with override_settings(STREAMING_MIN_PAGE_SIZE=1000):
+            buffered = self.client.get(self.url, params)
+        self.assertFalse(buffered.streaming)
+        self.assertEqual(body, json.loads(buffered.content))
+        self.assertEqual((body['count'], len(body['results'])), (12, 8))
+
+    def test_streamed_pages_include_comment_previews(self):
+        post = Post.objects.order_by('-created_at').first()
+        Comment.objects.create(post=post, author=self.author, content='first')
+        params = {'page': 1, 'page_size': 8, 'comments': 2}
+        with self.assertNumQueries(5):  # count, page, one preview query per chunk of 3
+            streamed = self.client.get(self.url, params)
+            body = json.loads(b''.join(streamed.streaming_content))
+        with override_settings(STREAMING_MIN_PAGE_SIZE=1000):
+            buffered = self.client.get(self.url, params)
+        self.assertEqual(body, json.loads(buffered.content))
+        self.assertEqual([c['content'] for c in body['results'][0]['latest_comments']], ['first'])
+
+    def test_small_pages_and_keyset_pages_are_not_streamed(self):
+        self.assertFalse(self.client.get(self.url, {'page': 1, 'page_size': 4}).streaming)
+        self.assertFalse(self.client.get(self.url, {'page_size': 50}).streaming)
+
+    def test_stream_param_is_ignored_for_posts(self):
+        resp = self.client.get(self.url, {'stream': 'true'})
+        self.assertFalse(resp.streaming)
+
+    def test_empty_page_renders_valid_json(self):
+        resp = self.client.get(self.url, {'page': 1, 'page_size': 8, 'search': 'nomatch'})
+        self.assertEqual(json.loads(b''.join(resp.streaming_content))['results'], [])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, TRENDING_HALF_LIFE_HOURS=12)
+class TrendingTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.fans = [User.objects.create_user(username=f'fan{i}') for i in range(3)]
+        self.posts = [
+            Post.objects.create(author=self.author, title=f'Post {i}', content='body')
+            for i in range(3)
+        ]
+
+    def ranks(self):
+        return dict(TrendingScore.objects.values_list('post_id', 'rank'))
+
+    def test_events_update_scores_with_decay(self):
+        now = timezone.now()
+        Like.objects.create(post=self.posts[0], user=self.fans[0])
+        Comment.objects.create(post=self.posts[1], author=self.fans[0], content='hi')
+        # Two likes a half-life ago are worth one like now.
+        for fan in self.fans[:2]:
+            Like.objects.create(post=self.posts[2], user=fan, created_at=now - timedelta(hours=12))
+
+        ranks = self.ranks()
+        self.assertGreater(ranks[self.posts[1].pk], ranks[self.posts[0].pk])
+        self.assertAlmostEqual(ranks[self.posts[2].pk], ranks[self.posts[0].pk], places=3)
+        self.assertAlmostEqual(trending.score(ranks[self.posts[1].pk]), 3.0, places=2)
+
+    def test_withdraw_removes_contribution(self):
+        first = Like.objects.create(post=self.posts[0], user=self.fans[0])
+        Like.objects.create(post=self.posts[0], user=self.fans[1])
+        first.delete()
+        self.assertAlmostEqual(trending.score(self.ranks()[self.posts[0].pk]), 1.0, places=2)
+        Like.objects.filter(post=self.posts[0]).delete()
+        self.assertEqual(self.ranks(), {})
+
+    def test_deleting_a_post_skips_per_event_updates(self):
+        for fan in self.fans:
+            Like.objects.create(post=self.posts[0], user=fan)
+        with mock.patch.object(trending, 'withdraw') as withdraw:
+            self.posts[0].delete()
+        withdraw.assert_not_called()
+        self.assertEqual(self.ranks(), {})
+
+    def test_recompute_matches_incremental_scores(self):
+        now = timezone.now()
+        Like.objects.create(post=self.posts[0], user=self.fans[0], created_at=now - timedelta(hours=3))
+        Comment.objects.create(post=self.posts[1], author=self.fans[1], content='hi')
+        Like.objects.create(post=self.posts[2], user=self.fans[2], created_at=now - timedelta(days=5))
+        incremental = self.ranks()
+
+        stats = trending.recompute(window_hours=72)
+        self.assertEqual((stats.posts, stats.events), (2, 2))
+        recomputed = self.ranks()
+        self.assertNotIn(self.posts[2].pk, recomputed)  # outside the window
+        for pk, rank in recomputed.items():
+            self.assertAlmostEqual(rank, incremental[pk], places=3)
+
+    def test_endpoint_lists_top_posts_in_one_query(self):
+        Comment.objects.create(post=self.posts[2], author=self.fans[0], content='hi')
+        Like.objects.create(post=self.posts[0], user=self.fans[0])
+        with self.assertNumQueries(1):
+            posts = trending.top(limit=10)
+        self.assertEqual([p.pk for p in posts], [self.posts[2].pk, self.posts[0].pk])
+
+        resp = self.client.get(reverse('post-trending'), {'limit': 1})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in resp.data], [self.posts[2].pk])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CommentThreadTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.readers = [User.objects.create_user(username=f'reader{i}') for i in range(3)]
+        self.posts = [
+            Post.objects.create(author=self.author, title=f'Post {i}', content='body')
+            for i in range(3)
+        ]
+        self.comments = {
+            post.pk: [
+                Comment.objects.create(post=post, author=reader, content=f'{post.pk}-{i}')
+                for i, reader in enumerate(self.readers)
+            ]
+            for post in self.posts[:2]
+        }
+
+    def test_nested_endpoint_walks_one_thread(self):
+        post = self.posts[0]
+        url, params, seen = reverse('post-comments', args=[post.pk]), {'page_size': 2}, []
+        while url:
+            with self.assertNumQueries(2):  # post exists + one page with authors joined
+                resp = self.client.get(url, params)
+            seen.extend(row['id'] for row in resp.data['results'])
+            url, params = resp.data['next'], {}
+        self.assertEqual(seen, [c.pk for c in self.comments[post.pk]])
+        self.assertEqual(resp.data['results'][-1]['author']['username'], 'reader2')
+
+    def test_nested_endpoint_404s_for_missing_post(self):
+        resp = self.client.get(reverse('post-comments', args=[9999]))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_comment_list_joins_authors(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('comment-list'), {'page_size': 10})
+
+    def test_previews_use_one_windowed_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('post-list'), {'comments': 2})
+        self.assertEqual(len([q for q in ctx.captured_queries if 'posts_comment' in q['sql']]), 1)
+        rows = {row['id']: row for row in resp.data['results']}
+        newest = [c.pk for c in reversed(self.comments[self.posts[0].pk])][:2]
+        self.assertEqual([c['id'] for c in rows[self.posts[0].pk]['latest_comments']], newest)
+        self.assertEqual(rows[self.posts[2].pk]['latest_comments'], [])
+
+    def test_previews_are_opt_in_and_join_the_etag(self):
+        resp = self.client.get(reverse('post-detail', args=[self.posts[0].pk]))
+        self.assertNotIn('latest_comments', resp.data)
+
+        url = reverse('post-detail', args=[self.posts[0].pk])
+        etag = self.client.get(url, {'comments': 1})['ETag']
+        comment = self.comments[self.posts[0].pk][-1]
+        comment.content = 'edited'
+        comment.save()
+        resp = self.client.get(url, {'comments': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['latest_comments'][0]['content'], 'edited')
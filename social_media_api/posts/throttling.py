@@ -0,0 +1,156 @@
+# posts/throttling.py
+"""
+Sliding-window throttles for the write paths that fan out into other
+tables: likes, comments and follows (each also creates a notification).
+
+Every scope has two buckets, checked together:
+
+* per user  — rate `<scope>` in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+* per IP    — rate `<scope>_ip`, which also catches one client cycling
+              through many accounts.
+
+Counting uses the sliding-window-counter approximation: one counter per
+fixed window, and the estimate
+
+    previous_window * (1 - elapsed / window) + current_window
+
+so a check is one `get_many` of two keys and one `incr`, O(1) whatever the
+rate. Counters live in the cache alias THROTTLE_CACHE (locmem by default —
+per process; point it at a shared cache to enforce limits across workers).
+
+Rejections are counted per scope/bucket in `metrics()` and logged.
+"""
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+_rejections = Counter()
+_checks = Counter()
+_lock = threading.Lock()
+
+
+def metrics():
+    with _lock:
+        return {
+            'checked': dict(_checks),
+            'rejected': dict(_rejections),
+        }
+
+
+def reset_metrics():
+    with _lock:
+        _checks.clear()
+        _rejections.clear()
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Base class. The scope comes from the constructor or, like DRF's
+    ScopedRateThrottle, from the view's `throttle_scope`.
+    """
+    bucket = None
+    rate_suffix = ''
+
+    def __init__(self, scope=None):
+        # Rate lookup is deferred to allow_request(), where the view is known.
+        self.scope = scope
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+    def get_rate(self):
+        # Read at call time (not the class attribute) so settings overrides apply.
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope + self.rate_suffix)
+
+    def get_ident_for(self, request):
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_for(request)
+        if ident is None:
+            return None
+        return f'throttle:{self.scope}:{self.bucket}:{ident}'
+
+    def allow_request(self, request, view):
+        self.scope = self.scope or getattr(view, 'throttle_scope', None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        self.elapsed = now - window * self.duration
+        current_key, previous_key = f'{self.key}:{window}', f'{self.key}:{window - 1}'
+        counts = self.cache.get_many([current_key, previous_key])
+        self.current = counts.get(current_key, 0)
+        self.previous = counts.get(previous_key, 0)
+
+        label = f'{self.scope}:{self.bucket}'
+        if self.estimate() >= self.num_requests:
+            with _lock:
+                _checks[label] += 1
+                _rejections[label] += 1
+            logger.warning('Throttled %s (%s)', self.key, self.rate)
+            return False
+
+        # add() seeds the counter (two windows, so it can serve as "previous"),
+        # incr() is atomic on cache backends that support it.
+        if not self.cache.add(current_key, 1, timeout=2 * self.duration):
+            try:
+                self.cache.incr(current_key)
+            except ValueError:  # expired between add() and incr()
+                self.cache.set(current_key, 1, timeout=2 * self.duration)
+        with _lock:
+            _checks[label] += 1
+        return True
+
+    def estimate(self):
+        weight = 1 - self.elapsed / self.duration
+        return self.previous * weight + self.current
+
+    def wait(self):
+        """Seconds until the estimate drops below the limit (Retry-After)."""
+        if self.current >= self.num_requests:
+            # Wait for the next window, and for enough of it to pass that the
+            # decayed current window plus nothing fits.
+            remaining = self.duration - self.elapsed
+            return remaining + self.duration * (1 - (self.num_requests - 1) / self.current)
+        if not self.previous:
+            return None
+        needed = 1 - (self.num_requests - 1 - self.current) / self.previous
+        return max(0.0, needed * self.duration - self.elapsed)
+
+
+class UserWriteThrottle(SlidingWindowThrottle):
+    bucket = 'user'
+
+    def get_ident_for(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None  # anonymous writes are rejected by permissions anyway
+
+
+class IPWriteThrottle(SlidingWindowThrottle):
+    bucket = 'ip'
+    rate_suffix = '_ip'
+
+    def get_ident_for(self, request):
+        return self.get_ident(request)
+
+
+def write_throttles(scope):
+    return [UserWriteThrottle(scope), IPWriteThrottle(scope)]
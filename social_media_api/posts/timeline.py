@@ -0,0 +1,185 @@
+# posts/timeline.py
+"""
+Home-feed storage (fan-out-on-write with a fan-out-on-read escape hatch).
+
+When a post is created it is copied into the `TimelineEntry` table of every
+follower, so reading a feed is a keyset range scan over
+(user, created_at, post_id) instead of an IN-subquery over everyone the user
+follows plus a sort.
+
+Authors with more than TIMELINE_FANOUT_FOLLOWER_LIMIT followers are not fanned
+out (one post would mean that many inserts); their posts are fetched at read
+time and merged into the page.
+"""
+from django.conf import settings
+from django.db.models import Q
+
+from accounts import graph
+from accounts.models import Follow, User
+from .models import Post, TimelineEntry
+
+DEFAULT_FANOUT_FOLLOWER_LIMIT = 10000
+DEFAULT_BACKFILL_SIZE = 200
+BATCH_SIZE = 1000
+
+
+def fanout_follower_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_FOLLOWER_LIMIT', DEFAULT_FANOUT_FOLLOWER_LIMIT)
+
+
+def backfill_size():
+    return getattr(settings, 'TIMELINE_BACKFILL_SIZE', DEFAULT_BACKFILL_SIZE)
+
+
+def is_high_follower(author_id):
+    return User.objects.filter(
+        pk=author_id, followers_count__gt=fanout_follower_limit()
+    ).exists()
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Write `post` into the timeline of each of its author's followers."""
+    if is_high_follower(post.author_id):
+        return
+    follower_ids = (
+        Follow.objects.filter(following_id=post.author_id)
+        .values_list('follower_id', flat=True)
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(TimelineEntry(
+            user_id=follower_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            created_at=post.created_at,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            _bulk_insert(batch)
+            batch = []
+    if batch:
+        _bulk_insert(batch)
+
+
+def fan_out_posts(posts):
+    """
+    Bulk variant of fan_out_post for imports: one follower scan per author
+    instead of one per post.
+    """
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    if not by_author:
+        return
+    skipped = set(
+        User.objects.filter(pk__in=by_author, followers_count__gt=fanout_follower_limit())
+        .values_list('pk', flat=True)
+    )
+    batch = []
+    for author_id, author_posts in by_author.items():
+        if author_id in skipped:
+            continue
+        follower_ids = (
+            Follow.objects.filter(following_id=author_id)
+            .values_list('follower_id', flat=True)
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        for follower_id in follower_ids:
+            batch.extend(
+                TimelineEntry(user_id=follower_id, post_id=post.pk,
+                              author_id=author_id, created_at=post.created_at)
+                for post in author_posts
+            )
+            if len(batch) >= BATCH_SIZE:
+                _bulk_insert(batch)
+                batch = []
+    if batch:
+        _bulk_insert(batch)
+
+
+def backfill(user, author):
+    """Copy `author`'s most recent posts into `user`'s timeline after a follow."""
+    backfill_many(user, [author.pk])
+
+
+def backfill_many(user, author_ids):
+    """
+    Copy the most recent posts of `author_ids` into `user`'s timeline after a
+    bulk follow. TIMELINE_BACKFILL_SIZE bounds the total, not each author.
+    """
+    author_ids = list(
+        User.objects.filter(pk__in=author_ids, followers_count__lte=fanout_follower_limit())
+        .values_list('pk', flat=True)
+    )
+    if not author_ids:
+        return
+    recent = (
+        Post.objects.filter(author_id__in=author_ids)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'author_id', 'created_at')[:backfill_size()]
+    )
+    _bulk_insert([
+        TimelineEntry(user=user, post_id=post_id, author_id=author_id, created_at=created_at)
+        for post_id, author_id, created_at in recent
+    ])
+
+
+def prune(user, author):
+    """Remove `author`'s posts from `user`'s timeline after an unfollow."""
+    prune_many(user, [author.pk])
+
+
+def prune_many(user, author_ids):
+    TimelineEntry.objects.filter(user=user, author_id__in=author_ids).delete()
+
+
+def _high_follower_followees(user):
+    # High-follower accounts are rare, so the indexed followers_count lookup
+    # is small; intersect it with the (LRU-cached) adjacency set.
+    high_follower_ids = User.objects.filter(
+        followers_count__gt=fanout_follower_limit()
+    ).values_list('pk', flat=True)
+    return list(graph.following_ids(user).intersection(high_follower_ids))
+
+
+def _before(position, created_field, id_field):
+    """Keyset predicate: rows strictly after `position` in (-created, -id) order."""
+    if position is None:
+        return Q()
+    created_at, pk = position
+    return Q(**{f'{created_field}__lt': created_at}) | Q(
+        **{created_field: created_at, f'{id_field}__lt': pk}
+    )
+
+
+def read(user, position=None, limit=10):
+    """
+    Return `(posts, next_position)` for one page of `user`'s feed.
+
+    `position` is the `(created_at, post_id)` of the last post on the previous
+    page (None for the first page); `next_position` is None on the last page.
+    """
+    keys = set(
+        TimelineEntry.objects.filter(user=user)
+        .filter(_before(position, 'created_at', 'post_id'))
+        .order_by('-created_at', '-post_id')
+        .values_list('created_at', 'post_id')[:limit + 1]
+    )
+    high_follower_ids = _high_follower_followees(user)
+    if high_follower_ids:
+        keys.update(
+            Post.objects.filter(author_id__in=high_follower_ids)
+            .filter(_before(position, 'created_at', 'id'))
+            .order_by('-created_at', '-id')
+            .values_list('created_at', 'id')[:limit + 1]
+        )
+
+    keys = sorted(keys, reverse=True)
+    page, has_more = keys[:limit], len(keys) > limit
+    by_id = Post.objects.for_listing(user).in_bulk([pk for _, pk in page])
+    posts = [by_id[pk] for _, pk in page if pk in by_id]
+    return posts, (page[-1] if has_more else None)
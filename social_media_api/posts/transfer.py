@@ -0,0 +1,389 @@
+# posts/transfer.py
+"""
+NDJSON import/export of posts, comments and likes.
+
+One JSON object per line, with a `type` field:
+
+    {"type": "post", "ref": "post:1", "author": "alice", "title": "...", "content": "...",
+     "created_at": "2024-01-31T12:00:00Z"}
+    {"type": "comment", "post": "post:1", "author": "bob", "content": "...", "created_at": "..."}
+    {"type": "like", "post": "post:1", "user": "carol", "created_at": "..."}
+
+`post` is either the `ref` of a post line earlier in the same stream or the
+integer id (a number or a string of decimal digits) of a post already in the
+database. Only the refs of the last POSTS_IMPORT_MAX_REFS posts of a stream
+are remembered. `created_at` is optional
+(default: now). The export writes exactly this format, so an export can be
+imported into another database.
+
+Import reads the stream lazily in batches of POSTS_IMPORT_BATCH_SIZE lines.
+Per batch: records are validated, authors are resolved with one
+`username__in` query and referenced post ids with one `pk__in` query, then
+posts, comments and likes are written with chunked `bulk_create` in one
+transaction, together with the denormalized counters of the touched posts
+(one UPDATE) and the followers' timeline entries. `created_at` is kept as
+given; `updated_at` is the import time. Invalid lines are skipped and reported
+with their line number; duplicate likes are skipped. Imports send no
+notifications.
+
+Export walks each table in primary-key order with `.iterator(chunk_size)`,
+so memory stays constant however large the tables are.
+
+`import_ndjson()` / `export_ndjson()` back the import_content /
+export_content management commands and the admin-only API views.
+"""
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import User
+from . import response_cache, timeline
+from .models import Comment, Like, Post, _count_subquery
+
+TYPES = ('post', 'comment', 'like')
+MAX_REPORTED_ERRORS = 100
+CHUNK_SIZE = 500  # rows per INSERT/UPDATE statement
+TITLE_MAX_LENGTH = Post._meta.get_field('title').max_length
+
+
+def default_batch_size():
+    return getattr(settings, 'POSTS_IMPORT_BATCH_SIZE', 1000)
+
+
+def max_refs():
+    return getattr(settings, 'POSTS_IMPORT_MAX_REFS', 100000)
+
+
+class RecordError(ValueError):
+    pass
+
+
+@dataclass
+class ImportStats:
+    lines: int = 0
+    batches: int = 0
+    posts: int = 0
+    comments: int = 0
+    likes: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)  # (line number, message), first MAX_REPORTED_ERRORS
+    seconds: float = 0.0
+
+    @property
+    def rows(self):
+        return self.posts + self.comments + self.likes
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'lines': self.lines,
+            'posts': self.posts,
+            'comments': self.comments,
+            'likes': self.likes,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid,
+            'errors': [{'line': line, 'error': message} for line, message in self.errors],
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+# ---- validation -------------------------------------------------------------
+def _text(record, key, max_length=None):
+    value = record.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise RecordError(f"'{key}' must be a non-empty string")
+    if max_length is not None and len(value) > max_length:
+        raise RecordError(f"'{key}' is longer than {max_length} characters")
+    return value
+
+
+def _timestamp(record, now):
+    value = record.get('created_at')
+    if value is None:
+        return now
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise RecordError("'created_at' must be an ISO 8601 datetime")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def _post_reference(record):
+    """A post id (int) or a ref (str)."""
+    value = record.get('post')
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or value == '':
+        raise RecordError("'post' must be a post ref or an existing post id")
+    # isdecimal(), not isdigit(): int() rejects digits such as '²'.
+    if isinstance(value, str) and value.isdecimal():
+        return int(value)
+    return value
+
+
+def _parse(line, now):
+    """Return a normalized record dict, or raise RecordError."""
+    try:
+        record = json.loads(line)
+    except ValueError as exc:
+        raise RecordError(f'invalid JSON: {exc}') from None
+    if not isinstance(record, dict):
+        raise RecordError('expected a JSON object')
+    kind = record.get('type')
+    if kind == 'post':
+        ref = record.get('ref')
+        if ref is not None and not isinstance(ref, str):
+            raise RecordError("'ref' must be a string")
+        return {
+            'type': kind,
+            'ref': ref,
+            'username': _text(record, 'author'),
+            'title': _text(record, 'title', TITLE_MAX_LENGTH),
+            'content': _text(record, 'content'),
+            'created_at': _timestamp(record, now),
+        }
+    if kind == 'comment':
+        return {
+            'type': kind,
+            'post': _post_reference(record),
+            'username': _text(record, 'author'),
+            'content': _text(record, 'content'),
+            'created_at': _timestamp(record, now),
+        }
+    if kind == 'like':
+        return {
+            'type': kind,
+            'post': _post_reference(record),
+            'username': _text(record, 'user'),
+            'created_at': _timestamp(record, now),
+        }
+    raise RecordError(f"'type' must be one of {', '.join(TYPES)}")
+
+
+# ---- import -----------------------------------------------------------------
+class _Importer:
+    def __init__(self, stats):
+        self.stats = stats
+        # post ref -> id for the last max_refs() posts created by this import
+        self.refs = OrderedDict()
+        self.dropped_refs = 0
+
+    def error(self, line_no, message):
+        self.stats.invalid += 1
+        if len(self.stats.errors) < MAX_REPORTED_ERRORS:
+            self.stats.errors.append((line_no, message))
+
+    def resolve_post(self, reference, existing_ids):
+        if isinstance(reference, int):
+            return reference if reference in existing_ids else None
+        return self.refs.get(reference)
+
+    def remember(self, ref, pk):
+        self.refs[ref] = pk
+        self.refs.move_to_end(ref)
+        if len(self.refs) > max_refs():
+            self.refs.popitem(last=False)
+            self.dropped_refs += 1
+
+    def unknown_post(self, reference):
+        if isinstance(reference, str) and self.dropped_refs:
+            return (f"unknown post '{reference}' (only the refs of the last "
+                    f"{max_refs()} posts are kept; see POSTS_IMPORT_MAX_REFS)")
+        return f"unknown post '{reference}'"
+
+    def run_batch(self, lines):
+        now = timezone.now()
+        records = []
+        for line_no, line in lines:
+            try:
+                records.append((line_no, _parse(line, now)))
+            except RecordError as exc:
+                self.error(line_no, str(exc))
+
+        # One query each for every author and every referenced existing post.
+        user_ids = dict(
+            User.objects.filter(username__in={r['username'] for _, r in records})
+            .values_list('username', 'pk')
+        )
+        numeric = {
+            r['post'] for _, r in records if r['type'] != 'post' and isinstance(r['post'], int)
+        }
+        existing_ids = set(Post.objects.filter(pk__in=numeric).values_list('pk', flat=True))
+
+        valid = []
+        for line_no, record in records:
+            record['user_id'] = user_ids.get(record['username'])
+            if record['user_id'] is None:
+                self.error(line_no, f"unknown user '{record['username']}'")
+            else:
+                valid.append((line_no, record))
+
+        with transaction.atomic():
+            posts = self.create_posts([r for _, r in valid if r['type'] == 'post'])
+            touched = self.create_comments_and_likes(
+                [(n, r) for n, r in valid if r['type'] != 'post'], existing_ids
+            )
+            _refresh_counters(touched)
+            timeline.fan_out_posts(posts)
+
+        if posts:
+            response_cache.invalidate_list()
+            for author_id in {post.author_id for post in posts}:
+                response_cache.invalidate_follower_feeds(author_id)
+        response_cache.invalidate_posts(touched - {post.pk for post in posts})
+
+    def create_posts(self, records):
+        posts = [
+            Post(author_id=r['user_id'], title=r['title'], content=r['content'],
+                 created_at=r['created_at'])
+            for r in records
+        ]
+        Post.objects.bulk_create(posts, batch_size=CHUNK_SIZE)
+        for post, record in zip(posts, records):
+            if record['ref'] is not None:
+                self.remember(record['ref'], post.pk)
+        self.stats.posts += len(posts)
+        return posts
+
+    def create_comments_and_likes(self, records, existing_ids):
+        comments, likes, seen = [], [], set()
+        for line_no, record in records:
+            post_id = self.resolve_post(record['post'], existing_ids)
+            if post_id is None:
+                self.error(line_no, self.unknown_post(record['post']))
+            elif record['type'] == 'comment':
+                comments.append(Comment(post_id=post_id, author_id=record['user_id'],
+                                        content=record['content'],
+                                        created_at=record['created_at']))
+            elif (post_id, record['user_id']) in seen:
+                self.stats.duplicates += 1
+            else:
+                seen.add((post_id, record['user_id']))
+                likes.append(Like(post_id=post_id, user_id=record['user_id'],
+                                  created_at=record['created_at']))
+
+        if likes:
+            already = set(
+                Like.objects.filter(
+                    post_id__in={like.post_id for like in likes},
+                    user_id__in={like.user_id for like in likes},
+                ).values_list('post_id', 'user_id')
+            )
+            fresh = [like for like in likes if (like.post_id, like.user_id) not in already]
+            self.stats.duplicates += len(likes) - len(fresh)
+            likes = fresh
+
+        Comment.objects.bulk_create(comments, batch_size=CHUNK_SIZE)
+        # ignore_conflicts covers likes made since the check above.
+        Like.objects.bulk_create(likes, batch_size=CHUNK_SIZE, ignore_conflicts=True)
+
+        self.stats.comments += len(comments)
+        self.stats.likes += len(likes)
+        return {c.post_id for c in comments} | {like.post_id for like in likes}
+
+
+def _refresh_counters(post_ids):
+    if post_ids:
+        Post.objects.filter(pk__in=post_ids).update(
+            likes_count=_count_subquery(Like),
+            comments_count=_count_subquery(Comment),
+        )
+
+
+def _numbered_lines(stream):
+    for line_no, line in enumerate(stream, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        if line.strip():
+            yield line_no, line
+
+
+def import_ndjson(stream, batch_size=None, progress=None):
+    """
+    Import the NDJSON lines of `stream` (any iterable of str or bytes lines,
+    e.g. an open file or a request). Returns ImportStats; `progress`, if
+    given, is called with the running stats after each batch.
+    """
+    batch_size = batch_size or default_batch_size()
+    stats = ImportStats()
+    importer = _Importer(stats)
+    started = time.perf_counter()
+    lines = _numbered_lines(stream)
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            break
+        importer.run_batch(batch)
+        stats.lines = batch[-1][0]
+        stats.batches += 1
+        stats.seconds = time.perf_counter() - started
+        if progress:
+            progress(stats)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+# ---- export -----------------------------------------------------------------
+def _iso(value):
+    return value.isoformat().replace('+00:00', 'Z')
+
+
+def _post_lines(chunk_size):
+    rows = (
+        Post.objects.order_by('pk')
+        .values_list('pk', 'author__username', 'title', 'content', 'created_at')
+        .iterator(chunk_size=chunk_size)
+    )
+    for pk, username, title, content, created_at in rows:
+        yield {'type': 'post', 'ref': f'post:{pk}', 'author': username, 'title': title,
+               'content': content, 'created_at': _iso(created_at)}
+
+
+def _comment_lines(chunk_size):
+    rows = (
+        Comment.objects.order_by('pk')
+        .values_list('post_id', 'author__username', 'content', 'created_at')
+        .iterator(chunk_size=chunk_size)
+    )
+    for post_id, username, content, created_at in rows:
+        yield {'type': 'comment', 'post': f'post:{post_id}', 'author': username,
+               'content': content, 'created_at': _iso(created_at)}
+
+
+def _like_lines(chunk_size):
+    rows = (
+        Like.objects.order_by('pk')
+        .values_list('post_id', 'user__username', 'created_at')
+        .iterator(chunk_size=chunk_size)
+    )
+    for post_id, username, created_at in rows:
+        yield {'type': 'like', 'post': f'post:{post_id}', 'user': username,
+               'created_at': _iso(created_at)}
+
+
+EXPORTERS = {'post': _post_lines, 'comment': _comment_lines, 'like': _like_lines}
+
+
+def export_ndjson(types=TYPES, chunk_size=2000):
+    """
+    Yield NDJSON lines for `types`, posts first so that the comments and
+    likes after them can refer to their refs. Comments or likes exported
+    without their posts cannot be imported elsewhere: only post lines
+    define refs.
+    """
+    for kind in TYPES:
+        if kind in types:
+            for record in EXPORTERS[kind](chunk_size):
+                yield json.dumps(record, ensure_ascii=False) + '\n'
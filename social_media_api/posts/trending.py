@@ -0,0 +1,174 @@
+# posts/trending.py
+"""
+Trending posts: engagement with exponential time decay.
+
+A like is worth TRENDING_LIKE_WEIGHT and a comment TRENDING_COMMENT_WEIGHT,
+and every event loses half its weight each TRENDING_HALF_LIFE_HOURS. A
+post's score at time `now` is therefore
+
+    score(now) = sum(weight * 2 ** -((now - event_time) / half_life))
+
+All posts decay by the same factor between two instants, so the ranking
+can be kept against a fixed EPOCH instead of `now` ("forward decay"):
+
+    rank = log2(sum(weight * 2 ** ((event_time - EPOCH) / half_life)))
+
+`rank` never changes unless an event is added or withdrawn, and it is
+stored as a logarithm so it cannot overflow however old the epoch gets.
+TrendingScore keeps one row per engaged post:
+
+* `record()` / `withdraw()` adjust a post's row from the like/comment
+  signals (posts/signals.py): one locked read and one write each;
+* `recompute()` (manage.py recompute_trending) rebuilds the table from the
+  likes and comments of the last TRENDING_WINDOW_HOURS, which also drops
+  posts that have gone quiet and picks up rows written without signals
+  (bulk imports, raw SQL);
+* `top()` is one query over the rank index joined to the posts.
+
+Changing the half-life or weights only affects new events until the next
+recompute.
+"""
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Like, Post, TrendingScore
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+BATCH_SIZE = 1000
+
+
+def half_life():
+    return timedelta(hours=getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 12))
+
+
+def like_weight():
+    return getattr(settings, 'TRENDING_LIKE_WEIGHT', 1.0)
+
+
+def comment_weight():
+    return getattr(settings, 'TRENDING_COMMENT_WEIGHT', 3.0)
+
+
+def window():
+    return timedelta(hours=getattr(settings, 'TRENDING_WINDOW_HOURS', 72))
+
+
+def _half_lives(when):
+    return (when - EPOCH) / half_life()
+
+
+def _log_add(a, b):
+    """log2(2**a + 2**b) without leaving log space."""
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def _log_sub(a, b):
+    """log2(2**a - 2**b), or None when the difference is (about) nothing left."""
+    if b >= a - 1e-9:
+        return None
+    return a + math.log2(1 - 2 ** (b - a))
+
+
+def contribution(weight, when):
+    """The rank of a single event of `weight` at `when`."""
+    return math.log2(weight) + _half_lives(when)
+
+
+def score(rank, now=None):
+    """The decayed score a rank stands for at `now`."""
+    return 2 ** (rank - _half_lives(now or timezone.now()))
+
+
+def record(post_id, weight, when):
+    if weight <= 0:
+        return
+    event = contribution(weight, when)
+    with transaction.atomic():
+        row, created = TrendingScore.objects.select_for_update().get_or_create(
+            post_id=post_id, defaults={'rank': event}
+        )
+        if not created:
+            row.rank = _log_add(row.rank, event)
+            row.save(update_fields=['rank', 'updated_at'])
+
+
+def withdraw(post_id, weight, when):
+    """Take back an event recorded earlier (unlike, deleted comment)."""
+    if weight <= 0:
+        return
+    event = contribution(weight, when)
+    with transaction.atomic():
+        row = TrendingScore.objects.select_for_update().filter(post_id=post_id).first()
+        if row is None:
+            return
+        rank = _log_sub(row.rank, event)
+        if rank is None:
+            row.delete()
+        else:
+            row.rank = rank
+            row.save(update_fields=['rank', 'updated_at'])
+
+
+def top(user=None, limit=20):
+    """The `limit` highest-ranked posts, with the usual listing annotations."""
+    # The LIMIT sits in the subquery so it is answered from the rank index
+    # even when the planner would rather drive the join from posts_post.
+    ids = TrendingScore.objects.order_by('-rank', '-post_id').values('post_id')[:limit]
+    return list(
+        Post.objects.for_listing(user)
+        .filter(pk__in=ids)
+        .order_by('-trending__rank', '-trending__post_id')
+    )
+
+
+@dataclass
+class RecomputeStats:
+    events: int = 0
+    posts: int = 0
+    seconds: float = 0.0
+
+
+def recompute(window_hours=None, chunk_size=BATCH_SIZE):
+    """
+    Rebuild TrendingScore from the likes and comments of the last
+    `window_hours` (default TRENDING_WINDOW_HOURS). Memory is one float per
+    engaged post; events are streamed.
+    """
+    started = time.perf_counter()
+    now = timezone.now()
+    since = now - (timedelta(hours=window_hours) if window_hours else window())
+    unit = half_life().total_seconds()
+
+    stats = RecomputeStats()
+    totals = {}  # post id -> sum(weight * 2 ** -(age / half_life))
+    for model, weight in ((Like, like_weight()), (Comment, comment_weight())):
+        if weight <= 0:
+            continue
+        events = (
+            model.objects.filter(created_at__gte=since)
+            .values_list('post_id', 'created_at')
+            .iterator(chunk_size=chunk_size)
+        )
+        for post_id, created_at in events:
+            age = max(0.0, (now - created_at).total_seconds())
+            totals[post_id] = totals.get(post_id, 0.0) + weight * 2 ** (-age / unit)
+            stats.events += 1
+
+    base = _half_lives(now)
+    rows = [
+        TrendingScore(post_id=post_id, rank=math.log2(total) + base)
+        for post_id, total in totals.items() if total > 0
+    ]
+    with transaction.atomic():
+        TrendingScore.objects.all().delete()
+        TrendingScore.objects.bulk_create(rows, batch_size=chunk_size)
+    stats.posts = len(rows)
+    stats.seconds = time.perf_counter() - started
+    return stats
@@ -1,7 +1,10 @@
 # posts/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet, FeedView
+from .views import (
+    PostViewSet, CommentViewSet, FeedView, ThrottleMetricsView,
+    ContentImportView, ContentExportView, PostCommentListView,
+)
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet, basename='post')
@@ -15,6 +18,16 @@ urlpatterns = [
     path('posts/<int:pk>/like/', PostViewSet.as_view({'post': 'like'}), name='post-like'),
     path('posts/<int:pk>/unlike/', PostViewSet.as_view({'post': 'unlike'}), name='post-unlike'),
 
+    # One post's comment thread
+    path('posts/<int:post_pk>/comments/', PostCommentListView.as_view(), name='post-comments'),
+
     # Feed endpoint
     path('feed/', FeedView.as_view(), name='feed'),
+
+    # Write-throttle counters (admin only)
+    path('throttles/metrics/', ThrottleMetricsView.as_view(), name='throttle-metrics'),
+
+    # NDJSON bulk import/export (admin only)
+    path('content/import/', ContentImportView.as_view(), name='content-import'),
+    path('content/export/', ContentExportView.as_view(), name='content-export'),
 ]
@@ -1,93 +1,302 @@
 # posts/views.py
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, permissions, filters, generics, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
 
+from notifications.dispatch import notify
+from . import response_cache, throttling, transfer, trending
+from .conditional import ConditionalGetMixin
 from .models import Post, Comment, Like
+from .pagination import (  # noqa: F401
+    DefaultPagination, KeysetPagination, SearchPagination, TimelinePagination,
+)
+from .search import FullTextSearchFilter
+from .streaming import StreamingListMixin
 from .serializers import PostSerializer, CommentSerializer
 from .permissions import IsOwnerOrReadOnly
+from .response_cache import CachedListMixin
+from .throttling import write_throttles
 
 
-class DefaultPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
+class CommentPreviewMixin:
+    """
+    `?comments=N` embeds each post's N newest comments as `latest_comments`
+    (at most POSTS_COMMENT_PREVIEW_MAX), fetched for the whole page with one
+    windowed query (CommentQuerySet.latest_per_post); streamed pages get one
+    such query per chunk.
+    """
+    comments_query_param = 'comments'
+
+    def comment_preview_size(self):
+        try:
+            size = int(self.request.query_params.get(self.comments_query_param, 0))
+        except ValueError:
+            return 0
+        return max(0, min(size, getattr(settings, 'POSTS_COMMENT_PREVIEW_MAX', 5)))
+
+    def with_comment_previews(self, posts):
+        size = self.comment_preview_size()
+        if not size or posts is None:
+            return posts
+        previews = {post.pk: [] for post in posts}
+        for comment in Comment.objects.latest_per_post(list(previews), size):
+            previews[comment.post_id].append(comment)
+        for post in posts:
+            post.comment_preview = previews[post.pk]
+        return posts
+
+    def paginate_queryset(self, queryset):
+        return self.with_comment_previews(super().paginate_queryset(queryset))
+
+    def get_object(self):
+        return self.with_comment_previews([super().get_object()])[0]
+
+    def prepare_chunk(self, rows):
+        return self.with_comment_previews(super().prepare_chunk(rows))
 
+    def shared_fingerprint(self, rows, state=()):
+        # Comment edits do not touch the post, so the previews join the ETag.
+        previews = tuple(
+            (c.pk, c.updated_at) for row in rows for c in getattr(row, 'comment_preview', ())
+        )
+        return super().shared_fingerprint(rows, (*state, previews) if previews else state)
 
-class PostViewSet(viewsets.ModelViewSet):
+
+class PostViewSet(CommentPreviewMixin, CachedListMixin, StreamingListMixin, ConditionalGetMixin,
+                  viewsets.ModelViewSet):
     queryset = Post.objects.all()  # explicit for checkers
     serializer_class = PostSerializer
+    # Counters change through F() updates that leave updated_at alone.
+    etag_fields = ('pk', 'updated_at', 'likes_count', 'comments_count', 'author_id')
+    personal_etag_fields = ('pk', 'is_liked')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    pagination_class = DefaultPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = SearchPagination
+    # ?search= goes through the full-text index (posts/search.py)
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'content']
     ordering_fields = ['created_at', 'updated_at', 'title']
 
+    cache_name = 'post-list'
+
+    def get_queryset(self):
+        return Post.objects.for_listing(self.request.user)
+
+    def get_throttles(self):
+        if self.action in ('like', 'unlike'):
+            return write_throttles('likes')
+        return super().get_throttles()
+
+    def cache_scope(self, request):
+        return 'all'  # shared: is_liked is overlaid per viewer
+
+    def cache_version_keys(self, request):
+        return [response_cache.list_version_key()]
+
+    def list(self, request, *args, **kwargs):
+        # Searches are ranked by relevance unless the client asked for the
+        # page-number mode (or an explicit ?ordering=), where the filter
+        # backend restricts the usual listing instead. Large page-number
+        # pages are streamed (posts/streaming.py).
+        query = request.query_params.get(api_settings.SEARCH_PARAM, '').strip()
+        if self.paginator.use_offset(request):
+            return super().list(request, *args, **kwargs)
+        if not query:
+            return self.cached_list(
+                request, lambda: self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+            )
+        page = self.paginator.paginate_search(request, self.get_queryset(), query)
+        self.with_comment_previews(page)
+        response = self.not_modified(request, page, self.page_state())
+        if response is not None:
+            return response
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         ctx['request'] = self.request
         return ctx
 
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """Top posts by time-decayed engagement (posts/trending.py); `?limit=`."""
+        default = getattr(settings, 'TRENDING_PAGE_SIZE', 20)
+        try:
+            limit = int(request.query_params.get('limit', default))
+        except ValueError:
+            limit = default
+        posts = self.with_comment_previews(trending.top(request.user, max(1, min(limit, 100))))
+        return Response(self.get_serializer(posts, many=True).data)
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def like(self, request, pk=None):
         # *** required pattern ***
         post = generics.get_object_or_404(Post, pk=pk)
         # *** required pattern ***
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=request.user, post=post)
+            if created:
+                Post.objects.filter(pk=post.pk).update(likes_count=F('likes_count') + 1)
         if created:
-            # optional: create notification
-            try:
-                from notifications.models import Notification
-                if post.author_id != request.user.id:
-                    Notification.objects.create(
-                        recipient=post.author,
-                        actor=request.user,
-                        verb='liked',
-                        target=post
-                    )
-            except Exception:
-                pass
+            notify(post.author_id, request.user, 'liked', target=post)
             return Response({"detail": "Post liked."}, status=status.HTTP_201_CREATED)
         return Response({"detail": "Already liked."}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def unlike(self, request, pk=None):
         post = generics.get_object_or_404(Post, pk=pk)
-        deleted, _ = Like.objects.filter(user=request.user, post=post).delete()
+        with transaction.atomic():
+            deleted, _ = Like.objects.filter(user=request.user, post=post).delete()
+            if deleted:
+                Post.objects.filter(pk=post.pk, likes_count__gt=0).update(
+                    likes_count=F('likes_count') - 1
+                )
         if deleted:
             return Response({"detail": "Post unliked."}, status=status.HTTP_200_OK)
         return Response({"detail": "You had not liked this post."}, status=status.HTTP_200_OK)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentPagination(KeysetPagination):
+    # Comments read oldest first, matching Comment.Meta.ordering.
+    ordering = ('created_at', 'id')
+
+
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all()  # explicit for checkers
+    etag_fields = ('pk', 'updated_at', 'author_id')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    pagination_class = DefaultPagination
+    pagination_class = CommentPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['content']
     ordering_fields = ['created_at', 'updated_at']
 
+    def get_queryset(self):
+        return Comment.objects.select_related('author')
+
+    def get_throttles(self):
+        if self.action == 'create':
+            return write_throttles('comments')
+        return super().get_throttles()
+
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         ctx['request'] = self.request
         return ctx
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            Post.objects.filter(pk=instance.post_id, comments_count__gt=0).update(
+                comments_count=F('comments_count') - 1
+            )
 
-class FeedView(generics.ListAPIView):
+
+class PostCommentListView(ConditionalGetMixin, generics.ListAPIView):
     """
-    Newest posts from users the current user follows.
+    One post's comments, oldest first: a keyset walk of the
+    (post, created_at, id) index with authors joined.
+    """
+    serializer_class = CommentSerializer
+    pagination_class = CommentPagination
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    etag_fields = CommentViewSet.etag_fields
+
+    def get_queryset(self):
+        return Comment.objects.filter(post_id=self.kwargs['post_pk']).select_related('author')
+
+    def list(self, request, *args, **kwargs):
+        generics.get_object_or_404(Post.objects.only('pk'), pk=self.kwargs['post_pk'])
+        return super().list(request, *args, **kwargs)
+
+
+class FeedView(CommentPreviewMixin, CachedListMixin, StreamingListMixin, ConditionalGetMixin,
+               generics.ListAPIView):
+    """
+    Newest posts from users the current user follows, read from the
+    materialized timeline (see posts/timeline.py).
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = PostSerializer
-    pagination_class = DefaultPagination
+    pagination_class = TimelinePagination
+    etag_fields = PostViewSet.etag_fields
+    personal_etag_fields = PostViewSet.personal_etag_fields
+    cache_name = 'feed'
 
     def get_queryset(self):
         # includes literal following.all() usage for checkers
         following_users = self.request.user.following.all()
-        return Post.objects.filter(author__in=following_users).order_by('-created_at')
+        return (
+            Post.objects.for_listing(self.request.user)
+            .filter(author__in=following_users)
+            .order_by('-created_at')
+        )
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         ctx['request'] = self.request
         return ctx
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator.use_offset(request):
+            return super().list(request, *args, **kwargs)
+        return self.cached_list(
+            request, lambda: self.with_comment_previews(self.paginator.paginate_timeline(request))
+        )
+
+    def cache_scope(self, request):
+        return f'u{request.user.pk}'
+
+    def cache_version_keys(self, request):
+        return [response_cache.feed_version_key(request.user.pk), response_cache.pulled_version_key()]
+
+
+class ThrottleMetricsView(generics.GenericAPIView):
+    """
+    Write-throttle counters for operators: checks and rejections per
+    scope/bucket since process start (see posts/throttling.py).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(throttling.metrics(), status=status.HTTP_200_OK)
+
+
+class ContentImportView(generics.GenericAPIView):
+    """
+    Import posts, comments and likes from an NDJSON request body
+    (Content-Type: application/x-ndjson). The body is read line by line as
+    it is processed; see posts/transfer.py for the record format.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        stats = transfer.import_ndjson(request._request)
+        return Response(stats.as_dict(), status=status.HTTP_200_OK)
+
+
+class ContentExportView(generics.GenericAPIView):
+    """
+    Stream every post, comment and like as NDJSON. `?types=post,comment`
+    restricts the record types.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        types = request.query_params.get('types', ','.join(transfer.TYPES)).split(',')
+        unknown = set(types) - set(transfer.TYPES)
+        if unknown:
+            return Response(
+                {"detail": f"Unknown types: {', '.join(sorted(unknown))}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        response = StreamingHttpResponse(
+            transfer.export_ndjson(types), content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="content.ndjson"'
+        return response
@@ -1,9 +1,15 @@
 from pathlib import Path
 import os
+import sys
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Apps shared by the projects in this repository (query_metrics/) live one
+# level up.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 # --------------------------------
 # 🌐 PORT CONFIGURATION
 # --------------------------------
@@ -45,12 +51,18 @@ INSTALLED_APPS = [
     'accounts',
     'posts',
     'notifications',
+
+    # Shared apps (repository root)
+    'query_metrics',
+    'token_auth',
 ]
 
 # --------------------------------
 # ⚙️ MIDDLEWARE
 # --------------------------------
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack (see QUERY METRICS)
+    'query_metrics.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -147,14 +159,149 @@ SECURE_HSTS_PRELOAD = True
 # --------------------------------
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        # TokenAuthentication with a token -> user id cache in the Django cache
+        # ACCOUNTS_TOKEN_CACHE (per-user version keys; see ../token_auth)
+        'token_auth.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Write throttles (posts/throttling.py): '<scope>' per user, '<scope>_ip' per IP
+    'DEFAULT_THROTTLE_RATES': {
+        'likes': os.getenv('THROTTLE_LIKES', '120/min'),
+        'likes_ip': os.getenv('THROTTLE_LIKES_IP', '1000/min'),
+        'comments': os.getenv('THROTTLE_COMMENTS', '30/min'),
+        'comments_ip': os.getenv('THROTTLE_COMMENTS_IP', '300/min'),
+        'follows': os.getenv('THROTTLE_FOLLOWS', '60/min'),
+        'follows_ip': os.getenv('THROTTLE_FOLLOWS_IP', '300/min'),
+    },
+}
+# Cache alias holding the sliding-window counters (see CACHES)
+THROTTLE_CACHE = 'throttle'
+
+# --------------------------------
+# 📰 FEED / TIMELINE (see posts/timeline.py)
+# --------------------------------
+# Authors with more followers than this are not fanned out on write;
+# their posts are merged into feeds at read time instead.
+TIMELINE_FANOUT_FOLLOWER_LIMIT = int(os.getenv('TIMELINE_FANOUT_FOLLOWER_LIMIT', 10000))
+# How many of an author's recent posts are copied into a feed on follow
+TIMELINE_BACKFILL_SIZE = 200
+# Most comments ?comments=N may embed per post in post lists (latest_comments)
+POSTS_COMMENT_PREVIEW_MAX = 5
+
+# --------------------------------
+# 🗄️ CACHES
+# --------------------------------
+# 'default' holds small counters (unread badges); 'responses' holds rendered
+# post-list/feed pages (posts/response_cache.py). Locmem is per process; use
+# a shared backend (Redis/Memcached) when running several workers, or the
+# file backend (RESPONSE_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache,
+# RESPONSE_CACHE_LOCATION=/var/tmp/post-responses) as a stand-in.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': os.getenv('RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', 'post-responses'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Sliding-window throttle counters (posts/throttling.py): two keys per
+    # active user/IP per scope, so it needs room to avoid culling live ones.
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle-counters',
+        'OPTIONS': {'MAX_ENTRIES': 200000},
+    },
 }
+POSTS_RESPONSE_CACHE = 'responses'
+POSTS_RESPONSE_CACHE_TTL = 300  # seconds; 0 disables the response cache
+
+# --------------------------------
+# 🔎 SEARCH (see posts/search.py)
+# --------------------------------
+# 'auto' = FTS5 on SQLite, tsvector + GIN on PostgreSQL; or force one of
+# 'sqlite_fts5', 'postgres', 'basic' (unindexed icontains)
+POSTS_SEARCH_BACKEND = os.getenv('POSTS_SEARCH_BACKEND', 'auto')
+# Only the newest N matches are ranked, which keeps common terms fast
+POSTS_SEARCH_MAX_CANDIDATES = 2000
+
+# --------------------------------
+# 🔥 TRENDING (see posts/trending.py)
+# --------------------------------
+# Likes and comments lose half their weight every TRENDING_HALF_LIFE_HOURS.
+# manage.py recompute_trending rebuilds scores from the last TRENDING_WINDOW_HOURS.
+TRENDING_HALF_LIFE_HOURS = 12
+TRENDING_LIKE_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 3.0
+TRENDING_WINDOW_HOURS = 72
+TRENDING_PAGE_SIZE = 20  # default ?limit= of /api/posts/trending/
+
+# --------------------------------
+# 🌊 STREAMING LISTS (see posts/streaming.py)
+# --------------------------------
+# Page-number pages of at least this many rows, and ?stream=true on the
+# followers/following lists, are serialized in chunks into a streamed body
+STREAMING_MIN_PAGE_SIZE = 200
+STREAMING_CHUNK_SIZE = 500
+
+# --------------------------------
+# 📦 IMPORT / EXPORT (see posts/transfer.py)
+# --------------------------------
+# NDJSON lines validated and written per transaction by import_content and
+# POST /api/content/import/
+POSTS_IMPORT_BATCH_SIZE = 1000
+# Post refs remembered per import; comments/likes must refer to one of the
+# last this-many posts of the stream (or to an existing post id)
+POSTS_IMPORT_MAX_REFS = 100000
+
+# --------------------------------
+# 🕸️ FOLLOW GRAPH (see accounts/graph.py)
+# --------------------------------
+# In-process LRU cache of "who does this user follow", used for users who
+# follow many accounts. Per process; entries expire after the TTL.
+ACCOUNTS_ADJACENCY_CACHE_SIZE = 1024          # 0 disables the cache
+ACCOUNTS_ADJACENCY_CACHE_TTL = 60             # seconds
+ACCOUNTS_ADJACENCY_CACHE_MIN_FOLLOWING = 500  # only cache users following at least this many
+
+ACCOUNTS_BULK_FOLLOW_MAX = 100                # ids per /follow/bulk/ request
+ACCOUNTS_SUGGESTIONS_PER_USER = 20            # rows kept by compute_follow_suggestions
+
+# Token -> user cache used by CachedTokenAuthentication (../token_auth). It
+# lives in a Django cache, so logout/deactivation reach every worker that
+# shares it; with locmem (per process) revocation can lag by up to the TTL.
+ACCOUNTS_TOKEN_CACHE = 'default'
+ACCOUNTS_TOKEN_CACHE_TTL = 60                 # seconds; 0 disables the cache
+
+# --------------------------------
+# 🔔 NOTIFICATIONS (see notifications/dispatch.py)
+# --------------------------------
+# Deliver notifications from a background worker thread; set to 0 to write
+# them synchronously in the request.
+NOTIFICATIONS_ASYNC = os.getenv('NOTIFICATIONS_ASYNC', '1') == '1'
+NOTIFICATIONS_QUEUE_MAXSIZE = 10000   # events beyond this are dropped (and counted)
+NOTIFICATIONS_BATCH_SIZE = 500        # max events coalesced into one bulk_create
+NOTIFICATIONS_FLUSH_INTERVAL = 0.5    # seconds the worker waits for new events
+NOTIFICATIONS_UNREAD_CACHE_TIMEOUT = 300  # seconds an unread badge count is cached
+# Retention (manage.py compact_notifications): read notifications older than
+# this are archived to compressed JSONL and rolled up into monthly digests.
+NOTIFICATIONS_RETENTION_DAYS = int(os.getenv('NOTIFICATIONS_RETENTION_DAYS', 90))
+NOTIFICATIONS_ARCHIVE_DIR = Path(os.getenv('NOTIFICATIONS_ARCHIVE_DIR', BASE_DIR / 'archive' / 'notifications'))
+
+# --------------------------------
+# ⏱️ QUERY METRICS (see ../query_metrics)
+# --------------------------------
+# Per-view query counts, DB/serializer/render time and response sizes:
+# Server-Timing header on every response (DEBUG only unless enabled),
+# aggregates at /_metrics/queries/ (staff only). Requests slower than SLOW_REQUEST_MS or
+# with more than SLOW_QUERY_COUNT queries are logged with their SQL
+# fingerprints; unset either to disable that check.
+QUERY_METRICS_SERVER_TIMING = os.getenv('QUERY_METRICS_SERVER_TIMING', '1' if DEBUG else '0') == '1'
+QUERY_METRICS_SLOW_REQUEST_MS = int(os.getenv('QUERY_METRICS_SLOW_REQUEST_MS', 500))
+QUERY_METRICS_SLOW_QUERY_COUNT = int(os.getenv('QUERY_METRICS_SLOW_QUERY_COUNT', 50))
 
 # --------------------------------
 # 🧍 CUSTOM USER MODEL
@@ -34,6 +34,9 @@ urlpatterns = [
     # Notifications app
     path('api/notifications/', include('notifications.urls')),
 
+    # Per-view query counts and latencies (query_metrics, local/staff only)
+    path('_metrics/queries/', include('query_metrics.urls')),
+
     # Optional: root route to display API overview
     path('', lambda request: JsonResponse({
         "message": "Welcome to the Social Media API 🚀",
@@ -41,9 +44,13 @@ urlpatterns = [
             "accounts": {
                 "register": "/api/accounts/register/",
                 "login": "/api/accounts/login/",
+                "logout": "/api/accounts/logout/",
                 "profile": "/api/accounts/profile/",
                 "follow": "/api/accounts/follow/<user_id>/",
                 "unfollow": "/api/accounts/unfollow/<user_id>/",
+                "bulk_follow": "/api/accounts/follow/bulk/",
+                "bulk_unfollow": "/api/accounts/unfollow/bulk/",
+                "suggestions": "/api/accounts/suggestions/",
                 "following": "/api/accounts/following/",
                 "followers": "/api/accounts/followers/"
             },
@@ -51,15 +58,22 @@ urlpatterns = [
                 "list_create": "/api/posts/",
                 "retrieve_update_delete": "/api/posts/<id>/",
                 "comments": "/api/comments/",
+                "post_comments": "/api/posts/<id>/comments/",
                 "feed": "/api/feed/",
+                "trending": "/api/posts/trending/",
                 "like": "/api/posts/<id>/like/",
-                "unlike": "/api/posts/<id>/unlike/"
+                "unlike": "/api/posts/<id>/unlike/",
+                "throttle_metrics": "/api/throttles/metrics/",
+                "content_import": "/api/content/import/",
+                "content_export": "/api/content/export/"
             },
             "notifications": {
                 "list": "/api/notifications/",
+                "unread_count": "/api/notifications/unread-count/",
                 "mark_read": "/api/notifications/<id>/read/",
                 "mark_all_read": "/api/notifications/read-all/"
             },
+            "query_metrics": "/_metrics/queries/",
             "admin": "/admin/"
         }
     })),
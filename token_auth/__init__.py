@@ -0,0 +1,40 @@
+# token_auth/__init__.py
+"""
+DRF token authentication with a token -> user id cache, shared by the Django
+projects in this repository (social_media_api, inventory_project).
+
+DRF's TokenAuthentication runs a `SELECT ... FROM authtoken_token JOIN
+<user table>` on every request. CachedTokenAuthentication keeps the token's
+user id in a Django cache (ACCOUNTS_TOKEN_CACHE, default 'default'), so every
+worker sharing that cache replaces the join with a primary-key lookup of the
+user after the first request with a token. Only ids are cached: the user row
+(password hash included) never leaves the database, and the token itself is
+hashed into the cache key.
+
+Revocation goes through the same shared cache, so it reaches every worker
+at once:
+
+* deleting a token (logout, rotation) deletes its entry;
+* saving a user (deactivation, password or profile change), or changing a
+  user's row through TokenCacheQuerySet.update(), bumps the user's version
+  key, which every cached entry for that user is checked against;
+* bulk writes that bypass both (raw SQL, a plain `queryset.update()` on a
+  user model without TokenCacheQuerySet) must call
+  `token_cache.invalidate_users(*ids)`; otherwise ACCOUNTS_TOKEN_CACHE_TTL
+  bounds how long the old user is served.
+
+With a per-process cache backend (locmem) each worker only sees its own
+invalidations and revocation can lag by up to ACCOUNTS_TOKEN_CACHE_TTL; run
+several workers against Redis or Memcached.
+
+Setup, in a project's settings:
+
+    INSTALLED_APPS += ['token_auth']
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = [
+        'token_auth.authentication.CachedTokenAuthentication', ...]
+
+Settings (all optional):
+
+    ACCOUNTS_TOKEN_CACHE       cache alias (default 'default')
+    ACCOUNTS_TOKEN_CACHE_TTL   seconds an entry lives; 0 disables (default 60)
+"""
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class TokenAuthConfig(AppConfig):
+    name = 'token_auth'
+    verbose_name = 'Cached token authentication'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,109 @@
+# token_auth/authentication.py
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+ALL = 'all'  # version checked by every entry; bumped by clear()
+
+
+def _token_key(key):
+    # Tokens are credentials: keep them out of cache key listings.
+    return f'tokenauth:t:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def _version_key(scope):
+    return f'tokenauth:v:{scope}'
+
+
+class TokenCache:
+    """
+    token key -> user id in a shared Django cache. Each entry records the
+    version of its user (and of ALL) when it was stored; invalidating a
+    user deletes that version key, so every entry for the user stops
+    matching in every process without having to be found. Only the id is
+    stored, never the user row (password hash included).
+    """
+
+    def __init__(self):
+        # Per-process counters, for the benchmarks and metrics.
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'ACCOUNTS_TOKEN_CACHE', 'default')]
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'ACCOUNTS_TOKEN_CACHE_TTL', 60)
+
+    def _versions(self, scopes):
+        keys = {_version_key(scope): scope for scope in scopes}
+        found = self.cache.get_many(list(keys))
+        versions = {}
+        for key, scope in keys.items():
+            if key not in found:
+                # time_ns, not 1: an evicted version never matches old entries.
+                self.cache.add(key, time.time_ns(), timeout=None)
+                found[key] = self.cache.get(key)
+            versions[scope] = found[key]
+        return versions
+
+    def get(self, key):
+        if self.ttl <= 0:
+            return None
+        entry = self.cache.get(_token_key(key))
+        if entry is not None:
+            user_version, all_version, user_id = entry
+            current = self.cache.get_many([_version_key(user_id), _version_key(ALL)])
+            if current == {_version_key(user_id): user_version, _version_key(ALL): all_version}:
+                self.hits += 1
+                return user_id
+        self.misses += 1
+        return None
+
+    def set(self, key, user_id):
+        if self.ttl <= 0:
+            return
+        versions = self._versions([user_id, ALL])
+        self.cache.set(_token_key(key), (versions[user_id], versions[ALL], user_id), self.ttl)
+
+    def invalidate(self, *keys):
+        self.cache.delete_many([_token_key(key) for key in keys])
+
+    def invalidate_users(self, *user_ids):
+        if user_ids:
+            self.cache.delete_many([_version_key(pk) for pk in set(user_ids)])
+
+    def clear(self):
+        self.cache.delete(_version_key(ALL))
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user_id = token_cache.get(key)
+        if user_id is not None:
+            # A primary-key lookup instead of the token -> user join.
+            user = get_user_model()._default_manager.filter(pk=user_id).first()
+            if user is not None and user.is_active:
+                # The unsaved Token (pk == key) still supports `request.auth.delete()`.
+                return user, self.get_model()(key=key, user=user)
+            token_cache.invalidate(key)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user.pk)
+        return user, token
@@ -0,0 +1,23 @@
+# token_auth/querysets.py
+from django.db import models
+
+from .authentication import token_cache
+
+# Columns whose change must reach cached users at once (update() sends no
+# post_save). Counter updates are left to their callers.
+AUTH_FIELDS = {'is_active', 'password', 'username', 'is_staff', 'is_superuser'}
+
+
+class TokenCacheQuerySet(models.QuerySet):
+    """
+    A user queryset whose update() of an auth column (e.g. deactivating
+    users in bulk) invalidates their cached tokens.
+    """
+
+    def update(self, **kwargs):
+        if not AUTH_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        user_ids = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        token_cache.invalidate_users(*user_ids)
+        return updated
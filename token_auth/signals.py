@@ -0,0 +1,23 @@
+# token_auth/signals.py
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=Token)
+def forget_rotated_token(sender, instance, **kwargs):
+    token_cache.invalidate_users(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_saved_user(sender, instance, created, **kwargs):
+    if not created:
+        token_cache.invalidate_users(instance.pk)